@@ -5,20 +5,20 @@ from __future__ import annotations
 import os
 from typing import Any, Dict, List, Optional
 
-from .services import build_portfolio_summary, predict_risks
-from .models import Project, Risk, Vendor
+from .models import Project
 
+# `summary` is build_portfolio_summary output and `flags` maps project_id to
+# predict_risks output; both are precomputed per data snapshot (backend.state).
 
-def _build_prompt(question: str, projects: List[Project], risks: List[Risk], vendors: List[Vendor]) -> str:
-    summary = build_portfolio_summary(projects, risks, vendors)
-    top_risky = sorted(projects, key=lambda p: p.risk_score, reverse=True)[:5]
+
+def _build_prompt(question: str, summary: Dict[str, Any]) -> str:
 
     bullets = [
         f"Total projects: {summary['total_projects']}",
         f"Projects delayed: {summary['percent_delayed']:.1f}%",
         f"Average cost overrun: {summary['avg_cost_overrun_pct']*100:.1f}%",
         f"High risk projects (heuristic): {summary['high_risk_count']}",
-        "Top risky projects: " + ", ".join([p.project_id for p in top_risky]),
+        "Top risky projects: " + ", ".join(summary["top_risky_projects"]),
     ]
 
     context = "\n".join([f"- {b}" for b in bullets])
@@ -36,11 +36,12 @@ def _build_prompt(question: str, projects: List[Project], risks: List[Risk], ven
     return prompt
 
 
-def _mock_answer(question: str, projects: List[Project], risks: List[Risk], vendors: List[Vendor]) -> Dict[str, Any]:
+def _mock_answer(
+    question: str, projects: List[Project], summary: Dict[str, Any], flags: Dict[str, Dict[str, Any]]
+) -> Dict[str, Any]:
     # Simple rule-based response if OpenAI key is not provided.
-    summary = build_portfolio_summary(projects, risks, vendors)
-    high_delay = [p for p in projects if predict_risks(p, vendors)["high_delay_risk"]]
-    cost_overrun = [p for p in projects if predict_risks(p, vendors)["cost_overrun_risk"]]
+    high_delay = [p for p in projects if flags[p.project_id]["high_delay_risk"]]
+    cost_overrun = [p for p in projects if flags[p.project_id]["cost_overrun_risk"]]
 
     insights: List[str] = []
     q = question.lower()
@@ -50,11 +51,11 @@ def _mock_answer(question: str, projects: List[Project], risks: List[Risk], vend
             insights.append(f"{len(cost_overrun)} projects are at risk of cost overruns (close to budget and <70% complete).")
     elif "budget" in q or "cost" in q:
         insights.append(f"Average cost overrun is {summary['avg_cost_overrun_pct']*100:.1f}% across the portfolio.")
-        top_overrun = sorted(projects, key=lambda p: predict_risks(p, vendors)["cost_overrun_pct"], reverse=True)[:3]
+        top_overrun = sorted(projects, key=lambda p: flags[p.project_id]["cost_overrun_pct"], reverse=True)[:3]
         if top_overrun:
             insights.append(
                 "Top overrun projects: "
-                + ", ".join(f"{p.project_id} ({predict_risks(p, vendors)['cost_overrun_pct']*100:.0f}% over)" for p in top_overrun)
+                + ", ".join(f"{p.project_id} ({flags[p.project_id]['cost_overrun_pct']*100:.0f}% over)" for p in top_overrun)
             )
     else:
         insights.append(
@@ -74,16 +75,18 @@ def _mock_answer(question: str, projects: List[Project], risks: List[Risk], vend
     }
 
 
-def ask(question: str, projects: List[Project], risks: List[Risk], vendors: List[Vendor]) -> Dict[str, Any]:
+def ask(
+    question: str, projects: List[Project], summary: Dict[str, Any], flags: Dict[str, Dict[str, Any]]
+) -> Dict[str, Any]:
     openai_key = os.getenv("OPENAI_API_KEY")
     if not openai_key:
-        return _mock_answer(question, projects, risks, vendors)
+        return _mock_answer(question, projects, summary, flags)
 
     try:
         import openai
 
         openai.api_key = openai_key
-        prompt = _build_prompt(question, projects, risks, vendors)
+        prompt = _build_prompt(question, summary)
         response = openai.ChatCompletion.create(
             model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
             messages=[{"role": "system", "content": "You are a helpful AI copilot for capital expenditure projects."},
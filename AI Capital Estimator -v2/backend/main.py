@@ -2,32 +2,67 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from .ai import ask
 from .data_gen import generate_synthetic_data
 from .models import AskRequest, Project, Risk, Vendor
-from .services import (
-    build_portfolio_summary,
-    format_project_for_api,
-    load_data,
-    predict_risks,
-    calculate_cost_overrun_pct,
-    calculate_schedule_variance,
+from .queries import (
+    DEFAULT_LIMIT,
+    FLAG_FIELDS,
+    MAX_LIMIT,
+    PROJECT_FIELDS,
+    PROJECT_SORTS,
+    RISK_FIELDS,
+    RISK_SORTS,
+    CursorMismatch,
+    decode_cursor,
+    page_envelope,
+    page_positions,
+    parse_fields,
+    parse_sort,
+    project_fields,
+    project_filters,
+    query_key,
+    risk_fields,
+    risk_filters,
 )
+from .services import format_project_for_api
+from .state import AppState, DataSnapshot
 
 
 load_dotenv()
 
 DATA_PATH = os.getenv("DATA_PATH", "backend/data.json")
+DATA_POLL_INTERVAL_S = float(os.getenv("DATA_POLL_INTERVAL_S", "2.0"))
 
-app = FastAPI(title="AI Capex Project Copilot API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    data_file = Path(DATA_PATH)
+    if not data_file.exists():
+        # Generate and write synthetic data
+        generate_synthetic_data(output_path=str(data_file))
+    state = AppState(str(data_file))
+    app.state.data = state
+    # The first load runs in the watcher, so the server accepts requests (and
+    # reports not-ready on /ready) while data.json is parsed and validated.
+    watcher = asyncio.create_task(state.watch(DATA_POLL_INTERVAL_S))
+    try:
+        yield
+    finally:
+        watcher.cancel()
+
+
+app = FastAPI(title="AI Capex Project Copilot API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -37,12 +72,12 @@ app.add_middleware(
 )
 
 
-def _ensure_data() -> Dict[str, Any]:
-    data_file = Path(DATA_PATH)
-    if not data_file.exists():
-        # Generate and write synthetic data
-        generate_synthetic_data(output_path=str(data_file))
-    return load_data(str(data_file))
+def get_snapshot(request: Request) -> DataSnapshot:
+    """The current data snapshot; a request keeps the one it started with across reloads."""
+    snapshot = request.app.state.data.snapshot
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="Data is still loading")
+    return snapshot
 
 
 @app.get("/health")
@@ -50,29 +85,94 @@ def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready(request: Request):
+    status = request.app.state.data.status()
+    if not status["ready"]:
+        raise HTTPException(status_code=503, detail=status)
+    return status
+
+
+def _page_start(snapshot: DataSnapshot, offset: int, cursor: Optional[str], query: str):
+    """(offset, resume, total); resume and total are None on a first page."""
+    if cursor is None:
+        return offset, None, None
+    try:
+        return decode_cursor(cursor, snapshot.version, query)
+    except CursorMismatch as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _parse_view(sort: Optional[str], fields: Optional[str], sorts, allowed_fields):
+    try:
+        return parse_sort(sort, sorts), parse_fields(fields, allowed_fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
 @app.get("/projects")
-def get_projects() -> List[Dict[str, Any]]:
-    data = _ensure_data()
-    projects: List[Project] = data["projects"]
-    vendors: List[Vendor] = data["vendors"]
-    return [format_project_for_api(p, vendors) for p in projects]
+def get_projects(
+    snapshot: DataSnapshot = Depends(get_snapshot),
+    status: Optional[str] = None,
+    asset_type: Optional[str] = None,
+    location: Optional[str] = None,
+    vendor_id: Optional[str] = None,
+    min_risk_score: Optional[float] = Query(None, ge=0.0, le=1.0),
+    max_risk_score: Optional[float] = Query(None, ge=0.0, le=1.0),
+    high_delay_risk: Optional[bool] = None,
+    cost_overrun_risk: Optional[bool] = None,
+    sort: Optional[str] = Query(None, description="Field to sort by; prefix with '-' for descending"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; overrides offset"),
+) -> Dict[str, Any]:
+    (sort_key, descending), names = _parse_view(sort, fields, PROJECT_SORTS, PROJECT_FIELDS + FLAG_FIELDS)
+    params = dict(
+        status=status,
+        asset_type=asset_type,
+        location=location,
+        vendor_id=vendor_id,
+        min_risk_score=min_risk_score,
+        max_risk_score=max_risk_score,
+        high_delay_risk=high_delay_risk,
+        cost_overrun_risk=cost_overrun_risk,
+    )
+    query = query_key(sort_key, descending, **params)
+    start, resume, known_total = _page_start(snapshot, offset, cursor, query)
+    projects: List[Project] = snapshot.projects
+    vendors: Dict[str, Vendor] = snapshot.vendors_by_id
+    index = snapshot.project_index
+
+    filters = project_filters(index, **params)
+    order = index.sort_orders[sort_key] if sort_key else None
+    positions, total, next_resume = page_positions(
+        len(projects), filters, order, descending, start, limit, resume, known_total
+    )
+
+    items = []
+    for i in positions:
+        p = projects[i]
+        flags = snapshot.flags[p.project_id]
+        items.append(format_project_for_api(p, vendors, flags) if names is None else project_fields(p, flags, names))
+    return page_envelope(items, total, start, limit, snapshot.version, query, next_resume)
 
 
 @app.get("/projects/{project_id}")
-def get_project(project_id: str) -> Dict[str, Any]:
-    data = _ensure_data()
-    projects: List[Project] = data["projects"]
-    vendors: List[Vendor] = data["vendors"]
-    risks: List[Risk] = data["risks"]
+def get_project(project_id: str, snapshot: DataSnapshot = Depends(get_snapshot)) -> Dict[str, Any]:
+    vendors: Dict[str, Vendor] = snapshot.vendors_by_id
 
-    proj = next((p for p in projects if p.project_id == project_id), None)
+    proj = snapshot.projects_by_id.get(project_id)
     if not proj:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    related_risks = [r for r in risks if r.project_id == project_id]
-    proj_data = format_project_for_api(proj, vendors)
+    related_risks = snapshot.risks_by_project.get(project_id, [])
+    vendor = vendors.get(proj.vendor_id)
+    proj_data = format_project_for_api(proj, vendors, snapshot.flags[project_id])
     proj_data["risks"] = [r.model_dump() for r in related_risks]
-    proj_data["vendor"] = next((v.model_dump() for v in vendors if v.vendor_id == proj.vendor_id), None)
+    proj_data["vendor"] = vendor.model_dump() if vendor else None
     proj_data["recommendations"] = []
 
     # Add recommended actions
@@ -89,31 +189,43 @@ def get_project(project_id: str) -> Dict[str, Any]:
 
 
 @app.get("/portfolio/summary")
-def portfolio_summary() -> Dict[str, Any]:
-    data = _ensure_data()
-    projects: List[Project] = data["projects"]
-    vendors: List[Vendor] = data["vendors"]
-    risks: List[Risk] = data["risks"]
-
-    summary = build_portfolio_summary(projects, risks, vendors)
-    return summary
+def portfolio_summary(snapshot: DataSnapshot = Depends(get_snapshot)) -> Dict[str, Any]:
+    # Computed once per data version; see backend.state.
+    return snapshot.summary
 
 
 @app.get("/risks")
-def get_risks() -> List[Dict[str, Any]]:
-    data = _ensure_data()
-    risks: List[Risk] = data["risks"]
-    return [r.model_dump() for r in risks]
+def get_risks(
+    snapshot: DataSnapshot = Depends(get_snapshot),
+    project_id: Optional[str] = None,
+    risk_type: Optional[str] = None,
+    sort: Optional[str] = Query(None, description="Field to sort by; prefix with '-' for descending"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; overrides offset"),
+) -> Dict[str, Any]:
+    (sort_key, descending), names = _parse_view(sort, fields, RISK_SORTS, RISK_FIELDS)
+    query = query_key(sort_key, descending, project_id=project_id, risk_type=risk_type)
+    start, resume, known_total = _page_start(snapshot, offset, cursor, query)
+    risks: List[Risk] = snapshot.risks
+    index = snapshot.risk_index
+
+    filters = risk_filters(index, project_id=project_id, risk_type=risk_type)
+    order = index.sort_orders[sort_key] if sort_key else None
+    positions, total, next_resume = page_positions(
+        len(risks), filters, order, descending, start, limit, resume, known_total
+    )
+
+    items = [risks[i].model_dump() if names is None else risk_fields(risks[i], names) for i in positions]
+    return page_envelope(items, total, start, limit, snapshot.version, query, next_resume)
 
 
 @app.post("/ask")
-def ask_question(body: AskRequest) -> Dict[str, Any]:
-    data = _ensure_data()
-    projects: List[Project] = data["projects"]
-    risks: List[Risk] = data["risks"]
-    vendors: List[Vendor] = data["vendors"]
+def ask_question(body: AskRequest, snapshot: DataSnapshot = Depends(get_snapshot)) -> Dict[str, Any]:
+    projects: List[Project] = snapshot.projects
 
-    response = ask(body.question, projects, risks, vendors)
+    response = ask(body.question, projects, snapshot.summary, snapshot.flags)
     return response
 
 
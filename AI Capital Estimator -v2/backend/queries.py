@@ -0,0 +1,344 @@
+"""Filtered, sorted and paginated views over a data snapshot, served from per-snapshot indexes."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .models import Project, Risk
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+PROJECT_FIELDS = tuple(Project.model_fields)
+FLAG_FIELDS = ("vendor_reliability", "high_delay_risk", "cost_overrun_risk", "schedule_variance_days", "cost_overrun_pct")
+PROJECT_SORTS = (
+    "project_id",
+    "project_name",
+    "budget_usd",
+    "actual_cost_usd",
+    "planned_end_date",
+    "percent_complete",
+    "risk_score",
+    "roi_expected",
+    "cost_overrun_pct",
+    "schedule_variance_days",
+)
+RISK_FIELDS = tuple(Risk.model_fields)
+RISK_SORTS = ("risk_id", "project_id", "probability", "impact_cost", "impact_days")
+# Position-ordered risk-score ranges kept per snapshot, so cursor pages of one range query sort it once.
+RANGE_CACHE_SIZE = 64
+
+
+class CursorMismatch(ValueError):
+    """The cursor was issued against a different data version."""
+
+
+# A filter is (positions, in_position_order, test): the positions that can
+# match (a precomputed list, in any order), a callable returning the same
+# positions in position order for unsorted walks, and a per-position
+# membership test used while walking another filter's list or a sort order.
+Filter = Tuple[Sequence[int], Callable[[], Sequence[int]], Callable[[int], bool]]
+
+
+@dataclass(frozen=True)
+class ProjectIndex:
+    """Positions (into snapshot.projects) grouped by filterable value, per-position columns and sort orders."""
+
+    by_status: Dict[str, List[int]]
+    by_asset_type: Dict[str, List[int]]
+    by_location: Dict[str, List[int]]
+    by_vendor: Dict[str, List[int]]
+    status: List[str]
+    asset_type: List[str]
+    location: List[str]
+    vendor_id: List[str]
+    high_delay: List[bool]
+    cost_overrun: List[bool]
+    # (flag, value) -> positions, both values precomputed so no filter builds a complement per request.
+    flag_positions: Dict[Tuple[str, bool], List[int]]
+    # risk_score ascending with the matching positions, for range filters via bisect.
+    risk_scores: List[float]
+    risk_positions: List[int]
+    risk_score: List[float]
+    sort_orders: Dict[str, List[int]]
+    # (lo, hi) bisect bounds into risk_scores -> those positions in position order.
+    range_cache: Dict[Tuple[int, int], List[int]] = field(default_factory=dict, compare=False, repr=False)
+    range_lock: threading.Lock = field(default_factory=threading.Lock, compare=False, repr=False)
+
+
+@dataclass(frozen=True)
+class RiskIndex:
+    by_project: Dict[str, List[int]]
+    by_type: Dict[str, List[int]]
+    project_id: List[str]
+    risk_type: List[str]
+    sort_orders: Dict[str, List[int]]
+
+
+def _group(values: Iterable[str]) -> Dict[str, List[int]]:
+    grouped: Dict[str, List[int]] = {}
+    for i, value in enumerate(values):
+        grouped.setdefault(value, []).append(i)
+    return grouped
+
+
+def _sort_order(values: Sequence[Any]) -> List[int]:
+    # Stable, so ties keep file order.
+    return sorted(range(len(values)), key=values.__getitem__)
+
+
+def build_project_index(projects: List[Project], flags: Dict[str, Dict[str, Any]]) -> ProjectIndex:
+    rows = [flags[p.project_id] for p in projects]
+    high_delay = [bool(r["high_delay_risk"]) for r in rows]
+    cost_overrun = [bool(r["cost_overrun_risk"]) for r in rows]
+    risk_score = [p.risk_score for p in projects]
+    by_score = _sort_order(risk_score)
+    sort_orders = {}
+    for key in PROJECT_SORTS:
+        if key in FLAG_FIELDS:
+            sort_orders[key] = _sort_order([r[key] for r in rows])
+        else:
+            sort_orders[key] = _sort_order([getattr(p, key) for p in projects])
+    flag_positions = {}
+    for name, column in (("high_delay_risk", high_delay), ("cost_overrun_risk", cost_overrun)):
+        for wanted in (True, False):
+            flag_positions[(name, wanted)] = [i for i, v in enumerate(column) if v is wanted]
+    status = [p.status for p in projects]
+    asset_type = [p.asset_type for p in projects]
+    location = [p.location for p in projects]
+    vendor_id = [p.vendor_id for p in projects]
+    return ProjectIndex(
+        by_status=_group(status),
+        by_asset_type=_group(asset_type),
+        by_location=_group(location),
+        by_vendor=_group(vendor_id),
+        status=status,
+        asset_type=asset_type,
+        location=location,
+        vendor_id=vendor_id,
+        high_delay=high_delay,
+        cost_overrun=cost_overrun,
+        flag_positions=flag_positions,
+        risk_scores=[risk_score[i] for i in by_score],
+        risk_positions=by_score,
+        risk_score=risk_score,
+        sort_orders=sort_orders,
+    )
+
+
+def build_risk_index(risks: List[Risk]) -> RiskIndex:
+    project_id = [r.project_id for r in risks]
+    risk_type = [r.risk_type for r in risks]
+    return RiskIndex(
+        by_project=_group(project_id),
+        by_type=_group(risk_type),
+        project_id=project_id,
+        risk_type=risk_type,
+        sort_orders={key: _sort_order([getattr(r, key) for r in risks]) for key in RISK_SORTS},
+    )
+
+
+def _equals(groups: Dict[str, List[int]], column: List[Any], value: Any) -> Filter:
+    positions = groups.get(value, [])
+    return positions, lambda: positions, lambda i: column[i] == value
+
+
+def _ordered_range(index: ProjectIndex, lo: int, hi: int) -> List[int]:
+    """risk_positions[lo:hi] in position order, sorted once per snapshot and range."""
+    with index.range_lock:
+        cached = index.range_cache.get((lo, hi))
+        if cached is None:
+            if len(index.range_cache) >= RANGE_CACHE_SIZE:
+                del index.range_cache[next(iter(index.range_cache))]
+            cached = index.range_cache[(lo, hi)] = sorted(index.risk_positions[lo:hi])
+        return cached
+
+
+def project_filters(
+    index: ProjectIndex,
+    status: Optional[str] = None,
+    asset_type: Optional[str] = None,
+    location: Optional[str] = None,
+    vendor_id: Optional[str] = None,
+    min_risk_score: Optional[float] = None,
+    max_risk_score: Optional[float] = None,
+    high_delay_risk: Optional[bool] = None,
+    cost_overrun_risk: Optional[bool] = None,
+) -> List[Filter]:
+    filters: List[Filter] = []
+    for value, groups, column in (
+        (status, index.by_status, index.status),
+        (asset_type, index.by_asset_type, index.asset_type),
+        (location, index.by_location, index.location),
+        (vendor_id, index.by_vendor, index.vendor_id),
+    ):
+        if value is not None:
+            filters.append(_equals(groups, column, value))
+    if min_risk_score is not None or max_risk_score is not None:
+        lo_score = min_risk_score if min_risk_score is not None else float("-inf")
+        hi_score = max_risk_score if max_risk_score is not None else float("inf")
+        lo = bisect_left(index.risk_scores, lo_score)
+        hi = bisect_right(index.risk_scores, hi_score)
+        scores = index.risk_score
+        filters.append(
+            (index.risk_positions[lo:hi], lambda: _ordered_range(index, lo, hi), lambda i: lo_score <= scores[i] <= hi_score)
+        )
+    for name, wanted, column in (
+        ("high_delay_risk", high_delay_risk, index.high_delay),
+        ("cost_overrun_risk", cost_overrun_risk, index.cost_overrun),
+    ):
+        if wanted is not None:
+            positions = index.flag_positions[(name, wanted)]
+            filters.append((positions, lambda p=positions: p, lambda i, c=column, w=wanted: c[i] is w))
+    return filters
+
+
+def risk_filters(index: RiskIndex, project_id: Optional[str] = None, risk_type: Optional[str] = None) -> List[Filter]:
+    filters: List[Filter] = []
+    if project_id is not None:
+        filters.append(_equals(index.by_project, index.project_id, project_id))
+    if risk_type is not None:
+        filters.append(_equals(index.by_type, index.risk_type, risk_type))
+    return filters
+
+
+def parse_sort(sort: Optional[str], allowed: Sequence[str]) -> Tuple[Optional[str], bool]:
+    """'risk_score' or '-risk_score' -> (key, descending)."""
+    if not sort:
+        return None, False
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key not in allowed:
+        raise ValueError(f"Cannot sort by {key!r}; expected one of: {', '.join(allowed)}")
+    return key, descending
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def query_key(sort_key: Optional[str], descending: bool, **filters: Any) -> str:
+    """Short hash of a listing's filters and sort, carried in its cursors."""
+    raw = json.dumps({"filters": filters, "sort": [sort_key, descending]}, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()[:12]
+
+
+def encode_cursor(version: int, query: str, offset: int, resume: int, total: int) -> str:
+    raw = f"{version}:{query}:{offset}:{resume}:{total}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, version: int, query: str) -> Tuple[int, int, int]:
+    """
+    (offset, resume, total) encoded in `cursor`. `resume` is where the previous
+    page's walk stopped, so the next page continues from there instead of
+    skipping `offset` matches again. A cursor sent with different filters or
+    sort than it was issued for raises ValueError; one issued for another data
+    version raises CursorMismatch.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        cursor_version, cursor_query, offset, resume, total = raw.split(":")
+        cursor_version, offset, resume, total = int(cursor_version), int(offset), int(resume), int(total)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Malformed cursor")
+    if cursor_query != query:
+        raise ValueError("Cursor was issued for different filters or sort; send the same query or drop the cursor")
+    if cursor_version != version:
+        raise CursorMismatch("Data has changed since this cursor was issued; restart from the first page")
+    return max(0, offset), max(0, resume), max(0, total)
+
+
+def page_positions(
+    n: int,
+    filters: List[Filter],
+    order: Optional[List[int]],
+    descending: bool,
+    offset: int,
+    limit: int,
+    resume: Optional[int] = None,
+    total: Optional[int] = None,
+) -> Tuple[List[int], int, int]:
+    """
+    Positions for one page, the total match count and the resume point for the
+    next page. Without filters a page is a slice of the identity or of a
+    precomputed sort order. With filters, the walk covers the smallest filter's
+    positions in position order (unsorted; a risk-score range is sorted once
+    per snapshot and cached) or the sort order (sorted), testing the other
+    filters per position. It starts at `resume` when continuing from a cursor.
+    `total` is counted on the first page and carried in the cursor after that.
+    """
+    if not filters:
+        start = offset if resume is None else resume
+        if order is None:
+            positions = list(range(start, min(n, start + limit)))
+        elif descending:
+            end = max(0, n - start)
+            positions = order[max(0, end - limit):end][::-1]
+        else:
+            positions = order[start:start + limit]
+        return positions, n, start + len(positions)
+
+    driver = min(range(len(filters)), key=lambda k: len(filters[k][0]))
+    driver_positions, in_position_order, _ = filters[driver]
+    others = [test for k, (_, _, test) in enumerate(filters) if k != driver]
+    if total is None:
+        total = sum(1 for i in driver_positions if all(test(i) for test in others))
+
+    if order is None:
+        walk: Sequence[int] = in_position_order()
+        tests = others
+    else:
+        walk = order
+        tests = others + [filters[driver][2]]
+    length = len(walk)
+
+    page: List[int] = []
+    skip = 0 if resume is not None else offset
+    j = resume if resume is not None else 0
+    while j < length and len(page) < limit:
+        i = walk[length - 1 - j] if descending and order is not None else walk[j]
+        j += 1
+        if not all(test(i) for test in tests):
+            continue
+        if skip:
+            skip -= 1
+            continue
+        page.append(i)
+    return page, total, j
+
+
+def project_fields(project: Project, flags: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """`fields=` projection of a project row; reads attributes directly instead of dumping the model."""
+    return {f: flags[f] if f in FLAG_FIELDS else getattr(project, f) for f in fields}
+
+
+def risk_fields(risk: Risk, fields: List[str]) -> Dict[str, Any]:
+    return {f: getattr(risk, f) for f in fields}
+
+
+def page_envelope(
+    items: List[Dict[str, Any]], total: int, offset: int, limit: int, version: int, query: str, resume: int
+) -> Dict[str, Any]:
+    end = offset + len(items)
+    return {
+        "items": items,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "next_cursor": encode_cursor(version, query, end, resume, total) if end < total else None,
+        "version": version,
+    }
@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 from datetime import date
-from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
 from .models import Project, Risk, Vendor
@@ -24,9 +23,24 @@ def calculate_cost_overrun_pct(project: Project) -> float:
     return (project.actual_cost_usd - project.budget_usd) / project.budget_usd
 
 
-def is_high_risk(project: Project, vendors: List[Vendor]) -> bool:
+def index_vendors(vendors: List[Vendor]) -> Dict[str, Vendor]:
+    return {v.vendor_id: v for v in vendors}
+
+
+def index_projects(projects: List[Project]) -> Dict[str, Project]:
+    return {p.project_id: p for p in projects}
+
+
+def group_risks_by_project(risks: List[Risk]) -> Dict[str, List[Risk]]:
+    grouped: Dict[str, List[Risk]] = {}
+    for r in risks:
+        grouped.setdefault(r.project_id, []).append(r)
+    return grouped
+
+
+def is_high_risk(project: Project, vendors: Dict[str, Vendor]) -> bool:
     # Risk criteria based on vendor reliability and cost/schedule
-    vendor = next((v for v in vendors if v.vendor_id == project.vendor_id), None)
+    vendor = vendors.get(project.vendor_id)
     # Fallback heuristic: use risk_score
     if project.risk_score > 0.75:
         return True
@@ -38,10 +52,10 @@ def is_high_risk(project: Project, vendors: List[Vendor]) -> bool:
     return False
 
 
-def predict_risks(project: Project, vendors: List[Vendor]) -> Dict[str, Any]:
-    """Return simple prediction flags for a project."""
+def predict_risks(project: Project, vendors: Dict[str, Vendor]) -> Dict[str, Any]:
+    """Return simple prediction flags for a project. `vendors` is keyed by vendor_id (see index_vendors)."""
     flags: Dict[str, Any] = {}
-    vendor = next((v for v in vendors if v.vendor_id == project.vendor_id), None)
+    vendor = vendors.get(project.vendor_id)
     if vendor:
         flags["vendor_reliability"] = vendor.reliability_score
         flags["high_delay_risk"] = vendor.reliability_score < 0.7 and project.percent_complete < 0.5
@@ -57,7 +71,7 @@ def predict_risks(project: Project, vendors: List[Vendor]) -> Dict[str, Any]:
     return flags
 
 
-def build_portfolio_summary(projects: List[Project], risks: List[Risk], vendors: List[Vendor]) -> Dict[str, Any]:
+def build_portfolio_summary(projects: List[Project], risks: List[Risk], vendors: Dict[str, Vendor]) -> Dict[str, Any]:
     total_budget = sum(p.budget_usd for p in projects)
     total_actual = sum(p.actual_cost_usd for p in projects)
     delayed = [p for p in projects if p.status == "Delayed"]
@@ -82,14 +96,21 @@ def build_portfolio_summary(projects: List[Project], risks: List[Risk], vendors:
     }
 
 
-def format_project_for_api(project: Project, vendors: List[Vendor]) -> Dict[str, Any]:
+def build_flags_table(projects: List[Project], vendors: Dict[str, Vendor]) -> Dict[str, Dict[str, Any]]:
+    """predict_risks for every project, keyed by project_id. Built once per data snapshot."""
+    return {p.project_id: predict_risks(p, vendors) for p in projects}
+
+
+def format_project_for_api(
+    project: Project, vendors: Dict[str, Vendor], flags: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
     data = project.model_dump()
-    data.update(predict_risks(project, vendors))
+    data.update(flags if flags is not None else predict_risks(project, vendors))
     return data
 
 
-@lru_cache(maxsize=1)
 def load_data(path: str) -> Dict[str, Any]:
+    """Parse and validate the data file. Uncached: backend.state.AppState owns reloads."""
     import json
 
     from pathlib import Path
@@ -0,0 +1,128 @@
+"""Application data state: versioned snapshots of data.json with hot reload."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import Project, Risk, Vendor
+from .queries import ProjectIndex, RiskIndex, build_project_index, build_risk_index
+from .services import (
+    build_flags_table,
+    build_portfolio_summary,
+    group_risks_by_project,
+    index_projects,
+    index_vendors,
+    load_data,
+)
+
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    """
+    One loaded version of the data file with its lookup indexes and derived
+    values (per-project flags, portfolio summary). Never mutated; reloads build
+    a new one, so derived values are computed once per version.
+    """
+
+    version: int
+    path: str
+    signature: Tuple[int, int]
+    loaded_at: float
+    projects: List[Project]
+    risks: List[Risk]
+    vendors: List[Vendor]
+    projects_by_id: Dict[str, Project]
+    vendors_by_id: Dict[str, Vendor]
+    risks_by_project: Dict[str, List[Risk]]
+    flags: Dict[str, Dict[str, Any]]
+    summary: Dict[str, Any]
+    project_index: ProjectIndex
+    risk_index: RiskIndex
+
+
+def file_signature(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class AppState:
+    """
+    Holds the current DataSnapshot. `reload()` parses the file off to the side
+    and swaps the snapshot in one assignment, so a request that has taken a
+    snapshot keeps a consistent view while a newer one is loaded. A file that
+    fails to parse (e.g. half-written) leaves the previous snapshot in place.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.snapshot: Optional[DataSnapshot] = None
+        self.last_error: Optional[str] = None
+        self._failed_signature: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.snapshot is not None
+
+    def reload(self, force: bool = False) -> bool:
+        """Load the file if it changed since the current snapshot. Returns True if a new snapshot was installed."""
+        with self._lock:
+            try:
+                signature = file_signature(self.path)
+            except OSError as exc:
+                self.last_error = str(exc)
+                return False
+            current = self.snapshot
+            if not force and (
+                (current is not None and current.signature == signature) or signature == self._failed_signature
+            ):
+                return False
+            try:
+                payload = load_data(self.path)
+            except Exception as exc:
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                self._failed_signature = signature
+                return False
+            projects, risks = payload["projects"], payload["risks"]
+            vendors_by_id = index_vendors(payload["vendors"])
+            flags = build_flags_table(projects, vendors_by_id)
+            self.snapshot = DataSnapshot(
+                version=(current.version + 1) if current is not None else 1,
+                path=self.path,
+                signature=signature,
+                loaded_at=time.time(),
+                projects=projects,
+                risks=risks,
+                vendors=payload["vendors"],
+                projects_by_id=index_projects(projects),
+                vendors_by_id=vendors_by_id,
+                risks_by_project=group_risks_by_project(risks),
+                flags=flags,
+                summary=build_portfolio_summary(projects, risks, vendors_by_id),
+                project_index=build_project_index(projects, flags),
+                risk_index=build_risk_index(risks),
+            )
+            self.last_error = None
+            self._failed_signature = None
+            return True
+
+    async def watch(self, interval_s: float):
+        """Poll the file's mtime/size and reload in a worker thread when it changes."""
+        while True:
+            await asyncio.to_thread(self.reload)
+            await asyncio.sleep(interval_s)
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self.snapshot
+        return {
+            "ready": snapshot is not None,
+            "version": snapshot.version if snapshot else None,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "projects": len(snapshot.projects) if snapshot else 0,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,62 @@
+"""Cursor paging over the per-snapshot indexes."""
+
+from pathlib import Path
+
+import pytest
+
+from backend.queries import (
+    CursorMismatch,
+    decode_cursor,
+    encode_cursor,
+    page_positions,
+    project_filters,
+    query_key,
+)
+from backend.state import AppState
+
+SAMPLE_DATA = Path(__file__).resolve().parents[1] / "data.json"
+
+
+@pytest.fixture(scope="module")
+def snapshot():
+    state = AppState(str(SAMPLE_DATA))
+    assert state.reload()
+    return state.snapshot
+
+
+def test_unsorted_risk_range_pages_in_file_order(snapshot):
+    index = snapshot.project_index
+    params = dict(min_risk_score=0.2, max_risk_score=0.8)
+    expected = [i for i, p in enumerate(snapshot.projects) if 0.2 <= p.risk_score <= 0.8]
+    assert expected
+
+    filters = project_filters(index, **params)
+    query = query_key(None, False, **params)
+    seen, offset, resume, total = [], 0, None, None
+    while True:
+        page, total, next_resume = page_positions(len(snapshot.projects), filters, None, False, offset, 7, resume, total)
+        seen += page
+        offset += len(page)
+        if offset >= total:
+            break
+        offset, resume, total = decode_cursor(encode_cursor(snapshot.version, query, offset, next_resume, total),
+                                              snapshot.version, query)
+        filters = project_filters(index, **params)
+    assert seen == expected
+    # The position-ordered range was sorted once and reused by every page.
+    assert len(index.range_cache) == 1
+
+
+def test_cursor_rejects_other_query_and_version(snapshot):
+    query = query_key("risk_score", True, status="Active")
+    cursor = encode_cursor(snapshot.version, query, 10, 25, 40)
+    assert decode_cursor(cursor, snapshot.version, query) == (10, 25, 40)
+
+    other_sort = query_key("risk_score", False, status="Active")
+    with pytest.raises(ValueError) as exc:
+        decode_cursor(cursor, snapshot.version, other_sort)
+    assert not isinstance(exc.value, CursorMismatch)
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, snapshot.version, query_key("risk_score", True, status="Closed"))
+    with pytest.raises(CursorMismatch):
+        decode_cursor(cursor, snapshot.version + 1, query)
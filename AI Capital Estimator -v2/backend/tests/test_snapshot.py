@@ -0,0 +1,72 @@
+"""Materialized per-snapshot flags and summary must match the on-the-fly computation."""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from backend.services import build_portfolio_summary, format_project_for_api, index_vendors, predict_risks
+from backend.state import AppState
+
+SAMPLE_DATA = Path(__file__).resolve().parents[1] / "data.json"
+
+
+def assert_matches_on_the_fly(snapshot):
+    vendors = index_vendors(snapshot.vendors)
+    assert set(snapshot.flags) == {p.project_id for p in snapshot.projects}
+    for project in snapshot.projects:
+        assert snapshot.flags[project.project_id] == predict_risks(project, vendors)
+        assert format_project_for_api(project, vendors, snapshot.flags[project.project_id]) == format_project_for_api(
+            project, vendors
+        )
+    assert snapshot.summary == build_portfolio_summary(snapshot.projects, snapshot.risks, vendors)
+
+
+@pytest.fixture
+def state(tmp_path):
+    path = tmp_path / "data.json"
+    shutil.copy(SAMPLE_DATA, path)
+    state = AppState(str(path))
+    assert state.reload()
+    return state
+
+
+def test_snapshot_matches_on_the_fly(state):
+    assert state.snapshot.version == 1
+    assert_matches_on_the_fly(state.snapshot)
+
+
+def test_reloaded_snapshot_matches_on_the_fly(state):
+    first = state.snapshot
+    first_flags = {k: dict(v) for k, v in first.flags.items()}
+    first_summary = dict(first.summary)
+
+    # Make every vendor unreliable and every project early-stage, so the flags and summary change.
+    payload = json.loads(Path(state.path).read_text())
+    payload["projects"] = payload["projects"][: len(payload["projects"]) // 2]
+    for project in payload["projects"]:
+        project["percent_complete"] = 0.1
+    for vendor in payload["vendors"]:
+        vendor["reliability_score"] = 0.5
+    Path(state.path).write_text(json.dumps(payload))
+    st = os.stat(state.path)
+    os.utime(state.path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    assert state.reload()
+    second = state.snapshot
+    assert second.version == 2
+    assert_matches_on_the_fly(second)
+    assert second.summary != first_summary
+    assert any(flags["high_delay_risk"] for flags in second.flags.values())
+
+    # The previous snapshot is left as it was for requests still holding it.
+    assert first.flags == first_flags
+    assert first.summary == first_summary
+
+
+def test_unchanged_file_keeps_snapshot(state):
+    first = state.snapshot
+    assert not state.reload()
+    assert state.snapshot is first
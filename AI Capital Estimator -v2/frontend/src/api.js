@@ -7,13 +7,37 @@ async function request(path, options = {}) {
     });
     if (!res.ok) {
         const text = await res.text();
-        throw new Error(`API error: ${res.status} ${res.statusText} - ${text}`);
+        const error = new Error(`API error: ${res.status} ${res.statusText} - ${text}`);
+        error.status = res.status;
+        throw error;
     }
     return res.json();
 }
 
-export async function getProjects() {
-    return request("/projects");
+// Returns one page: { items, total, offset, limit, next_cursor, version }.
+export async function getProjects(params = {}) {
+    const query = new URLSearchParams(
+        Object.entries(params).filter(([, value]) => value !== undefined && value !== null)
+    ).toString();
+    return request(query ? `/projects?${query}` : "/projects");
+}
+
+// Follows next_cursor until the last page. A 409 means the data was reloaded
+// mid-way (cursors are tied to a data version), so start over, at most twice.
+export async function getAllProjects(params = {}, retries = 2) {
+    const items = [];
+    let cursor = null;
+    try {
+        do {
+            const page = await getProjects({ ...params, cursor });
+            items.push(...page.items);
+            cursor = page.next_cursor;
+        } while (cursor);
+    } catch (err) {
+        if (err.status === 409 && retries > 0) return getAllProjects(params, retries - 1);
+        throw err;
+    }
+    return items;
 }
 
 export async function getProject(projectId) {
@@ -1,11 +1,14 @@
 import { useEffect, useState } from "react";
 
-import { getProjects, getPortfolioSummary } from "../api";
+import { getAllProjects, getPortfolioSummary } from "../api";
 import Loading from "../components/Loading";
 import PortfolioSummary from "../components/PortfolioSummary";
 import ProjectTable from "../components/ProjectTable";
 import AIChat from "../components/AIChat";
 
+// Only the columns ProjectTable renders.
+const TABLE_FIELDS = "project_id,project_name,budget_usd,actual_cost_usd,percent_complete,risk_score,status";
+
 export default function Dashboard() {
     const [projects, setProjects] = useState([]);
     const [summary, setSummary] = useState(null);
@@ -14,7 +17,7 @@ export default function Dashboard() {
 
     useEffect(() => {
         setLoading(true);
-        Promise.all([getProjects(), getPortfolioSummary()])
+        Promise.all([getAllProjects({ fields: TABLE_FIELDS, limit: 1000 }), getPortfolioSummary()])
             .then(([projectsData, summaryData]) => {
                 setProjects(projectsData);
                 setSummary(summaryData);
@@ -0,0 +1,245 @@
+"""
+Leave-one-out backtest of retrieval + fallback estimation against history.
+
+Each historical project is estimated from the others, the way the pipeline
+would estimate it as a new request (same type/region/country as the request),
+and the estimate is compared with its recorded total cost.
+
+prepare_backtest() computes the scaled pairwise distances once per project-type
+partition. run_backtest() then masks the diagonal (the held-out project), picks
+comparables with the Retriever's scope rules, applies the fallback factors and
+scales every project in one vectorized pass. Calls with different top_k,
+recency_weight, strict_country or capacity_exponent reuse the prepared
+distances; a different regional index needs a new prepare_backtest().
+
+The feature scaler is fit on the full history, as the Retriever is, rather than
+refit per held-out project.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import REGIONAL_INDEX
+from dataset import CapexDataset, get_dataset
+from estimator_agent import (
+    FALLBACK_CAPACITY_EXPONENT,
+    FALLBACK_COMPLEXITY_MODIFIER,
+    FALLBACK_ENGINEERING_PCT,
+)
+from retriever import Retriever
+from scaler import apply_cost_scaling_arrays, infer_inflation_factor
+
+WBS_KEYS = ["civil_cost", "mechanical_cost", "electrical_cost", "automation_cost"]
+SCOPES = np.array(["country_strict", "country", "region", "type", "global"])
+
+
+def _partition(q: np.ndarray, u: np.ndarray, X: np.ndarray, cols: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Distances and match masks between held-out rows q and candidate rows u (cols hold integer codes)."""
+    sq = np.zeros((len(q), len(u)))
+    for f in range(X.shape[1]):
+        sq += (X[q, f][:, None] - X[u, f][None, :]) ** 2
+    same_region = cols["region"][q][:, None] == cols["region"][u][None, :]
+    return {
+        "q": q,
+        "u": u,
+        "geom": np.sqrt(sq),
+        "self": q[:, None] == u[None, :],
+        "same_type": cols["project_type"][q][:, None] == cols["project_type"][u][None, :],
+        "same_region": same_region,
+        "same_country": same_region & (cols["country"][q][:, None] == cols["country"][u][None, :]),
+    }
+
+
+def prepare_backtest(data, regional_index: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    data: path to the projects CSV or a CapexDataset.
+    Returns the prepared arrays and per-type distance partitions for run_backtest.
+    """
+    dataset = data if isinstance(data, CapexDataset) else get_dataset(data)
+    regional_index = REGIONAL_INDEX if regional_index is None else regional_index
+    retriever = Retriever(dataset, regional_index)
+    X = retriever.scaler.transform(retriever.X_all)
+
+    projects = dataset.projects
+    # Integer codes make the pairwise match masks cheap to build.
+    cols = {name: pd.factorize(dataset.column(name))[0] for name in ["project_type", "region", "country"]}
+    year = dataset.column("execution_year", "float64")
+    n = len(projects)
+
+    partitions: List[Dict[str, Any]] = []
+    singles: List[np.ndarray] = []
+    for positions in projects.groupby("project_type", sort=True).indices.values():
+        positions = np.asarray(positions)
+        if len(positions) > 1:
+            partitions.append(_partition(positions, positions, X, cols))
+        else:
+            singles.append(positions)
+    if singles and n > 1:
+        # Only project of its type: the Retriever falls back to the whole history.
+        partitions.append(_partition(np.concatenate(singles), np.arange(n), X, cols))
+
+    year_max = float(year.max()) if n else 0.0
+    year_span = max(1.0, year_max - float(year.min())) if n else 1.0
+    years = sorted({int(y) for y in year})
+    inflation = {y: infer_inflation_factor(y) for y in years}
+    return {
+        "fingerprint": dataset.fingerprint,
+        "regional_index": regional_index,
+        "projects": projects,
+        "type_code": cols["project_type"],
+        "partitions": partitions,
+        "capacity": dataset.column("capacity", "float64"),
+        "inflation": np.array([inflation[int(y)] for y in year]),
+        "recency_penalty": (year_max - year) / year_span,
+        "region_factor": projects["region"].map(regional_index).fillna(1.0).to_numpy(dtype=float),
+        "wbs": projects[WBS_KEYS].fillna(0.0).to_numpy(dtype=float),
+        "total": dataset.column("total_cost_usd", "float64"),
+        "contingency_pct": dataset.column("contingency_pct", "float64"),
+    }
+
+
+def _select(part: Dict[str, Any], rows: slice, top_k: int, recency_weight: float, strict_country: bool,
+            recency_penalty: np.ndarray):
+    """Leave-one-out top-k comparables for the held-out rows `rows` of one partition."""
+    others = ~part["self"][rows]
+    country = part["same_country"][rows] & others
+    region = part["same_region"][rows] & others
+    same_type = part["same_type"][rows] & others
+    n_country, n_region, n_type = country.sum(axis=1), region.sum(axis=1), same_type.sum(axis=1)
+
+    # Scope rules as in retriever.select_scope, evaluated for all rows at once.
+    scope = np.select(
+        [
+            strict_country & (n_country > 0),
+            n_country >= top_k,
+            n_region >= max(2, top_k // 2),
+            n_type > 0,
+        ],
+        [0, 1, 2, 3],
+        default=4,
+    )
+    mask = np.select(
+        [(scope <= 1)[:, None], (scope == 2)[:, None], (scope == 3)[:, None]],
+        [country, region, same_type],
+        default=others,
+    )
+
+    blended = (1.0 - recency_weight) * part["geom"][rows] + recency_weight * recency_penalty[part["u"]][None, :]
+    dist = np.where(mask, blended, np.inf)
+    k = min(int(top_k), dist.shape[1])
+    if k < dist.shape[1]:
+        # Partial selection of the k nearest, then order them (ties by position).
+        order = np.sort(np.argpartition(dist, k - 1, axis=1)[:, :k], axis=1)
+        order = np.take_along_axis(
+            order, np.argsort(np.take_along_axis(dist, order, axis=1), axis=1, kind="stable"), axis=1
+        )
+    else:
+        order = np.argsort(dist, axis=1, kind="stable")
+    valid = np.isfinite(np.take_along_axis(dist, order, axis=1))
+    return part["u"][order], valid, scope, mask.sum(axis=1)
+
+
+def estimate_block(prepared: Dict[str, Any],
+                   part: Dict[str, Any],
+                   rows: slice = slice(None),
+                   top_k: int = 5,
+                   recency_weight: float = 0.0,
+                   strict_country: bool = False,
+                   capacity_exponent: float = FALLBACK_CAPACITY_EXPONENT) -> Dict[str, np.ndarray]:
+    """
+    Leave-one-out estimates for the held-out rows `rows` of one partition.
+    Returns arrays keyed q (project positions), base, estimate, p80, actual,
+    scope and candidate_count. Rows with no comparables are dropped.
+    """
+    top_k = max(1, int(top_k))
+    recency_weight = float(max(0.0, min(1.0, recency_weight)))
+    nb, valid, scope, candidate_count = _select(
+        part, rows, top_k, recency_weight, strict_country, prepared["recency_penalty"]
+    )
+    has_base = valid[:, 0]
+    q, nb, valid = part["q"][rows][has_base], nb[has_base], valid[has_base]
+    base = nb[:, 0]
+
+    # Fallback factors (EstimatorAgent._fallback_estimate), rounded the same way.
+    req_capacity = np.maximum(1.0, prepared["capacity"][q])
+    base_capacity = np.maximum(1.0, prepared["capacity"][base])
+    capacity_factor = np.round(np.clip((req_capacity / base_capacity) ** capacity_exponent, 0.7, 1.7), 4)
+    inflation_factor = np.round(
+        np.clip(prepared["inflation"][base] / prepared["inflation"][q], 0.75, 1.4), 4
+    )
+    region_factor = np.round(prepared["region_factor"][q], 4)
+    contingency_hist = np.where(valid, prepared["contingency_pct"][nb], np.nan)
+    no_hist = np.isnan(contingency_hist).all(axis=1)
+    contingency_med = np.nanmedian(np.where(no_hist[:, None], 0.1, contingency_hist), axis=1)
+    contingency_pct = np.round(np.clip(contingency_med, 0.02, 0.25), 4)
+
+    factor = capacity_factor * region_factor * inflation_factor * FALLBACK_COMPLEXITY_MODIFIER
+    scaled = apply_cost_scaling_arrays(
+        prepared["wbs"][base], factor, FALLBACK_ENGINEERING_PCT, contingency_pct
+    )
+    estimate = scaled["total_estimated_cost"]
+
+    # P80 as in pipeline.estimate_ranges over the selected comparables.
+    hist = np.where(valid, prepared["total"][nb], np.nan)
+    med = np.nanmedian(hist, axis=1)
+    std = np.nanstd(hist, axis=1)
+    cv = np.divide(std, med, out=np.zeros_like(std), where=med != 0)
+    uncertainty = np.clip(0.10 + cv * 0.35 + contingency_pct * 0.35, 0.08, 0.45)
+
+    return {
+        "q": q,
+        "base": base,
+        "estimate": estimate,
+        "p80": np.round(estimate * (1.0 + 0.45 * uncertainty), 2),
+        "actual": prepared["total"][q],
+        "scope": scope[has_base],
+        "candidate_count": candidate_count[has_base],
+    }
+
+
+def run_backtest(prepared: Dict[str, Any],
+                 top_k: int = 5,
+                 recency_weight: float = 0.0,
+                 strict_country: bool = False,
+                 capacity_exponent: float = FALLBACK_CAPACITY_EXPONENT) -> pd.DataFrame:
+    """
+    Estimate every project from the others. Returns one row per project with
+    the estimate, its P80 and error columns (ape, pct_error, p80_covered).
+    """
+    frames = []
+    for part in prepared["partitions"]:
+        out = estimate_block(prepared, part, slice(None), top_k, recency_weight, strict_country, capacity_exponent)
+        q, actual, estimate = out["q"], out["actual"], out["estimate"]
+        frame = prepared["projects"].iloc[q][["project_id", "project_type", "region", "country"]].copy()
+        frame["actual"] = actual
+        frame["estimate"] = estimate
+        frame["p80"] = out["p80"]
+        frame["pct_error"] = (estimate - actual) / actual
+        frame["ape"] = np.abs(frame["pct_error"])
+        frame["p80_covered"] = actual <= out["p80"]
+        frame["candidate_scope"] = SCOPES[out["scope"]]
+        frame["candidate_count"] = out["candidate_count"]
+        frame["base_project_id"] = prepared["projects"]["project_id"].to_numpy()[out["base"]]
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames).sort_index().reset_index(drop=True)
+
+
+def summarize(results: pd.DataFrame, by: Optional[List[str]] = None) -> pd.DataFrame:
+    """MAPE, bias (mean signed % error) and P80 coverage overall and per group."""
+    def _stats(frame: pd.DataFrame) -> Dict[str, float]:
+        return {
+            "n": int(len(frame)),
+            "mape_pct": float(frame["ape"].mean() * 100.0),
+            "bias_pct": float(frame["pct_error"].mean() * 100.0),
+            "p80_coverage_pct": float(frame["p80_covered"].mean() * 100.0),
+        }
+
+    rows = [{"group_by": "all", "group": "all", **_stats(results)}]
+    for col in by or ["project_type", "region"]:
+        for value, frame in results.groupby(col, sort=True):
+            rows.append({"group_by": col, "group": value, **_stats(frame)})
+    return pd.DataFrame(rows)
@@ -0,0 +1,178 @@
+import math
+import multiprocessing as mp
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import pandas as pd
+
+from retriever import Retriever
+from estimator_agent import EstimatorAgent
+from pipeline import run_pipeline
+from exporter import EstimateExporter, flatten_estimate
+from config import REGIONAL_INDEX
+from tracing import configure_worker
+
+REQUEST_COLUMNS = ["project_type", "region", "capacity", "execution_year"]
+
+# Worker state. Populated in the parent before the pool forks, so children
+# share the fitted Retriever copy-on-write; rebuilt per worker under spawn.
+_STATE: Dict[str, Any] = {}
+
+
+def read_requests(path: str) -> pd.DataFrame:
+    """Read a requests file (.csv, .parquet, .ndjson/.jsonl) and validate required columns."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".parquet":
+        df = pd.read_parquet(path)
+    elif suffix in {".ndjson", ".jsonl"}:
+        df = pd.read_json(path, lines=True)
+    else:
+        df = pd.read_csv(path)
+
+    missing = [c for c in REQUEST_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Requests file {path} is missing columns: {', '.join(missing)}")
+    if "estimate_id" not in df.columns:
+        df["estimate_id"] = [f"row-{i:06d}" for i in range(len(df))]
+    return df
+
+
+def _to_request(row: dict) -> dict:
+    """Validate one requests row; bad values raise ValueError so the row is written as an error."""
+    for col in ("project_type", "region"):
+        value = row.get(col)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"{col} is missing")
+    try:
+        capacity = float(row.get("capacity"))
+        year = float(row.get("execution_year"))
+    except (TypeError, ValueError):
+        raise ValueError(f"capacity and execution_year must be numbers (got {row.get('capacity')!r}, "
+                         f"{row.get('execution_year')!r})")
+    if not math.isfinite(capacity) or capacity <= 0:
+        raise ValueError(f"capacity must be a positive number (got {row.get('capacity')!r})")
+    if not math.isfinite(year):
+        raise ValueError("execution_year is missing")
+    request = {
+        "project_type": row["project_type"],
+        "region": row["region"],
+        "capacity": capacity,
+        "execution_year": int(year),
+    }
+    country = row.get("country")
+    if isinstance(country, str) and country.strip():
+        request["country"] = country
+    return request
+
+
+def estimate_row(retriever: Retriever, estimator: EstimatorAgent, row: dict, options: dict) -> dict:
+    """Run retrieve -> estimate -> scale -> review for one request row and flatten the result."""
+    estimate_id = str(row.get("estimate_id"))
+    try:
+        request = _to_request(row)
+        res = run_pipeline(
+            retriever,
+            estimator,
+            request,
+            top_k=options["top_k"],
+            strict_country=options["strict_country"],
+            recency_weight=options["recency_weight"],
+            with_report=False,
+        )
+        return flatten_estimate(
+            request, res["base_row"], res["scaling_factors"], res["scaled"], res["reviewer_out"],
+            soft_costs=res["soft_costs"],
+            ranges=res["ranges"],
+            estimate_mode=res["estimate_mode"],
+            estimate_id=estimate_id,
+        )
+    except Exception as exc:
+        return flatten_estimate(
+            {k: row.get(k) for k in REQUEST_COLUMNS + ["country"]}, {}, {}, {},
+            {"flags": [f"Estimate failed: {exc}"], "confidence": "Low"},
+            estimate_mode="error",
+            estimate_id=estimate_id,
+        )
+
+
+def _init_worker(data_path: str, options: dict):
+    if "retriever" not in _STATE:
+        _STATE["retriever"] = Retriever(data_path, REGIONAL_INDEX)
+    _STATE["estimator"] = EstimatorAgent()
+    _STATE["options"] = options
+
+
+def _init_pool_worker(data_path: str, options: dict):
+    configure_worker()
+    _init_worker(data_path, options)
+
+
+def _run_chunk(chunk: List[dict]) -> List[dict]:
+    return [estimate_row(_STATE["retriever"], _STATE["estimator"], row, _STATE["options"]) for row in chunk]
+
+
+def _chunks(rows: List[dict], size: int) -> Iterator[List[dict]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def run_batch(requests_path: str,
+              output_path: str,
+              data_path: str,
+              workers: int = 0,
+              chunk_size: int = 32,
+              top_k: int = 5,
+              strict_country: bool = False,
+              recency_weight: float = 0.0,
+              progress: bool = True) -> int:
+    """
+    Estimate every request in `requests_path` and stream flattened results to
+    `output_path` (.parquet, .csv or .ndjson) in input order.
+
+    workers <= 0 uses all CPUs; workers == 1 runs in-process.
+    Returns the number of estimates written.
+    """
+    rows = read_requests(requests_path).to_dict(orient="records")
+    total = len(rows)
+    chunk_size = max(1, int(chunk_size))
+    workers = workers if workers > 0 else (mp.cpu_count() or 1)
+    workers = max(1, min(workers, math.ceil(total / chunk_size)))
+    options = {"top_k": int(top_k), "strict_country": bool(strict_country), "recency_weight": float(recency_weight)}
+
+    # Build the retriever once in the parent; forked workers inherit it.
+    method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+    _STATE.clear()
+    if workers == 1 or method == "fork":
+        _STATE["retriever"] = Retriever(data_path, REGIONAL_INDEX)
+
+    start = time.perf_counter()
+    done = 0
+
+    def _report():
+        if not progress:
+            return
+        elapsed = max(1e-9, time.perf_counter() - start)
+        sys.stderr.write(f"\r{done}/{total} estimates  {done / elapsed:,.0f}/s  {elapsed:,.1f}s")
+        sys.stderr.flush()
+
+    with EstimateExporter(output_path, batch_size=max(chunk_size, 1_000)) as exporter:
+        if workers == 1:
+            _init_worker(data_path, options)
+            for chunk in _chunks(rows, chunk_size):
+                exporter.write_many(_run_chunk(chunk))
+                done += len(chunk)
+                _report()
+        else:
+            ctx = mp.get_context(method)
+            with ctx.Pool(workers, initializer=_init_pool_worker, initargs=(data_path, options)) as pool:
+                # imap keeps input order while chunks run concurrently.
+                for result in pool.imap(_run_chunk, _chunks(rows, chunk_size)):
+                    exporter.write_many(result)
+                    done += len(result)
+                    _report()
+
+    if progress:
+        sys.stderr.write("\n")
+    return done
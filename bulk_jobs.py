@@ -0,0 +1,183 @@
+"""
+Background bulk estimate jobs for the app's plan upload page.
+
+A BulkJob prices every row of an uploaded capital plan on a thread pool that
+lives outside the Streamlit script thread, so the page keeps rerendering while
+the batch runs. Workers share the process-wide read-only Retriever and overlap
+their LLM calls. Results are written in input order to Parquet and CSV files as
+chunks complete, so memory stays bounded and partial results survive a
+cancellation. Jobs are registered per process and looked up by id; only the
+newest MAX_JOBS are kept on disk.
+"""
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from batch import REQUEST_COLUMNS, estimate_row, read_requests
+from dataset import get_dataset, get_retriever
+from estimator_agent import EstimatorAgent
+from exporter import EstimateExporter
+
+MAX_JOBS = 16
+MAX_ROWS = 20_000
+DEFAULT_WORKERS = 4
+CHUNK_SIZE = 16
+
+_JOBS: "OrderedDict[str, BulkJob]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def read_plan(name: str, data: bytes) -> pd.DataFrame:
+    """Parse an uploaded plan (.csv, .parquet, .ndjson/.jsonl) with batch.read_requests."""
+    suffix = Path(name).suffix.lower() or ".csv"
+    with tempfile.NamedTemporaryFile(suffix=suffix) as fh:
+        fh.write(data)
+        fh.flush()
+        return read_requests(fh.name)
+
+
+def validate_plan(plan: pd.DataFrame, data_path: str) -> Dict[str, List[str]]:
+    """
+    Check an uploaded plan before dispatching it. Returns {"errors", "warnings"}:
+    errors block the job (empty or oversized plan, non-numeric capacity or year);
+    warnings cover values the pipeline can still price (unknown project types
+    or regions fall back to broader comparables).
+    """
+    errors: List[str] = []
+    warnings: List[str] = []
+    if plan.empty:
+        errors.append("The plan has no rows.")
+    if len(plan) > MAX_ROWS:
+        errors.append(f"The plan has {len(plan):,} rows; the limit is {MAX_ROWS:,}.")
+    for col in REQUEST_COLUMNS:
+        missing = int(plan[col].isna().sum())
+        if missing:
+            errors.append(f"{missing} rows have no {col}.")
+    for col in ["capacity", "execution_year"]:
+        bad = int((pd.to_numeric(plan[col], errors="coerce").isna() & plan[col].notna()).sum())
+        if bad:
+            errors.append(f"{bad} rows have a non-numeric {col}.")
+
+    dataset = get_dataset(data_path)
+    for col, known in [("project_type", dataset.project_types), ("region", dataset.regions)]:
+        unknown = sorted(set(plan[col].dropna().astype(str)) - set(known))
+        if unknown:
+            warnings.append(f"Unknown {col} values (broader comparables will be used): {', '.join(unknown[:10])}")
+    if plan["estimate_id"].duplicated().any():
+        warnings.append("estimate_id values are not unique.")
+    return {"errors": errors, "warnings": warnings}
+
+
+class BulkJob:
+    """
+    One plan being priced in the background.
+
+    status() is safe to call from any thread; cancel() stops dispatching new
+    chunks and keeps the rows already written.
+    """
+
+    def __init__(self, plan: pd.DataFrame, data_path: str, options: Dict[str, Any],
+                 workers: int = DEFAULT_WORKERS, chunk_size: int = CHUNK_SIZE):
+        self.id = uuid.uuid4().hex[:12]
+        self.data_path = data_path
+        self.options = dict(options)
+        self.rows = plan.to_dict(orient="records")
+        self.total = len(self.rows)
+        self.workers = max(1, int(workers))
+        self.chunk_size = max(1, int(chunk_size))
+        self.dir = Path(tempfile.mkdtemp(prefix=f"capex-bulk-{self.id}-"))
+        self.outputs = {"parquet": self.dir / "estimates.parquet", "csv": self.dir / "estimates.csv"}
+        self.state = "queued"
+        self.error: Optional[str] = None
+        self.done = 0
+        self.failed = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"capex-bulk-{self.id}", daemon=True)
+
+    def start(self) -> "BulkJob":
+        self.started_at = time.time()
+        self.state = "running"
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in {"done", "cancelled", "failed"}
+
+    def status(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        elapsed = max(1e-9, end - (self.started_at or end))
+        rate = self.done / elapsed if self.done else 0.0
+        remaining = (self.total - self.done) / rate if rate and not self.finished else None
+        return {
+            "id": self.id,
+            "state": self.state,
+            "error": self.error,
+            "done": self.done,
+            "failed": self.failed,
+            "total": self.total,
+            "elapsed_s": elapsed,
+            "rows_per_s": rate,
+            "eta_s": remaining,
+        }
+
+    def _run_chunk(self, retriever, estimator, chunk: List[dict]) -> Optional[List[dict]]:
+        if self._cancel.is_set():
+            return None
+        return [estimate_row(retriever, estimator, row, self.options) for row in chunk]
+
+    def _run(self):
+        try:
+            retriever = get_retriever(self.data_path)
+            estimator = EstimatorAgent()
+            chunks = [self.rows[i:i + self.chunk_size] for i in range(0, self.total, self.chunk_size)]
+            with EstimateExporter(str(self.outputs["parquet"]), batch_size=1_000) as parquet, \
+                    EstimateExporter(str(self.outputs["csv"]), batch_size=self.chunk_size) as csv_out, \
+                    ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"capex-bulk-{self.id}") as pool:
+                futures = [pool.submit(self._run_chunk, retriever, estimator, chunk) for chunk in chunks]
+                # Collect in submission order so the files follow the plan's row order.
+                for future in futures:
+                    out = future.result()
+                    if out is None:
+                        break
+                    parquet.write_many(out)
+                    csv_out.write_many(out)
+                    csv_out.flush()
+                    self.failed += sum(1 for r in out if r["estimate_mode"] == "error")
+                    self.done += len(out)
+                for future in futures:
+                    future.cancel()
+            self.state = "cancelled" if self._cancel.is_set() and self.done < self.total else "done"
+        except Exception as exc:
+            self.error = str(exc)
+            self.state = "failed"
+        finally:
+            self.finished_at = time.time()
+
+
+def submit_job(plan: pd.DataFrame, data_path: str, options: Dict[str, Any], **kwargs) -> BulkJob:
+    """Start a BulkJob and register it; the oldest finished jobs beyond MAX_JOBS are removed."""
+    job = BulkJob(plan, data_path, options, **kwargs)
+    with _lock:
+        _JOBS[job.id] = job
+        for old_id in [k for k, j in _JOBS.items() if j.finished][:max(0, len(_JOBS) - MAX_JOBS)]:
+            shutil.rmtree(_JOBS.pop(old_id).dir, ignore_errors=True)
+    return job.start()
+
+
+def get_job(job_id: Optional[str]) -> Optional[BulkJob]:
+    with _lock:
+        return _JOBS.get(job_id) if job_id else None
@@ -1,4 +1,6 @@
 import os
+import sys
+from functools import lru_cache
 from pathlib import Path
 
 try:
@@ -7,6 +9,7 @@ except ModuleNotFoundError:  # pragma: no cover
     tomllib = None
 
 
+@lru_cache(maxsize=1)
 def _load_local_streamlit_secrets() -> dict:
     if tomllib is None:
         return {}
@@ -21,29 +24,43 @@ def _load_local_streamlit_secrets() -> dict:
         return {}
 
 
+_RUNTIME_SECRETS = None
+
+
 def _load_streamlit_runtime_secrets() -> dict:
+    # Only consult st.secrets when streamlit is already loaded (i.e. inside the
+    # app). Plain CLI runs never pay for importing streamlit; they still see the
+    # same .streamlit/secrets.toml through the local loader above.
+    global _RUNTIME_SECRETS
+    if _RUNTIME_SECRETS is not None:
+        return _RUNTIME_SECRETS
+    if "streamlit" not in sys.modules:
+        return {}
     try:
-        import streamlit as st  # Imported lazily to avoid hard dependency in non-UI contexts.
-
+        st = sys.modules["streamlit"]
         data = dict(st.secrets)
-        return data if isinstance(data, dict) else {}
+        _RUNTIME_SECRETS = data if isinstance(data, dict) else {}
     except Exception:
-        return {}
+        _RUNTIME_SECRETS = {}
+    return _RUNTIME_SECRETS
+
 
+def get_secret(name: str, default=None):
+    """Resolve a setting from env, then Streamlit runtime secrets, then .streamlit/secrets.toml."""
+    return (
+        os.getenv(name)
+        or _load_streamlit_runtime_secrets().get(name)
+        or _load_local_streamlit_secrets().get(name, default)
+    )
 
-_LOCAL_SECRETS = _load_local_streamlit_secrets()
-_RUNTIME_SECRETS = _load_streamlit_runtime_secrets()
 
-OPENAI_MODEL = (
-    os.getenv("OPENAI_MODEL")
-    or _RUNTIME_SECRETS.get("OPENAI_MODEL")
-    or _LOCAL_SECRETS.get("OPENAI_MODEL", "gpt-5")
-)
-OPENAI_API_KEY = (
-    os.getenv("OPENAI_API_KEY")
-    or _RUNTIME_SECRETS.get("OPENAI_API_KEY")
-    or _LOCAL_SECRETS.get("OPENAI_API_KEY")
-)
+def __getattr__(name: str):
+    # OPENAI_MODEL / OPENAI_API_KEY are resolved on first access, not at import.
+    if name == "OPENAI_MODEL":
+        return get_secret("OPENAI_MODEL", "gpt-5")
+    if name == "OPENAI_API_KEY":
+        return get_secret("OPENAI_API_KEY")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Regional cost/productivity indices (baseline NA=1.00)
@@ -73,3 +90,14 @@ INFLATION_BY_YEAR = {
 
 # Complexity presets used by Reviewer to sanity check
 COMPLEXITY_MIN_MAX = (0.95, 1.25)
+
+# Soft-cost percentage bands (share of scaled WBS) used by Reviewer
+SOFT_COST_MIN_MAX = {
+    "engineering_pct": (0.02, 0.20),
+    "contingency_pct": (0.02, 0.25),
+}
+
+# WBS mix check: flag a category share that deviates from the comparables'
+# mean share by more than max(WBS_SHARE_Z * std, WBS_SHARE_MIN_DEV)
+WBS_SHARE_Z = 2.5
+WBS_SHARE_MIN_DEV = 0.08
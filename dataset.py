@@ -0,0 +1,215 @@
+"""
+Shared dataset loader and fingerprint.
+
+`dataset_fingerprint` identifies one version of the projects file. By default it
+uses the file size and mtime (a single stat call). With content_hash=True, or
+CAPEX_DATASET_HASH=1, it uses a SHA-256 of the file contents instead, for
+filesystems where mtimes are unreliable. The hash is computed once per
+(size, mtime) version. Every cache that depends on the data (retriever
+construction, retrieval results, LLM responses, daemon responses, UI caches)
+keys on the fingerprint, so a changed file is picked up at the same path.
+
+`CapexDataset` is the process-wide, read-only view of one file version: the
+parsed frame, typed numpy column views and derived metadata (types, regions,
+countries per region, year range, capacity ranges per type, comparable counts
+per type/region/country). The app, the Retriever and the generator share one
+instance per fingerprint.
+"""
+import hashlib
+import os
+import threading
+import time
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+HASH_ENV = "CAPEX_DATASET_HASH"
+
+REQUIRED_COLUMNS = ["project_type", "region", "capacity", "execution_year"]
+CAPACITY_QUANTILES = [0.1, 0.25, 0.75, 0.9]
+
+_DATASETS: Dict[str, "CapexDataset"] = {}
+_RETRIEVERS: Dict[Tuple[str, Optional[tuple]], object] = {}
+_BUILDING: Set[tuple] = set()
+_WATCHERS: Dict[str, threading.Thread] = {}
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=32)
+def _content_hash(path: str, size: int, mtime_ns: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def dataset_fingerprint(path: str, content_hash: Optional[bool] = None) -> str:
+    """Cheap version id for a data file: "<size>-<mtime_ns>", or "sha256-<hex>" when hashing."""
+    path = str(Path(path).resolve())
+    st = os.stat(path)
+    if content_hash is None:
+        content_hash = os.getenv(HASH_ENV, "").strip().lower() in {"1", "true", "yes"}
+    if content_hash:
+        return "sha256-" + _content_hash(path, st.st_size, st.st_mtime_ns)[:32]
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+class CapexDataset:
+    """
+    One version of the projects file, loaded once and shared read-only.
+
+    frame: the file as parsed. projects: rows with the required columns
+    present and country defaulted to "Unknown" (what retrieval uses).
+    column(name) returns a cached numpy view of a projects column.
+    """
+
+    def __init__(self, path: str, frame: pd.DataFrame, fingerprint: str):
+        self.path = path
+        self.frame = frame
+        self.fingerprint = fingerprint
+        projects = frame.dropna(subset=REQUIRED_COLUMNS)
+        if "country" not in projects.columns:
+            projects = projects.assign(country="Unknown")
+        elif projects["country"].isna().any():
+            projects = projects.assign(country=projects["country"].fillna("Unknown"))
+        self.projects = projects.reset_index(drop=True)
+        self._columns: Dict[Tuple[str, Optional[str]], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.projects)
+
+    def column(self, name: str, dtype: Optional[str] = None) -> np.ndarray:
+        key = (name, dtype)
+        arr = self._columns.get(key)
+        if arr is None:
+            arr = self.projects[name].to_numpy(dtype=dtype)
+            arr.flags.writeable = False
+            self._columns[key] = arr
+        return arr
+
+    @cached_property
+    def project_types(self) -> List[str]:
+        return sorted(self.frame["project_type"].dropna().unique().tolist())
+
+    @cached_property
+    def regions(self) -> List[str]:
+        return sorted(self.frame["region"].dropna().unique().tolist())
+
+    @cached_property
+    def countries_by_region(self) -> Dict[str, List[str]]:
+        if "country" not in self.frame.columns:
+            return {}
+        rows = self.frame.dropna(subset=["region", "country"])
+        return {str(region): sorted(group.unique().tolist()) for region, group in rows.groupby("region")["country"]}
+
+    @cached_property
+    def year_range(self) -> Tuple[int, int]:
+        years = self.frame["execution_year"]
+        return int(years.min()), int(years.max())
+
+    @cached_property
+    def capacity_ranges(self) -> Dict[str, Dict[str, float]]:
+        """Per project type: min, max, median, quartiles (q25, q75), q10, q90 and row count."""
+        stats = self.frame.dropna(subset=["project_type", "capacity"]).groupby("project_type")["capacity"]
+        table = stats.agg(["min", "max", "median", "count"]).astype(float)
+        quantiles = stats.quantile(CAPACITY_QUANTILES).unstack()
+        quantiles.columns = [f"q{round(q * 100)}" for q in quantiles.columns]
+        table = table.join(quantiles)
+        return {str(ptype): row.to_dict() for ptype, row in table.iterrows()}
+
+    @cached_property
+    def comparable_counts(self) -> Dict[Tuple[str, ...], int]:
+        """
+        Retrieval pool sizes: projects per (type,), (type, region) and
+        (type, region, country), counted over `projects` as the Retriever sees them.
+        """
+        counts: Dict[Tuple[str, ...], int] = {}
+        for cols in (["project_type"], ["project_type", "region"], ["project_type", "region", "country"]):
+            for key, n in self.projects.groupby(cols).size().items():
+                counts[tuple(map(str, key)) if isinstance(key, tuple) else (str(key),)] = int(n)
+        return counts
+
+    def pool_sizes(self, project_type: str, region: str, country: Optional[str] = None) -> Tuple[int, int, int]:
+        """(same type, same type and region, same type, region and country) counts for a request."""
+        counts = self.comparable_counts
+        n_region = counts.get((project_type, region), 0)
+        n_country = counts.get((project_type, region, country), 0) if country is not None else n_region
+        return counts.get((project_type,), 0), n_region, n_country
+
+
+def _current(cache: dict, key, fingerprint: str, build):
+    """
+    Return cache[key] if it matches `fingerprint`, else build and store it.
+    While another thread is already rebuilding `key` (e.g. the watcher), the
+    previous version is served instead of parsing the file twice.
+    """
+    with _lock:
+        cached = cache.get(key)
+        if cached is not None and cached.fingerprint == fingerprint:
+            return cached
+        if cached is not None and (id(cache), key) in _BUILDING:
+            return cached
+        _BUILDING.add((id(cache), key))
+    try:
+        value = build()
+    finally:
+        with _lock:
+            _BUILDING.discard((id(cache), key))
+    with _lock:
+        cache[key] = value
+    return value
+
+
+def get_dataset(path: str) -> CapexDataset:
+    """Shared CapexDataset for the current version of `path`; the file is parsed once per fingerprint."""
+    key = str(Path(path).resolve())
+    # One fingerprint, taken before the read: if the file changes mid-read the
+    # dataset carries the older fingerprint and is rebuilt on the next call.
+    fingerprint = dataset_fingerprint(key)
+    return _current(_DATASETS, key, fingerprint, lambda: CapexDataset(key, pd.read_csv(key), fingerprint))
+
+
+def get_retriever(path: str, regional_index: Optional[dict] = None):
+    """Shared, read-only Retriever for the current version of `path`, rebuilt when its fingerprint changes."""
+    from retriever import Retriever
+    from config import REGIONAL_INDEX
+
+    regional_index = dict(REGIONAL_INDEX if regional_index is None else regional_index)
+    # Keyed on the index's contents, so equal indexes share one Retriever; None is the default index.
+    index_key = None if regional_index == REGIONAL_INDEX else tuple(sorted(regional_index.items()))
+    key = (str(Path(path).resolve()), index_key)
+    return _current(_RETRIEVERS, key, dataset_fingerprint(key[0]), lambda: Retriever(key[0], regional_index))
+
+
+def watch_dataset(path: str, interval_s: float = 5.0) -> threading.Thread:
+    """
+    Start (once per path) a daemon thread that polls the fingerprint and rebuilds
+    the shared dataset and default Retriever in the background when the file
+    changes, so requests keep using the previous version until the new one is ready.
+    """
+    key = str(Path(path).resolve())
+    with _lock:
+        thread = _WATCHERS.get(key)
+        if thread is not None and thread.is_alive():
+            return thread
+        thread = threading.Thread(target=_watch, args=(key, interval_s), name="capex-dataset-watch", daemon=True)
+        _WATCHERS[key] = thread
+    thread.start()
+    return thread
+
+
+def _watch(path: str, interval_s: float):
+    loaded = None
+    while True:
+        try:
+            fingerprint = dataset_fingerprint(path)
+            if fingerprint != loaded:
+                loaded = get_retriever(path).fingerprint
+        except (OSError, ValueError):
+            # Missing or half-written file: keep serving the last version and retry.
+            pass
+        time.sleep(interval_s)
@@ -0,0 +1,189 @@
+"""
+Bounded, process-wide store for computed estimates.
+
+The app keeps each estimate here once and gives sessions only its id. Ids are
+derived from the dataset fingerprint, request and settings, so identical
+estimates from different sessions share one entry. The store is an LRU bounded
+by entry count and by total size (pickled bytes). Evicted entries are written
+to a spill directory when one is configured and read back on the next get();
+without one they are dropped and the caller recomputes.
+
+Settings: CAPEX_STORE_MAX_ENTRIES (default 512), CAPEX_STORE_MAX_BYTES
+(default 256 MB) and CAPEX_STORE_SPILL_DIR (unset: no spill).
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MAX_ENTRIES_ENV = "CAPEX_STORE_MAX_ENTRIES"
+MAX_BYTES_ENV = "CAPEX_STORE_MAX_BYTES"
+SPILL_DIR_ENV = "CAPEX_STORE_SPILL_DIR"
+
+_default: Optional["EstimateStore"] = None
+_lock = threading.Lock()
+
+
+def estimate_id(*parts) -> str:
+    """Stable id for an estimate's inputs (e.g. fingerprint, request, settings)."""
+    key = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:20]
+
+
+class EstimateStore:
+    """
+    LRU of estimate dicts keyed by id, bounded by max_entries and max_bytes.
+
+    Values are kept as objects for fast reads; their size is the length of
+    their pickle, measured once on put(). Values are shared across sessions,
+    so treat what get() returns as read-only.
+    """
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 256_000_000, spill_dir: Optional[str] = None):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.spill_hits = 0
+        self.evictions = 0
+
+    def _spill_path(self, key: str) -> Path:
+        return self.spill_dir / f"{key}.pkl"
+
+    def put(self, key: str, value: Dict[str, Any]) -> str:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old["nbytes"]
+            self._entries[key] = {"value": value, "nbytes": len(blob), "created": now, "accessed": now, "hits": 0}
+            self._bytes += len(blob)
+            evicted = self._evict()
+        self._spill(evicted)
+        return key
+
+    def get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not key:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry["accessed"] = time.time()
+                entry["hits"] += 1
+                self.hits += 1
+                return entry["value"]
+        value = self._load_spilled(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.spill_hits += 1
+        self.put(key, value)
+        return value
+
+    def contains(self, key: str) -> bool:
+        """Whether `key` is in memory, without counting a lookup or refreshing its recency."""
+        with self._lock:
+            return key in self._entries
+
+    def nbytes(self, key: str) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry["nbytes"] if entry is not None else None
+
+    def _evict(self) -> List[tuple]:
+        # Caller holds the lock. The newest entry is kept even if it alone exceeds max_bytes.
+        evicted = []
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key, entry = self._entries.popitem(last=False)
+            self._bytes -= entry["nbytes"]
+            self.evictions += 1
+            evicted.append((key, entry["value"]))
+        return evicted
+
+    def _spill(self, evicted: List[tuple]):
+        if self.spill_dir is None:
+            return
+        for key, value in evicted:
+            tmp = self._spill_path(key).with_suffix(".tmp")
+            try:
+                with open(tmp, "wb") as fh:
+                    pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, self._spill_path(key))
+            except OSError:
+                # A full or read-only disk only loses the spilled copy.
+                tmp.unlink(missing_ok=True)
+
+    def _load_spilled(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.spill_dir is None:
+            return None
+        path = self._spill_path(key)
+        try:
+            with open(path, "rb") as fh:
+                value = pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        path.unlink(missing_ok=True)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.spill_dir is not None:
+            for path in self.spill_dir.glob("*.pkl"):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Memory accounting for the admin page."""
+        spilled = list(self.spill_dir.glob("*.pkl")) if self.spill_dir is not None else []
+        with self._lock:
+            lookups = self.hits + self.spill_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "spill_hits": self.spill_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.spill_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "spill_dir": str(self.spill_dir) if self.spill_dir is not None else None,
+                "spilled_entries": len(spilled),
+                "spilled_bytes": sum(p.stat().st_size for p in spilled if p.exists()),
+            }
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """One row per in-memory entry, most recently used first."""
+        with self._lock:
+            return [
+                {"id": key, "bytes": e["nbytes"], "hits": e["hits"], "created": e["created"], "accessed": e["accessed"]}
+                for key, e in reversed(self._entries.items())
+            ]
+
+
+def get_store() -> EstimateStore:
+    """Process-wide store configured from CAPEX_STORE_* on first use."""
+    global _default
+    with _lock:
+        if _default is None:
+            _default = EstimateStore(
+                max_entries=int(os.getenv(MAX_ENTRIES_ENV) or 512),
+                max_bytes=int(os.getenv(MAX_BYTES_ENV) or 256_000_000),
+                spill_dir=os.getenv(SPILL_DIR_ENV) or None,
+            )
+        return _default
@@ -1,9 +1,12 @@
 import json
-from typing import Dict, Any, List
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
 # from openai import OpenAI  # Demo: disabled for deterministic mode.
 from config import REGIONAL_INDEX
 # from config import OPENAI_API_KEY, OPENAI_MODEL  # Demo: disabled for deterministic mode.
 from scaler import infer_inflation_factor
+from tracing import span
 
 # See: Structured Outputs & Responses API. The model will adhere to this JSON schema.
 # Docs: Structured outputs & Responses API migration. 
@@ -109,6 +112,18 @@ TOOLS = [
     },
 ]
 
+# Deterministic fallback heuristics (also used by backtest.py).
+FALLBACK_CAPACITY_EXPONENT = 0.6
+FALLBACK_COMPLEXITY_MODIFIER = 1.05
+FALLBACK_ENGINEERING_PCT = 0.08
+
+# Successful model responses, keyed on (dataset fingerprint, prompt input).
+# Shared across agents so repeated requests skip the round trips.
+RESPONSE_CACHE_SIZE = 256
+_RESPONSE_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
 class EstimatorAgent:
     def __init__(self):
         # Demo mode: keep estimator deterministic by disabling OpenAI client.
@@ -142,7 +157,7 @@ class EstimatorAgent:
         base_row = similar_df.iloc[0].to_dict()
         base_capacity = max(1.0, float(base_row.get("capacity", request["capacity"])))
         req_capacity = max(1.0, float(request["capacity"]))
-        capacity_factor = self._clamp((req_capacity / base_capacity) ** 0.6, 0.7, 1.7)
+        capacity_factor = self._clamp((req_capacity / base_capacity) ** FALLBACK_CAPACITY_EXPONENT, 0.7, 1.7)
 
         base_year = int(base_row.get("execution_year", request["execution_year"]))
         inflation = self._tool_inflation_between_years(base_year, int(request["execution_year"]))["factor"]
@@ -157,10 +172,10 @@ class EstimatorAgent:
                 "capacity_scale_factor": round(capacity_factor, 4),
                 "regional_index_factor": round(float(region), 4),
                 "inflation_factor": round(float(inflation), 4),
-                "complexity_modifier": 1.05,
+                "complexity_modifier": FALLBACK_COMPLEXITY_MODIFIER,
             },
             "soft_costs": {
-                "engineering_pct": 0.08,
+                "engineering_pct": FALLBACK_ENGINEERING_PCT,
                 "contingency_pct": round(contingency_pct, 4),
             },
             "reasoning": [
@@ -184,31 +199,33 @@ class EstimatorAgent:
         return {"error": f"Unknown tool: {name}"}
 
     def _responses_infer(self, input_content: str) -> Dict[str, Any]:
-        response = self.client.responses.create(
-            model=OPENAI_MODEL,
-            instructions=SYSTEM_PROMPT,
-            input=input_content,
-            tools=TOOLS,
-            tool_choice="auto",
-            parallel_tool_calls=False,
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": SCHEMA_NAME,
-                    "schema": ESTIMATE_SCHEMA,
-                    "strict": True,
-                }
-            },
-        )
+        with span("estimator.llm_round_trip", round=0):
+            response = self.client.responses.create(
+                model=OPENAI_MODEL,
+                instructions=SYSTEM_PROMPT,
+                input=input_content,
+                tools=TOOLS,
+                tool_choice="auto",
+                parallel_tool_calls=False,
+                text={
+                    "format": {
+                        "type": "json_schema",
+                        "name": SCHEMA_NAME,
+                        "schema": ESTIMATE_SCHEMA,
+                        "strict": True,
+                    }
+                },
+            )
 
-        for _ in range(4):
+        for round_no in range(1, 5):
             tool_calls = [item for item in response.output if getattr(item, "type", "") == "function_call"]
             if not tool_calls:
                 break
 
             tool_outputs: List[Dict[str, str]] = []
             for tc in tool_calls:
-                tool_result = self._execute_tool_call(tc.name, tc.arguments)
+                with span("estimator.tool_call", tool=tc.name, round=round_no):
+                    tool_result = self._execute_tool_call(tc.name, tc.arguments)
                 tool_outputs.append(
                     {
                         "type": "function_call_output",
@@ -217,26 +234,34 @@ class EstimatorAgent:
                     }
                 )
 
-            response = self.client.responses.create(
-                model=OPENAI_MODEL,
-                previous_response_id=response.id,
-                input=tool_outputs,
-                tools=TOOLS,
-                tool_choice="auto",
-                parallel_tool_calls=False,
-                text={
-                    "format": {
-                        "type": "json_schema",
-                        "name": SCHEMA_NAME,
-                        "schema": ESTIMATE_SCHEMA,
-                        "strict": True,
-                    }
-                },
-            )
+            with span("estimator.llm_round_trip", round=round_no, tool_calls=len(tool_calls)):
+                response = self.client.responses.create(
+                    model=OPENAI_MODEL,
+                    previous_response_id=response.id,
+                    input=tool_outputs,
+                    tools=TOOLS,
+                    tool_choice="auto",
+                    parallel_tool_calls=False,
+                    text={
+                        "format": {
+                            "type": "json_schema",
+                            "name": SCHEMA_NAME,
+                            "schema": ESTIMATE_SCHEMA,
+                            "strict": True,
+                        }
+                    },
+                )
 
         return json.loads(response.output_text)
 
-    def infer_factors(self, similar_df, request: Dict[str, Any]) -> Dict[str, Any]:
+    def infer_factors(self, similar_df, request: Dict[str, Any], fingerprint: Optional[str] = None) -> Dict[str, Any]:
+        """fingerprint: dataset version the comparables came from; enables the response cache."""
+        with span("estimator.infer_factors", comparables=0 if similar_df is None else len(similar_df)) as sp:
+            out = self._infer_factors(similar_df, request, fingerprint, sp)
+            sp.set_attribute("estimator_mode", out.get("meta", {}).get("mode"))
+        return out
+
+    def _infer_factors(self, similar_df, request: Dict[str, Any], fingerprint: Optional[str], sp) -> Dict[str, Any]:
         if similar_df is None or similar_df.empty:
             raise ValueError("No similar projects available for estimation.")
 
@@ -256,9 +281,25 @@ class EstimatorAgent:
             "Return ONLY schema-compliant JSON."
         )
 
+        key = json.dumps([fingerprint, input_content]) if fingerprint else None
+        if key is not None:
+            with _RESPONSE_CACHE_LOCK:
+                cached = _RESPONSE_CACHE.get(key)
+                if cached is not None:
+                    _RESPONSE_CACHE.move_to_end(key)
+            if cached is not None:
+                sp.set_attribute("cache_hit", True)
+                return json.loads(cached)
+        sp.set_attribute("cache_hit", False)
+
         try:
             out = self._responses_infer(input_content)
             out["meta"] = {"mode": "ai"}
+            if key is not None:
+                with _RESPONSE_CACHE_LOCK:
+                    _RESPONSE_CACHE[key] = json.dumps(out)
+                    while len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+                        _RESPONSE_CACHE.popitem(last=False)
             return out
         except Exception as exc:
             return self._fallback_estimate(similar_df, request, f"AI call failed: {str(exc)}")
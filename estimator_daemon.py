@@ -0,0 +1,238 @@
+"""
+Warm estimator daemon and thin client.
+
+`EstimatorService` keeps the fitted Retriever, the EstimatorAgent and a small
+response cache resident. `serve_unix` / `serve_http` expose it over a Unix
+domain socket (newline-delimited JSON) or localhost HTTP. `client_estimate`
+talks to a running daemon and returns None when none is reachable, so the CLI
+can fall back to in-process execution.
+
+This module only imports the standard library at import time; the heavy
+pipeline modules are loaded when a service is constructed.
+"""
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from tracing import span
+
+DEFAULT_SOCKET = os.getenv("CAPEX_DAEMON_SOCKET") or f"/tmp/capex-estimator-{os.getuid()}.sock"
+DEFAULT_URL = os.getenv("CAPEX_DAEMON_URL")
+CLIENT_TIMEOUT_S = 30.0
+
+
+class EstimatorService:
+    def __init__(self, data_path: str, cache_size: int = 1024, watch: bool = False):
+        from dataset import get_retriever, watch_dataset
+        from estimator_agent import EstimatorAgent
+
+        self.data_path = str(Path(data_path).resolve())
+        self.retriever = get_retriever(self.data_path)
+        if watch:
+            watch_dataset(self.data_path)
+        self.estimator = EstimatorAgent()
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def estimate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        payload: {"request": {...}, "top_k": int, "data": optional path}
+        Returns {"ok": True, "report", "topk_text", "export_row"} or {"ok": False, "error"}.
+        """
+        data = payload.get("data")
+        if data and str(Path(data).resolve()) != self.data_path:
+            return {"ok": False, "error": f"daemon serves {self.data_path}, not {data}"}
+
+        # Pick up a changed data file; cached responses are keyed on its fingerprint.
+        # One Retriever per request, so the cache key and the run use the same version.
+        from dataset import get_retriever
+
+        retriever = get_retriever(self.data_path)
+        self.retriever = retriever
+        key = json.dumps(
+            [retriever.fingerprint, payload.get("request"), payload.get("top_k")], sort_keys=True, default=str
+        )
+        with span("daemon.estimate") as sp:
+            with self._lock:
+                hit = self._cache.get(key)
+                if hit is not None:
+                    self._cache.move_to_end(key)
+            sp.set_attribute("cache_hit", hit is not None)
+            if hit is not None:
+                return hit
+
+            try:
+                out = self.run(payload["request"], int(payload.get("top_k", 5)), retriever=retriever)
+            except Exception as exc:
+                sp.set_attribute("error", str(exc))
+                return {"ok": False, "error": str(exc)}
+
+        with self._lock:
+            self._cache[key] = out
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return out
+
+    def run(self, request: Dict[str, Any], top_k: int = 5, timer=None, retriever=None) -> Dict[str, Any]:
+        from pipeline import run_pipeline
+        from exporter import flatten_estimate
+
+        res = run_pipeline(retriever or self.retriever, self.estimator, request, top_k=top_k, timer=timer)
+        topk_cols = ["project_id", "project_type", "region", "capacity", "execution_year", "total_cost_usd"]
+        return {
+            "ok": True,
+            "report": res["report_md"],
+            "topk_text": res["similar_df"][topk_cols].to_string(),
+            "export_row": flatten_estimate(
+                request, res["base_row"], res["scaling_factors"], res["scaled"], res["reviewer_out"],
+                soft_costs=res["soft_costs"],
+                ranges=res["ranges"],
+                estimate_mode=res["estimate_mode"],
+            ),
+        }
+
+
+# ---------- Servers ----------
+def _claim_socket(socket_path: str):
+    """Remove a stale socket file; refuse if a daemon is still listening on it or the path is not a socket."""
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise RuntimeError(f"{socket_path} exists and is not a socket")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(1.0)
+        try:
+            sock.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+            return
+        except FileNotFoundError:
+            return
+    raise RuntimeError(f"Another estimator daemon is already listening on {socket_path}")
+
+
+def serve_unix(service: EstimatorService, socket_path: str = DEFAULT_SOCKET):
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    out = service.estimate(json.loads(line))
+                except Exception as exc:
+                    out = {"ok": False, "error": str(exc)}
+                self.wfile.write((json.dumps(out) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+    _claim_socket(socket_path)
+    server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def serve_http(service: EstimatorService, host: str = "127.0.0.1", port: int = 8765):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: Dict[str, Any]):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"ok": True, "data": service.data_path, "fingerprint": service.retriever.fingerprint})
+            else:
+                self._send(404, {"ok": False, "error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/estimate":
+                self._send(404, {"ok": False, "error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                out = service.estimate(json.loads(self.rfile.read(length)))
+            except Exception as exc:
+                out = {"ok": False, "error": str(exc)}
+            self._send(200 if out.get("ok") else 400, out)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+# ---------- Client ----------
+def _unix_request(payload: Dict[str, Any], socket_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CLIENT_TIMEOUT_S)
+            sock.connect(socket_path)
+            sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+            buf = b""
+            while not buf.endswith(b"\n"):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                buf += chunk
+        return json.loads(buf) if buf else None
+    except (OSError, ValueError):
+        return None
+
+
+def _http_request(payload: Dict[str, Any], url: str) -> Optional[Dict[str, Any]]:
+    import urllib.error
+    import urllib.request
+
+    req = urllib.request.Request(
+        url.rstrip("/") + "/estimate",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=CLIENT_TIMEOUT_S) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as exc:
+        try:
+            return json.loads(exc.read())
+        except ValueError:
+            return None
+    except (OSError, ValueError):
+        return None
+
+
+def client_estimate(payload: Dict[str, Any],
+                    socket_path: Optional[str] = DEFAULT_SOCKET,
+                    url: Optional[str] = DEFAULT_URL) -> Optional[Dict[str, Any]]:
+    """Send one estimate to a running daemon. Returns None if no daemon answered successfully."""
+    out = None
+    if url:
+        out = _http_request(payload, url)
+    elif socket_path and os.path.exists(socket_path):
+        out = _unix_request(payload, socket_path)
+    if not out or not out.get("ok"):
+        return None
+    return out
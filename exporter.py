@@ -0,0 +1,211 @@
+import csv
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# Fixed export schema: (column, type) in output order. Types are one of
+# "str", "int" or "float" and map to Arrow/CSV/JSON types below.
+EXPORT_SCHEMA = [
+    ("estimate_id", "str"),
+    ("project_type", "str"),
+    ("region", "str"),
+    ("country", "str"),
+    ("capacity", "float"),
+    ("execution_year", "int"),
+    ("base_project_id", "str"),
+    ("base_project_name", "str"),
+    ("base_region", "str"),
+    ("base_country", "str"),
+    ("base_capacity", "float"),
+    ("base_execution_year", "int"),
+    ("base_total_cost_usd", "float"),
+    ("capacity_scale_factor", "float"),
+    ("regional_index_factor", "float"),
+    ("inflation_factor", "float"),
+    ("complexity_modifier", "float"),
+    ("applied_factor", "float"),
+    ("civil_cost", "float"),
+    ("mechanical_cost", "float"),
+    ("electrical_cost", "float"),
+    ("automation_cost", "float"),
+    ("engineering_pct", "float"),
+    ("contingency_pct", "float"),
+    ("engineering_cost", "float"),
+    ("contingency_cost", "float"),
+    ("total_estimated_cost", "float"),
+    ("p50", "float"),
+    ("p80", "float"),
+    ("p90", "float"),
+    ("uncertainty", "float"),
+    ("estimate_mode", "str"),
+    ("confidence", "str"),
+    ("flag_count", "int"),
+    ("flags", "str"),
+    ("notes", "str"),
+]
+EXPORT_COLUMNS = [name for name, _ in EXPORT_SCHEMA]
+EXPORT_FORMATS = {".parquet": "parquet", ".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+LIST_SEP = " | "
+
+
+def _coerce(value: Any, kind: str):
+    if value is None:
+        return None
+    try:
+        if kind == "float":
+            value = float(value)
+            return None if math.isnan(value) else value
+        if kind == "int":
+            return int(value)
+    except (TypeError, ValueError):
+        return None
+    return str(value)
+
+
+def flatten_estimate(request: dict,
+                     base_project: dict,
+                     scaling_factors: dict,
+                     scaled_result: dict,
+                     reviewer_out: Optional[dict] = None,
+                     soft_costs: Optional[dict] = None,
+                     ranges: Optional[dict] = None,
+                     estimate_mode: Optional[str] = None,
+                     estimate_id: Optional[str] = None) -> Dict[str, Any]:
+    """Flatten one estimate into a row that follows EXPORT_SCHEMA."""
+    reviewer_out = reviewer_out or {}
+    soft_costs = soft_costs or {}
+    ranges = ranges or {}
+    wbs = scaled_result.get("scaled_wbs_costs", {})
+    flags = list(reviewer_out.get("flags", []))
+
+    row = {
+        "estimate_id": estimate_id,
+        "project_type": request.get("project_type"),
+        "region": request.get("region"),
+        "country": request.get("country"),
+        "capacity": request.get("capacity"),
+        "execution_year": request.get("execution_year"),
+        "base_project_id": base_project.get("project_id"),
+        "base_project_name": base_project.get("project_name"),
+        "base_region": base_project.get("region"),
+        "base_country": base_project.get("country"),
+        "base_capacity": base_project.get("capacity"),
+        "base_execution_year": base_project.get("execution_year"),
+        "base_total_cost_usd": base_project.get("total_cost_usd"),
+        "capacity_scale_factor": scaling_factors.get("capacity_scale_factor"),
+        "regional_index_factor": scaling_factors.get("regional_index_factor"),
+        "inflation_factor": scaling_factors.get("inflation_factor"),
+        "complexity_modifier": scaling_factors.get("complexity_modifier"),
+        "applied_factor": scaled_result.get("applied_factor"),
+        "civil_cost": wbs.get("civil_cost"),
+        "mechanical_cost": wbs.get("mechanical_cost"),
+        "electrical_cost": wbs.get("electrical_cost"),
+        "automation_cost": wbs.get("automation_cost"),
+        "engineering_pct": soft_costs.get("engineering_pct"),
+        "contingency_pct": soft_costs.get("contingency_pct"),
+        "engineering_cost": scaled_result.get("engineering_cost"),
+        "contingency_cost": scaled_result.get("contingency_cost"),
+        "total_estimated_cost": scaled_result.get("total_estimated_cost"),
+        "p50": ranges.get("p50"),
+        "p80": ranges.get("p80"),
+        "p90": ranges.get("p90"),
+        "uncertainty": ranges.get("uncertainty"),
+        "estimate_mode": estimate_mode,
+        "confidence": reviewer_out.get("confidence"),
+        "flag_count": len(flags),
+        "flags": LIST_SEP.join(flags),
+        "notes": LIST_SEP.join(reviewer_out.get("notes", [])),
+    }
+    return {name: _coerce(row.get(name), kind) for name, kind in EXPORT_SCHEMA}
+
+
+def _arrow_schema():
+    import pyarrow as pa  # Imported lazily; only Parquet export needs it.
+
+    types = {"str": pa.string(), "int": pa.int64(), "float": pa.float64()}
+    return pa.schema([(name, types[kind]) for name, kind in EXPORT_SCHEMA])
+
+
+class EstimateExporter:
+    """
+    Incremental writer for flattened estimates.
+
+    Rows are buffered up to `batch_size` and then flushed: one Parquet row
+    group, or a block of CSV / NDJSON lines. Memory use is bounded by the
+    batch size regardless of how many estimates are exported.
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None, batch_size: int = 10_000):
+        self.path = Path(path)
+        self.fmt = fmt or EXPORT_FORMATS.get(self.path.suffix.lower())
+        if self.fmt not in {"parquet", "csv", "ndjson"}:
+            raise ValueError(f"Unsupported export format for {path!r}; use .parquet, .csv or .ndjson")
+        self.batch_size = max(1, int(batch_size))
+        self.rows_written = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._fh = None
+        self._csv = None
+        self._pq_writer = None
+        self._schema = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            self._schema = _arrow_schema()
+            self._pq_writer = pq.ParquetWriter(str(self.path), self._schema, compression="zstd")
+        else:
+            self._fh = self.path.open("w", encoding="utf-8", newline="")
+            if self.fmt == "csv":
+                self._csv = csv.DictWriter(self._fh, fieldnames=EXPORT_COLUMNS)
+                self._csv.writeheader()
+
+    def write(self, row: Dict[str, Any]):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, rows: Iterable[Dict[str, Any]]):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        if self.fmt == "parquet":
+            import pyarrow as pa
+
+            columns = {name: [r.get(name) for r in rows] for name in EXPORT_COLUMNS}
+            self._pq_writer.write_table(pa.Table.from_pydict(columns, schema=self._schema))
+        elif self.fmt == "csv":
+            self._csv.writerows(rows)
+        else:
+            self._fh.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows))
+        self.rows_written += len(rows)
+
+    def close(self):
+        self.flush()
+        if self._pq_writer is not None:
+            self._pq_writer.close()
+            self._pq_writer = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def export_estimates(rows: Iterable[Dict[str, Any]],
+                     path: str,
+                     fmt: Optional[str] = None,
+                     batch_size: int = 10_000) -> int:
+    """Write flattened estimate rows (e.g. a generator) to Parquet/CSV/NDJSON. Returns rows written."""
+    with EstimateExporter(path, fmt=fmt, batch_size=batch_size) as exporter:
+        exporter.write_many(rows)
+    return exporter.rows_written
@@ -1,11 +1,13 @@
 import argparse
-import pandas as pd
-from retriever import Retriever
-from estimator_agent import EstimatorAgent
-from scaler import apply_cost_scaling
-from reviewer import review
-from report_writer import write_summary
-from config import REGIONAL_INDEX
+import os
+import sys
+import time
+from exporter import export_estimates
+from profiling import profiled, profiling_enabled
+from estimator_daemon import DEFAULT_SOCKET, DEFAULT_URL, client_estimate
+
+# Pipeline modules (pandas, scikit-learn, tabulate) are imported on the code
+# paths that need them, so the daemon client starts in milliseconds.
 
 def parse_args():
     ap = argparse.ArgumentParser()
@@ -17,10 +19,190 @@ def parse_args():
     ap.add_argument("--execution_year", type=int, required=False, default=2022)
     ap.add_argument("--k", type=int, default=5, help="Top-K similar projects")
     ap.add_argument("--print_topk", action="store_true")
+    ap.add_argument("--export", default=None,
+                    help="Also write the flattened estimate to .parquet, .csv or .ndjson")
+    ap.add_argument("--socket", default=DEFAULT_SOCKET, help="Daemon Unix socket to try first")
+    ap.add_argument("--daemon_url", default=DEFAULT_URL, help="Daemon HTTP URL to try first (e.g. http://127.0.0.1:8765)")
+    ap.add_argument("--no_daemon", action="store_true", help="Always run in-process")
+    ap.add_argument("--profile", action="store_true",
+                    help="Run in-process under cProfile + tracemalloc and print per-stage timings "
+                         "(also enabled by CAPEX_PROFILE=1)")
+
+    sub = ap.add_subparsers(dest="command")
+    bp = sub.add_parser("batch", help="Estimate every request in a CSV/Parquet/NDJSON file")
+    bp.add_argument("--data", default="data/synthetic_capex_projects_optionA.csv",
+                    help="Path to project-level CSV")
+    bp.add_argument("--input", required=True,
+                    help="Requests file with project_type, region, capacity, execution_year[, country, estimate_id]")
+    bp.add_argument("--output", required=True, help="Results file (.parquet, .csv or .ndjson)")
+    bp.add_argument("--workers", type=int, default=0, help="Worker processes (0 = all CPUs, 1 = in-process)")
+    bp.add_argument("--chunksize", type=int, default=32, help="Requests per worker task")
+    bp.add_argument("--k", type=int, default=5, help="Top-K similar projects")
+    bp.add_argument("--strict_country", action="store_true")
+    bp.add_argument("--recency_weight", type=float, default=0.0)
+    bp.add_argument("--quiet", action="store_true", help="Hide the progress readout")
+
+    tp = sub.add_parser("backtest", help="Leave-one-out backtest of the fallback estimator against history")
+    tp.add_argument("--data", default="data/synthetic_capex_projects_optionA.csv",
+                    help="Path to project-level CSV")
+    tp.add_argument("--k", type=int, default=5, help="Top-K similar projects")
+    tp.add_argument("--strict_country", action="store_true")
+    tp.add_argument("--recency_weight", type=float, default=0.0)
+    tp.add_argument("--capacity_exponent", type=float, default=None,
+                    help="Capacity scaling exponent (default: the estimator's fallback exponent)")
+    tp.add_argument("--output", default=None, help="Also write per-project results (.csv or .parquet)")
+
+    wp = sub.add_parser("sweep", help="Backtest a grid of retrieval/estimator settings in parallel and rank them")
+    wp.add_argument("--data", default="data/synthetic_capex_projects_optionA.csv",
+                    help="Path to project-level CSV")
+    wp.add_argument("--k", default="3,5,8", help="Comma-separated top-K values")
+    wp.add_argument("--recency_weight", default="0,0.25,0.5", help="Comma-separated recency weights")
+    wp.add_argument("--strict_country", default="off", help="Comma-separated: off, on")
+    wp.add_argument("--capacity_exponent", default="0.5,0.6,0.7", help="Comma-separated capacity exponents")
+    wp.add_argument("--regional_index", action="append", default=[],
+                    help='Regional index values to try, e.g. "Europe=1.0,1.08,1.15" (repeatable)')
+    wp.add_argument("--workers", type=int, default=0, help="Worker processes (0 = all CPUs, 1 = in-process)")
+    wp.add_argument("--seed", type=int, default=0)
+    wp.add_argument("--early_stop", type=float, default=0.25,
+                    help="Prune points whose partial MAPE exceeds the best by this fraction (0 = off)")
+    wp.add_argument("--min_fraction", type=float, default=0.3,
+                    help="Share of projects evaluated before a point can be pruned")
+    wp.add_argument("--output", default="sweep_results.csv", help="Ranked results table (.csv or .parquet)")
+    wp.add_argument("--top", type=int, default=10, help="Rows of the ranking to print")
+    wp.add_argument("--quiet", action="store_true", help="Hide the progress readout")
+
+    sp = sub.add_parser("serve", help="Keep the estimator warm and answer requests over a socket or HTTP")
+    sp.add_argument("--data", default="data/synthetic_capex_projects_optionA.csv",
+                    help="Path to project-level CSV")
+    sp.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket path to listen on")
+    sp.add_argument("--http_port", type=int, default=None, help="Serve localhost HTTP on this port instead")
+    sp.add_argument("--host", default="127.0.0.1")
     return ap.parse_args()
 
+def run_serve_command(args):
+    from estimator_daemon import EstimatorService, serve_http, serve_unix
+
+    service = EstimatorService(args.data, watch=True)
+    if args.http_port:
+        print(f"Estimator daemon serving {service.data_path} on http://{args.host}:{args.http_port}")
+        serve_http(service, host=args.host, port=args.http_port)
+    else:
+        print(f"Estimator daemon serving {service.data_path} on {args.socket}")
+        try:
+            serve_unix(service, socket_path=args.socket)
+        except RuntimeError as exc:
+            raise SystemExit(str(exc))
+
+def run_batch_command(args):
+    from batch import run_batch
+
+    start = time.perf_counter()
+    n = run_batch(
+        args.input,
+        args.output,
+        args.data,
+        workers=args.workers,
+        chunk_size=args.chunksize,
+        top_k=args.k,
+        strict_country=args.strict_country,
+        recency_weight=args.recency_weight,
+        progress=not args.quiet,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {n} estimates to {args.output} in {elapsed:.1f}s ({n / max(elapsed, 1e-9):,.0f}/s)")
+
+def run_backtest_command(args):
+    from backtest import prepare_backtest, run_backtest, summarize
+    from estimator_agent import FALLBACK_CAPACITY_EXPONENT
+
+    start = time.perf_counter()
+    results = run_backtest(
+        prepare_backtest(args.data),
+        top_k=args.k,
+        recency_weight=args.recency_weight,
+        strict_country=args.strict_country,
+        capacity_exponent=FALLBACK_CAPACITY_EXPONENT if args.capacity_exponent is None else args.capacity_exponent,
+    )
+    elapsed = time.perf_counter() - start
+    print(summarize(results).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print(f"\nBacktested {len(results)} projects in {elapsed:.2f}s")
+    if args.output:
+        if args.output.lower().endswith(".parquet"):
+            results.to_parquet(args.output, index=False)
+        else:
+            results.to_csv(args.output, index=False)
+
+def _float_list(text):
+    return [float(v) for v in text.split(",") if v.strip()]
+
+def run_sweep_command(args):
+    from sweep import run_sweep
+
+    overrides = {}
+    for item in args.regional_index:
+        region, _, values = item.partition("=")
+        if not values:
+            raise SystemExit(f"--regional_index expects REGION=v1,v2,... (got {item!r})")
+        overrides[region.strip()] = _float_list(values)
+    strict = [v.strip().lower() in {"on", "true", "1", "yes"} for v in args.strict_country.split(",") if v.strip()]
+
+    start = time.perf_counter()
+    table = run_sweep(
+        args.data,
+        top_k=[int(v) for v in _float_list(args.k)],
+        recency_weight=_float_list(args.recency_weight),
+        strict_country=strict,
+        capacity_exponent=_float_list(args.capacity_exponent),
+        regional_overrides=overrides,
+        workers=args.workers,
+        seed=args.seed,
+        early_stop=args.early_stop,
+        min_fraction=args.min_fraction,
+        progress=not args.quiet,
+    )
+    elapsed = time.perf_counter() - start
+    if args.output.lower().endswith(".parquet"):
+        table.to_parquet(args.output, index=False)
+    else:
+        table.to_csv(args.output, index=False)
+    print(table.head(args.top).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print(f"\nEvaluated {len(table)} grid points in {elapsed:.1f}s; ranking written to {args.output}")
+
+def run_in_process(args, request, profile: bool):
+    from estimator_daemon import EstimatorService
+    from pipeline import StageTimer
+
+    timer = StageTimer()
+    with profiled(enabled=profile, name="orchestrator") as prof:
+        with timer.stage("load_data"):
+            service = EstimatorService(args.data)
+        out = service.run(request, top_k=args.k, timer=timer)
+
+    if profile:
+        print("\n--- Pipeline Stages ---", file=sys.stderr)
+        print(timer.table(), file=sys.stderr)
+        print("\n--- Top Allocation Sites ---", file=sys.stderr)
+        print("\n".join(prof.top_allocations), file=sys.stderr)
+        print(f"\ncProfile stats: {prof.pstats_path}\nAllocations: {prof.alloc_path}", file=sys.stderr)
+    return out
+
 def main():
     args = parse_args()
+    if args.command == "batch":
+        run_batch_command(args)
+        return
+    if args.command == "backtest":
+        run_backtest_command(args)
+        return
+    if args.command == "sweep":
+        run_sweep_command(args)
+        return
+    if args.command == "serve":
+        try:
+            run_serve_command(args)
+        except KeyboardInterrupt:
+            pass
+        return
 
     # 1) Build request
     request = {
@@ -30,31 +212,26 @@ def main():
         "execution_year": args.execution_year
     }
 
-    # 2) Retrieve similars
-    retriever = Retriever(args.data, REGIONAL_INDEX)
-    similar_df = retriever.find_similar(request, top_k=args.k)
+    # 2) Try a warm daemon, else run retrieve → estimate → scale → review → report in-process
+    profile = profiling_enabled(args.profile)
+    out = None
+    if not (args.no_daemon or profile):
+        out = client_estimate(
+            {"request": request, "top_k": args.k, "data": os.path.abspath(args.data)},
+            socket_path=args.socket,
+            url=args.daemon_url,
+        )
+    if out is None:
+        out = run_in_process(args, request, profile)
+
     if args.print_topk:
         print("\n--- Top-K Similar Projects ---")
-        print(similar_df[["project_id","project_type","region","capacity","execution_year","total_cost_usd"]])
-
-    base_row = similar_df.iloc[0].to_dict()
-
-    # 3) Estimator Agent (LLM) → scaling factors & soft costs
-    estimator = EstimatorAgent()
-    estimate_json = estimator.infer_factors(similar_df, request)
-    scaling_factors = estimate_json["scaling_factors"]
-    soft_costs = estimate_json["soft_costs"]
-    reasoning = estimate_json.get("reasoning", [])
-
-    # 4) Deterministic scaler
-    scaled = apply_cost_scaling(base_row, scaling_factors, soft_costs)
+        print(out["topk_text"])
 
-    # 5) Reviewer
-    reviewer_out = review(similar_df.to_dict(orient="records"), scaled, scaling_factors)
+    print("\n" + out["report"] + "\n")
 
-    # 6) Report
-    report = write_summary(request, base_row, scaling_factors, scaled, reviewer_out, reasoning)
-    print("\n" + report + "\n")
+    if args.export:
+        export_estimates([out["export_row"]], args.export)
 
 if __name__ == "__main__":
     main()
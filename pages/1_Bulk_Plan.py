@@ -0,0 +1,137 @@
+import streamlit as st
+
+from bulk_jobs import DEFAULT_WORKERS, MAX_ROWS, get_job, read_plan, submit_job, validate_plan
+
+DATA_PATH = "data/synthetic_capex_projects_optionA.csv"
+
+
+st.set_page_config(
+    page_title="Bulk Plan Estimates",
+    page_icon="📊",
+    layout="wide",
+)
+
+
+# ---------- HELPERS ----------
+def fmt_seconds(seconds) -> str:
+    if seconds is None:
+        return "-"
+    minutes, secs = divmod(int(round(seconds)), 60)
+    return f"{minutes}m {secs:02d}s" if minutes else f"{secs}s"
+
+
+# ---------- UPLOAD ----------
+st.title("Bulk Plan Estimates")
+st.caption(
+    "Upload a capital plan with one project per row (columns: project_type, region, capacity, execution_year; "
+    f"optional country and estimate_id; up to {MAX_ROWS:,} rows). Rows are priced in the background, so you can "
+    "keep using the app while the batch runs."
+)
+
+uploaded = st.file_uploader("Capital plan", type=["csv", "parquet", "ndjson", "jsonl"])
+
+plan = None
+if uploaded is not None:
+    try:
+        plan = read_plan(uploaded.name, uploaded.getvalue())
+    except Exception as exc:
+        st.error(f"Could not read {uploaded.name}: {exc}")
+
+checks = {"errors": [], "warnings": []}
+if plan is not None:
+    checks = validate_plan(plan, DATA_PATH)
+    for message in checks["errors"]:
+        st.error(message)
+    for message in checks["warnings"]:
+        st.warning(message)
+    st.markdown(f"**{len(plan):,} rows** · preview")
+    st.dataframe(plan.head(20), width="stretch", hide_index=True)
+
+c1, c2, c3, c4 = st.columns(4)
+with c1:
+    country_mode = st.radio("Country Strictness", ["Country-first with fallback", "Strict country only"], index=0)
+with c2:
+    top_k = st.slider("Comparable Count (top_k)", 3, 10, 5, 1)
+with c3:
+    recency_weight_pct = st.slider("Recency Weight (%)", 0, 100, 35, 5)
+with c4:
+    workers = st.slider("Worker threads", 1, 16, DEFAULT_WORKERS, 1)
+
+job = get_job(st.session_state.get("bulk_job_id"))
+running = job is not None and not job.finished
+start = st.button(
+    "Estimate Plan",
+    type="primary",
+    disabled=plan is None or bool(checks["errors"]) or running,
+)
+if start:
+    options = {
+        "top_k": int(top_k),
+        "strict_country": country_mode.startswith("Strict"),
+        "recency_weight": recency_weight_pct / 100.0,
+    }
+    job = submit_job(plan, DATA_PATH, options, workers=workers)
+    st.session_state["bulk_job_id"] = job.id
+    st.session_state["bulk_polling"] = True
+    running = True
+
+
+# ---------- PROGRESS ----------
+# Only this fragment reruns while the job is active; the worker pool runs on
+# its own threads, so the rest of the page stays interactive.
+@st.fragment(run_every=1.0 if running else None)
+def job_progress():
+    job = get_job(st.session_state.get("bulk_job_id"))
+    if job is None:
+        return
+    status = job.status()
+    if job.finished and st.session_state.get("bulk_polling"):
+        # Stop polling: a full rerun redefines the fragment without run_every.
+        st.session_state["bulk_polling"] = False
+        st.rerun()
+
+    st.markdown("#### Progress")
+    fraction = status["done"] / status["total"] if status["total"] else 1.0
+    st.progress(fraction, text=f"{status['done']:,} / {status['total']:,} estimates ({status['state']})")
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Estimated", f"{status['done']:,}")
+    m2.metric("Failed rows", f"{status['failed']:,}")
+    m3.metric("Throughput", f"{status['rows_per_s']:,.1f} rows/s")
+    m4.metric("Elapsed / ETA", f"{fmt_seconds(status['elapsed_s'])} / {fmt_seconds(status['eta_s'])}")
+
+    if not job.finished:
+        if st.button("Cancel", key="bulk_cancel"):
+            job.cancel()
+            st.info("Cancelling: rows already estimated are kept.")
+        return
+
+    if status["state"] == "failed":
+        st.error(f"The job failed: {status['error']}")
+        return
+    if status["state"] == "cancelled":
+        st.warning(f"Cancelled after {status['done']:,} of {status['total']:,} rows; the downloads hold those rows.")
+    else:
+        st.success(f"Estimated {status['done']:,} rows in {fmt_seconds(status['elapsed_s'])}.")
+
+    d1, d2 = st.columns(2)
+    with d1:
+        with open(job.outputs["parquet"], "rb") as fh:
+            st.download_button(
+                "Download Estimates (Parquet)",
+                data=fh,
+                file_name="capex_plan_estimates.parquet",
+                mime="application/octet-stream",
+                key="bulk_download_parquet",
+            )
+    with d2:
+        with open(job.outputs["csv"], "rb") as fh:
+            st.download_button(
+                "Download Estimates (CSV)",
+                data=fh,
+                file_name="capex_plan_estimates.csv",
+                mime="text/csv",
+                key="bulk_download_csv",
+            )
+
+
+job_progress()
@@ -0,0 +1,72 @@
+import time
+
+import pandas as pd
+import streamlit as st
+
+from estimate_store import get_store
+from prefetch import get_prefetcher
+
+
+st.set_page_config(
+    page_title="Estimator Admin",
+    page_icon="📊",
+    layout="wide",
+)
+
+
+# ---------- HELPERS ----------
+def fmt_bytes(n: float) -> str:
+    if n < 1024:
+        return f"{int(n)} B"
+    for unit in ["KB", "MB", "GB"]:
+        n /= 1024.0
+        if n < 1024 or unit == "GB":
+            return f"{n:,.1f} {unit}"
+
+
+# ---------- ESTIMATE STORE ----------
+st.title("Estimator Admin")
+store = get_store()
+stats = store.stats()
+
+st.markdown("#### Estimate Store")
+st.caption(
+    "Computed estimates shared by all sessions; each session keeps only an estimate id. "
+    "Bounds come from CAPEX_STORE_MAX_ENTRIES, CAPEX_STORE_MAX_BYTES and CAPEX_STORE_SPILL_DIR."
+)
+m1, m2, m3, m4 = st.columns(4)
+m1.metric("Entries", f"{stats['entries']:,} / {stats['max_entries']:,}")
+m2.metric("Memory", f"{fmt_bytes(stats['bytes'])} / {fmt_bytes(stats['max_bytes'])}")
+m3.metric("Hit rate", f"{stats['hit_rate'] * 100:,.1f}%")
+m4.metric("Evictions", f"{stats['evictions']:,}")
+st.progress(min(1.0, stats["bytes"] / stats["max_bytes"]), text="Memory budget used")
+
+s1, s2, s3 = st.columns(3)
+s1.metric("Hits / spill hits / misses", f"{stats['hits']:,} / {stats['spill_hits']:,} / {stats['misses']:,}")
+if stats["spill_dir"]:
+    s2.metric("Spilled to disk", f"{stats['spilled_entries']:,} ({fmt_bytes(stats['spilled_bytes'])})")
+    s3.caption(f"Spill directory: `{stats['spill_dir']}`")
+else:
+    s2.metric("Spilled to disk", "off")
+
+entries = store.entries()
+if entries:
+    now = time.time()
+    table = pd.DataFrame(entries)
+    table["size"] = table["bytes"].map(fmt_bytes)
+    table["age"] = (now - table["created"]).map(lambda s: f"{s / 60:,.1f} min")
+    table["idle"] = (now - table["accessed"]).map(lambda s: f"{s / 60:,.1f} min")
+    st.dataframe(table[["id", "size", "hits", "age", "idle"]], width="stretch", hide_index=True)
+else:
+    st.info("The store is empty.")
+
+st.markdown("#### Prefetch")
+prefetch = get_prefetcher().stats()
+p1, p2, p3 = st.columns(3)
+p1.metric("Prefetched / skipped / failed", f"{prefetch['completed']:,} / {prefetch['skipped']:,} / {prefetch['failed']:,}")
+p2.metric("Pending", f"{prefetch['pending']:,}")
+p3.metric("Seeded memory", f"{fmt_bytes(prefetch['seeded_bytes'])} / {fmt_bytes(prefetch['max_bytes'])}")
+
+if st.button("Clear estimate store"):
+    store.clear()
+    st.rerun()
@@ -0,0 +1,262 @@
+"""
+Shared estimate pipeline: retrieve -> infer factors -> scale -> review -> summary.
+
+Used by the CLI, the batch runner, the daemon and the Streamlit app so every
+entry point runs the same steps. Pass a StageTimer to record per-stage wall
+time (and peak memory while tracemalloc is tracing).
+"""
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from scaler import apply_cost_scaling
+from reviewer import review
+from report_writer import write_summary
+from tracing import span
+
+
+class NoComparablesError(ValueError):
+    pass
+
+
+class QualityBelowThresholdError(ValueError):
+    def __init__(self, quality_score: float, threshold: float):
+        super().__init__(
+            f"Comparable quality score is {quality_score:.1f}, below threshold {threshold}. "
+            "Relax filters or lower threshold."
+        )
+        self.quality_score = quality_score
+        self.threshold = threshold
+
+
+class StageTimer:
+    """Collects wall time and (when tracemalloc is tracing) peak memory per stage."""
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_ms = (time.perf_counter() - start) * 1000.0
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1e6 if tracing else None
+            self.records.append({"stage": name, "wall_ms": wall_ms, "peak_mb": peak_mb})
+
+    def total_ms(self) -> float:
+        return sum(r["wall_ms"] for r in self.records)
+
+    def table(self) -> str:
+        rows = [f"{'Stage':<16}{'Wall (ms)':>12}{'Peak (MB)':>12}"]
+        for r in self.records:
+            peak = f"{r['peak_mb']:.2f}" if r["peak_mb"] is not None else "-"
+            rows.append(f"{r['stage']:<16}{r['wall_ms']:>12.2f}{peak:>12}")
+        rows.append(f"{'total':<16}{self.total_ms():>12.2f}{'':>12}")
+        return "\n".join(rows)
+
+
+@contextmanager
+def _maybe_stage(timer: Optional[StageTimer], name: str):
+    if timer is None:
+        yield
+    else:
+        with timer.stage(name):
+            yield
+
+
+class StageCache:
+    """
+    Last output of each pipeline stage, keyed on that stage's inputs.
+
+    Keys chain through the upstream stage's key, so a changed input re-runs its
+    stage and everything downstream while unchanged stages are reused:
+    retrieve <- request, top_k, country mode, recency, dataset fingerprint;
+    infer_factors <- retrieval; scale <- overrides; review <- quality threshold.
+    After each run, `reused` and `executed` list the stages by outcome.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, tuple] = {}
+        self.reused: List[str] = []
+        self.executed: List[str] = []
+
+    def start(self):
+        self.reused, self.executed = [], []
+
+    def run(self, name: str, key: str, fn):
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == key:
+            self.reused.append(name)
+            return entry[1]
+        value = fn()
+        self._entries[name] = (key, value)
+        self.executed.append(name)
+        return value
+
+
+def _stage_key(*parts) -> str:
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+def estimate_ranges(total_cost: float, similar_df: pd.DataFrame, contingency_pct: float) -> dict:
+    hist = similar_df["total_cost_usd"].astype(float)
+    med = float(np.median(hist)) if len(hist) else max(1.0, total_cost)
+    std = float(np.std(hist)) if len(hist) else 0.0
+    cv = std / med if med else 0.0
+    uncertainty = float(np.clip(0.10 + cv * 0.35 + contingency_pct * 0.35, 0.08, 0.45))
+    return {
+        "p50": round(total_cost, 2),
+        "p80": round(total_cost * (1.0 + 0.45 * uncertainty), 2),
+        "p90": round(total_cost * (1.0 + 0.85 * uncertainty), 2),
+        "uncertainty": round(uncertainty, 4),
+    }
+
+
+def run_pipeline(retriever,
+                 estimator,
+                 request: Dict[str, Any],
+                 top_k: int = 5,
+                 strict_country: bool = False,
+                 recency_weight: float = 0.0,
+                 overrides: Optional[Dict[str, Any]] = None,
+                 quality_threshold: Optional[float] = None,
+                 block_below_threshold: bool = False,
+                 with_report: bool = True,
+                 timer: Optional[StageTimer] = None,
+                 stages: Optional[StageCache] = None) -> Dict[str, Any]:
+    """
+    Run one estimate end to end.
+
+    overrides (all optional): complexity_target, engineering_pct and
+    contingency_pct (fractions), manual_inflation_pct (percent per year;
+    when not None, replaces the table-derived inflation factor; when present
+    but None, the reasoning notes the automatic inflation factor).
+    quality_threshold adds a reviewer flag below the threshold, or raises
+    QualityBelowThresholdError when block_below_threshold is set.
+    Pass the same StageCache across calls to reuse stages whose inputs did not
+    change; the result lists them under stages_reused / stages_executed.
+    """
+    overrides = overrides or {}
+    with span("pipeline.run_pipeline", project_type=request.get("project_type"), region=request.get("region"),
+              top_k=int(top_k)) as sp:
+        out = _run_pipeline(retriever, estimator, request, top_k, strict_country, recency_weight,
+                            overrides, quality_threshold, block_below_threshold, with_report, timer,
+                            stages if stages is not None else StageCache())
+        sp.set_attribute("estimator_mode", out["estimate_mode"])
+        sp.set_attribute("candidate_scope", out["retrieval_meta"].get("candidate_scope"))
+    return out
+
+
+def _run_pipeline(retriever, estimator, request, top_k, strict_country, recency_weight,
+                  overrides, quality_threshold, block_below_threshold, with_report, timer, stages):
+    stages.start()
+
+    def _retrieve():
+        with _maybe_stage(timer, "retrieve"):
+            return retriever.find_similar(
+                request,
+                top_k=top_k,
+                strict_country=strict_country,
+                recency_weight=recency_weight,
+                return_meta=True,
+            )
+
+    retrieve_key = _stage_key(retriever.fingerprint, request, top_k, strict_country, recency_weight)
+    similar_df, retrieval_meta = stages.run("retrieve", retrieve_key, _retrieve)
+    if similar_df.empty:
+        raise NoComparablesError("No comparable projects were found for this request. Try broader inputs.")
+
+    quality_score = float(retrieval_meta.get("comparable_quality", 0.0))
+    if quality_threshold is not None and block_below_threshold and quality_score < float(quality_threshold):
+        raise QualityBelowThresholdError(quality_score, quality_threshold)
+
+    base_row = similar_df.iloc[0].to_dict()
+
+    def _infer():
+        with _maybe_stage(timer, "infer_factors"):
+            return estimator.infer_factors(similar_df, request, fingerprint=retriever.fingerprint)
+
+    infer_key = _stage_key(retrieve_key)
+    estimate_json = stages.run("infer_factors", infer_key, _infer)
+
+    def _scale():
+        scaling_factors = dict(estimate_json["scaling_factors"])
+        soft_costs = dict(estimate_json["soft_costs"])
+        reasoning = list(estimate_json.get("reasoning", []))
+
+        # User assumption overrides for practical planning workflows.
+        if overrides.get("complexity_target") is not None:
+            scaling_factors["complexity_modifier"] = round(float(overrides["complexity_target"]), 4)
+        if overrides.get("engineering_pct") is not None:
+            soft_costs["engineering_pct"] = round(float(overrides["engineering_pct"]), 4)
+        if overrides.get("contingency_pct") is not None:
+            soft_costs["contingency_pct"] = round(float(overrides["contingency_pct"]), 4)
+        if overrides.get("manual_inflation_pct") is not None:
+            manual_pct = float(overrides["manual_inflation_pct"])
+            year_delta = int(request["execution_year"]) - int(base_row.get("execution_year", request["execution_year"]))
+            scaling_factors["inflation_factor"] = round((1.0 + manual_pct / 100.0) ** year_delta, 4)
+            reasoning.append(f"Manual inflation override applied at {manual_pct:.1f}% over {year_delta} years.")
+        elif "manual_inflation_pct" in overrides:
+            reasoning.append("Inflation factor derived automatically from execution-year tables.")
+
+        with _maybe_stage(timer, "scale"):
+            scaled = apply_cost_scaling(base_row, scaling_factors, soft_costs)
+            ranges = estimate_ranges(scaled["total_estimated_cost"], similar_df, soft_costs["contingency_pct"])
+        return scaling_factors, soft_costs, reasoning, scaled, ranges
+
+    scale_key = _stage_key(infer_key, overrides)
+    scaling_factors, soft_costs, reasoning, scaled, ranges = stages.run("scale", scale_key, _scale)
+
+    def _review():
+        with _maybe_stage(timer, "review"):
+            reviewer_out = review(similar_df.to_dict(orient="records"), scaled, scaling_factors)
+            if quality_threshold is not None:
+                if quality_score < float(quality_threshold):
+                    reviewer_out["flags"] = reviewer_out.get("flags", []) + [
+                        f"Comparable quality {quality_score:.1f} is below threshold {quality_threshold}."
+                    ]
+                if reviewer_out.get("flags"):
+                    reviewer_out["confidence"] = "Medium" if len(reviewer_out["flags"]) == 1 else "Low"
+                reviewer_out["notes"] = reviewer_out.get("notes", []) + [
+                    f"Retrieval scope: {retrieval_meta.get('candidate_scope', 'unknown')} from pool size {retrieval_meta.get('candidate_count', 0)}.",
+                    f"Comparable quality score: {quality_score:.1f}/100.",
+                ]
+        return reviewer_out
+
+    review_key = _stage_key(scale_key, quality_threshold)
+    reviewer_out = stages.run("review", review_key, _review)
+
+    def _summary():
+        with _maybe_stage(timer, "write_summary"):
+            return write_summary(request, base_row, scaling_factors, scaled, reviewer_out, reasoning)
+
+    report_md = stages.run("write_summary", _stage_key(review_key), _summary) if with_report else None
+
+    return {
+        "request": request,
+        "similar_df": similar_df,
+        "retrieval_meta": retrieval_meta,
+        "quality_score": quality_score,
+        "base_row": base_row,
+        "estimate_json": estimate_json,
+        "scaling_factors": scaling_factors,
+        "soft_costs": soft_costs,
+        "reasoning": reasoning,
+        "estimate_mode": estimate_json.get("meta", {}).get("mode", "ai"),
+        "scaled": scaled,
+        "ranges": ranges,
+        "reviewer_out": reviewer_out,
+        "report_md": report_md,
+        "stages_reused": list(stages.reused),
+        "stages_executed": list(stages.executed),
+    }
@@ -0,0 +1,141 @@
+"""
+Speculative background prefetch of neighbouring estimates.
+
+After the app shows an estimate, planners usually nudge capacity or execution
+year by one step. The Prefetcher computes those neighbours on one low-priority
+daemon thread and seeds the estimate store, so the next slider move is a store
+hit. Each submit() replaces the pending queue, so only the latest request's
+neighbours are worked on.
+
+Budgets: the thread sleeps between tasks so its average CPU use stays under
+cpu_fraction of one core, and it stops seeding once the entries it put in the
+store (and that are still there) exceed max_bytes. On Linux the thread also
+lowers its scheduling priority.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from estimate_store import EstimateStore, get_store
+
+PREFETCH_CPU_FRACTION = 0.25
+PREFETCH_MAX_BYTES = 32_000_000
+PREFETCH_NICE = 10
+
+# (store key or None, build). build returns the value to store, or None when
+# the task only warms caches (e.g. retrieval).
+Task = Tuple[Optional[str], Callable[[], Optional[dict]]]
+
+
+def neighbour_requests(request: dict, capacity_step: float, capacity_bounds: Tuple[float, float],
+                       year_bounds: Tuple[int, int]) -> List[dict]:
+    """One capacity step and one year either side of `request`, nearest first, within the slider bounds."""
+    out = []
+    for delta in (capacity_step, -capacity_step):
+        capacity = request["capacity"] + delta
+        if capacity_bounds[0] <= capacity <= capacity_bounds[1]:
+            out.append({**request, "capacity": capacity})
+    for delta in (1, -1):
+        year = int(request["execution_year"]) + delta
+        if year_bounds[0] <= year <= year_bounds[1]:
+            out.append({**request, "execution_year": year})
+    return out
+
+
+class Prefetcher:
+    def __init__(self, store: EstimateStore, cpu_fraction: float = PREFETCH_CPU_FRACTION,
+                 max_bytes: int = PREFETCH_MAX_BYTES):
+        self.store = store
+        self.cpu_fraction = min(1.0, max(0.01, float(cpu_fraction)))
+        self.max_bytes = int(max_bytes)
+        self._queue: Deque[Task] = deque()
+        self._seeded: Set[str] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self.completed = 0
+        self.skipped = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name="capex-prefetch", daemon=True)
+        self._thread.start()
+
+    def submit(self, tasks: Iterable[Task]):
+        """Replace the pending tasks; tasks already in the store are skipped when reached."""
+        with self._lock:
+            self._queue.clear()
+            self._queue.extend(tasks)
+        self._wake.set()
+
+    def was_prefetched(self, key: Optional[str]) -> bool:
+        with self._lock:
+            return key in self._seeded
+
+    def seeded_bytes(self) -> int:
+        # Entries the store has since evicted no longer count against the budget.
+        with self._lock:
+            sizes = {key: self.store.nbytes(key) for key in self._seeded}
+            self._seeded = {key for key, size in sizes.items() if size is not None}
+        return sum(size for size in sizes.values() if size is not None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = len(self._queue)
+        return {
+            "pending": pending,
+            "completed": self.completed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "seeded_bytes": self.seeded_bytes(),
+            "max_bytes": self.max_bytes,
+        }
+
+    def _next(self) -> Optional[Task]:
+        with self._lock:
+            if self._queue:
+                return self._queue.popleft()
+            self._wake.clear()
+            return None
+
+    def _run(self):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PREFETCH_NICE)
+        except (AttributeError, OSError):
+            pass
+        while True:
+            task = self._next()
+            if task is None:
+                self._wake.wait()
+                continue
+            key, build = task
+            if key is not None and (self.store.contains(key) or self.seeded_bytes() >= self.max_bytes):
+                self.skipped += 1
+                continue
+
+            start = time.thread_time()
+            try:
+                value = build()
+                if key is not None and value is not None:
+                    self.store.put(key, value)
+                    with self._lock:
+                        self._seeded.add(key)
+                self.completed += 1
+            except Exception:
+                # Speculative work: a neighbour that cannot be estimated is simply not prefetched.
+                self.failed += 1
+            # Duty cycle: idle long enough that this thread averages <= cpu_fraction of a core.
+            busy = time.thread_time() - start
+            time.sleep(busy * (1.0 - self.cpu_fraction) / self.cpu_fraction)
+
+
+_default: Optional[Prefetcher] = None
+_default_lock = threading.Lock()
+
+
+def get_prefetcher() -> Prefetcher:
+    """Process-wide prefetcher seeding estimate_store.get_store(); its thread starts on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Prefetcher(get_store())
+        return _default
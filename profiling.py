@@ -0,0 +1,70 @@
+"""
+Opt-in profiling for estimate runs.
+
+Enable with the CLI flag --profile or the environment switch CAPEX_PROFILE=1.
+A profiled run writes <prefix>.pstats (cProfile, open with pstats or
+snakeviz) and <prefix>-alloc.txt (top tracemalloc allocation sites) into
+CAPEX_PROFILE_DIR (default: profiles/).
+"""
+import cProfile
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+PROFILE_ENV = "CAPEX_PROFILE"
+PROFILE_DIR_ENV = "CAPEX_PROFILE_DIR"
+TOP_ALLOCATIONS = 15
+
+
+def profiling_enabled(flag: bool = False) -> bool:
+    return bool(flag) or os.getenv(PROFILE_ENV, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+class ProfileResult:
+    def __init__(self):
+        self.pstats_path: Optional[Path] = None
+        self.alloc_path: Optional[Path] = None
+        self.top_allocations: list = []
+
+
+@contextmanager
+def profiled(enabled: bool = True, name: str = "estimate", output_dir: Optional[str] = None):
+    """Wrap a block in cProfile + tracemalloc and dump the results on exit."""
+    result = ProfileResult()
+    if not enabled:
+        yield result
+        return
+
+    out_dir = Path(output_dir or os.getenv(PROFILE_DIR_ENV) or "profiles")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    prefix = out_dir / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(25)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        if started_tracing:
+            tracemalloc.stop()
+
+        result.pstats_path = prefix.with_suffix(".pstats")
+        profiler.dump_stats(str(result.pstats_path))
+
+        stats = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]).statistics("lineno")
+        result.top_allocations = [
+            f"{s.size / 1024:10.1f} KiB {s.count:8d} blocks  {s.traceback[0].filename}:{s.traceback[0].lineno}"
+            for s in stats[:TOP_ALLOCATIONS]
+        ]
+        result.alloc_path = Path(f"{prefix}-alloc.txt")
+        result.alloc_path.write_text("\n".join(result.top_allocations) + "\n", encoding="utf-8")
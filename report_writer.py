@@ -1,4 +1,9 @@
-from tabulate import tabulate
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+
+from tracing import span
 
 def write_summary(request: dict,
                   base_project: dict,
@@ -6,6 +11,17 @@ def write_summary(request: dict,
                   scaled_result: dict,
                   reviewer_out: dict,
                   reasoning_bullets: list) -> str:
+    with span("report_writer.write_summary", format="markdown-tabulate"):
+        return _write_summary(request, base_project, scaling_factors, scaled_result, reviewer_out, reasoning_bullets)
+
+def _write_summary(request: dict,
+                   base_project: dict,
+                   scaling_factors: dict,
+                   scaled_result: dict,
+                   reviewer_out: dict,
+                   reasoning_bullets: list) -> str:
+    from tabulate import tabulate  # Imported lazily to keep CLI startup fast.
+
     lines = []
     lines.append("# AI-Generated CapEx Estimate\n")
     lines.append("## Request\n")
@@ -60,3 +76,183 @@ def write_summary(request: dict,
             lines.append(f"- ⚠️ {f}")
 
     return "\n".join(lines)
+
+
+# ---------- Compiled template path ----------
+# Same sections as write_summary, rendered from Jinja2 templates that are
+# compiled once per process. Use render_summary for Markdown/HTML output and
+# write_reports to stream many reports to a directory or zip archive.
+
+_MD_TEMPLATE = """\
+# AI-Generated CapEx Estimate
+
+## Request
+
+| Project Type | Region | Country | Capacity | Year |
+|---|---|---|--:|--:|
+| {{ request.project_type }} | {{ request.region }} | {{ request.get("country", "N/A") }} | {{ request.capacity }} | {{ request.execution_year }} |
+
+## Selected Base Comparable
+| ID | Name | Region | Country | Capacity | Year |
+|---|---|---|---|--:|--:|
+| {{ base.project_id }} | {{ base.project_name }} | {{ base.region }} | {{ base.get("country", "N/A") }} | {{ base.capacity }} | {{ base.execution_year }} |
+
+## Scaling Factors (LLM-derived)
+| Capacity | Region | Inflation | Complexity |
+|--:|--:|--:|--:|
+| {{ sf.capacity_scale_factor }} | {{ sf.regional_index_factor }} | {{ sf.inflation_factor }} | {{ sf.complexity_modifier }} |
+
+## Result (Deterministic Math)
+| Category | Cost (USD) |
+|---|--:|
+{% for label, value in rows %}| {{ label }} | {{ value | usd }} |
+{% endfor %}
+Applied overall factor: **{{ result.applied_factor }}**
+{% if reasoning %}
+## Assumptions & Reasoning (LLM)
+{% for r in reasoning %}- {{ r }}
+{% endfor %}{% endif %}
+## Reviewer
+- Confidence: **{{ reviewer.confidence }}**
+{% for n in reviewer.notes %}- Note: {{ n }}
+{% endfor %}{% for f in reviewer.flags %}- ⚠️ {{ f }}
+{% endfor %}"""
+
+_HTML_TEMPLATE = """\
+<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>AI-Generated CapEx Estimate</title></head>
+<body>
+<h1>AI-Generated CapEx Estimate</h1>
+<h2>Request</h2>
+<table>
+<tr><th>Project Type</th><th>Region</th><th>Country</th><th>Capacity</th><th>Year</th></tr>
+<tr><td>{{ request.project_type }}</td><td>{{ request.region }}</td><td>{{ request.get("country", "N/A") }}</td><td>{{ request.capacity }}</td><td>{{ request.execution_year }}</td></tr>
+</table>
+<h2>Selected Base Comparable</h2>
+<table>
+<tr><th>ID</th><th>Name</th><th>Region</th><th>Country</th><th>Capacity</th><th>Year</th></tr>
+<tr><td>{{ base.project_id }}</td><td>{{ base.project_name }}</td><td>{{ base.region }}</td><td>{{ base.get("country", "N/A") }}</td><td>{{ base.capacity }}</td><td>{{ base.execution_year }}</td></tr>
+</table>
+<h2>Scaling Factors (LLM-derived)</h2>
+<table>
+<tr><th>Capacity</th><th>Region</th><th>Inflation</th><th>Complexity</th></tr>
+<tr><td>{{ sf.capacity_scale_factor }}</td><td>{{ sf.regional_index_factor }}</td><td>{{ sf.inflation_factor }}</td><td>{{ sf.complexity_modifier }}</td></tr>
+</table>
+<h2>Result (Deterministic Math)</h2>
+<table>
+<tr><th>Category</th><th>Cost (USD)</th></tr>
+{% for label, value in rows %}<tr><td>{{ label }}</td><td>{{ value | usd }}</td></tr>
+{% endfor %}</table>
+<p>Applied overall factor: <strong>{{ result.applied_factor }}</strong></p>
+{% if reasoning %}<h2>Assumptions &amp; Reasoning (LLM)</h2>
+<ul>
+{% for r in reasoning %}<li>{{ r }}</li>
+{% endfor %}</ul>
+{% endif %}<h2>Reviewer</h2>
+<ul>
+<li>Confidence: <strong>{{ reviewer.confidence }}</strong></li>
+{% for n in reviewer.notes %}<li>Note: {{ n }}</li>
+{% endfor %}{% for f in reviewer.flags %}<li>⚠️ {{ f }}</li>
+{% endfor %}</ul>
+</body></html>
+"""
+
+REPORT_FORMATS = {"markdown": ".md", "html": ".html"}
+
+
+@lru_cache(maxsize=None)
+def _template(fmt: str):
+    import jinja2  # Imported lazily; only the template path needs it.
+
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unknown report format: {fmt}")
+    env = jinja2.Environment(
+        autoescape=(fmt == "html"),
+        keep_trailing_newline=True,
+        undefined=jinja2.StrictUndefined,
+    )
+    env.filters["usd"] = lambda x: f"{float(x):,.0f}"
+    return env.from_string(_HTML_TEMPLATE if fmt == "html" else _MD_TEMPLATE)
+
+
+def render_summary(request: dict,
+                   base_project: dict,
+                   scaling_factors: dict,
+                   scaled_result: dict,
+                   reviewer_out: dict,
+                   reasoning_bullets: list,
+                   fmt: str = "markdown") -> str:
+    wbs = scaled_result["scaled_wbs_costs"]
+    rows = [
+        ("Civil", wbs["civil_cost"]),
+        ("Mechanical", wbs["mechanical_cost"]),
+        ("Electrical", wbs["electrical_cost"]),
+        ("Automation", wbs["automation_cost"]),
+        ("Engineering", scaled_result["engineering_cost"]),
+        ("Contingency", scaled_result["contingency_cost"]),
+        ("**Total**" if fmt == "markdown" else "Total", scaled_result["total_estimated_cost"]),
+    ]
+    return _template(fmt).render(
+        request=request,
+        base=base_project,
+        sf=scaling_factors,
+        result=scaled_result,
+        rows=rows,
+        reasoning=reasoning_bullets or [],
+        reviewer=reviewer_out,
+    )
+
+
+def _report_name(item: dict, i: int, used: set) -> str:
+    """Sanitized file stem for `item`; repeated names get a -2, -3, ... suffix."""
+    name = item.get("name") or f"estimate_{i:05d}"
+    stem = "".join(c if (c.isalnum() or c in "-_.") else "_" for c in str(name))
+    unique, n = stem, 1
+    while unique in used:
+        n += 1
+        unique = f"{stem}-{n}"
+    used.add(unique)
+    return unique
+
+
+def write_reports(items: Iterable[dict], dest: str, fmt: str = "markdown") -> int:
+    """
+    Render and write reports one at a time, so memory stays flat for large plans.
+
+    items: iterable (or generator) of dicts with the write_summary arguments
+           (request, base_project, scaling_factors, scaled_result, reviewer_out,
+           reasoning_bullets) and an optional "name" used as the file stem.
+    dest: a directory, or a path ending in ".zip" to write a single archive.
+    Returns the number of reports written.
+    """
+    ext = REPORT_FORMATS.get(fmt)
+    if ext is None:
+        raise ValueError(f"Unknown report format: {fmt}")
+
+    def _render(item):
+        return render_summary(
+            item["request"],
+            item["base_project"],
+            item["scaling_factors"],
+            item["scaled_result"],
+            item["reviewer_out"],
+            item.get("reasoning_bullets", []),
+            fmt=fmt,
+        )
+
+    count = 0
+    used: set = set()
+    dest_path = Path(dest)
+    if dest_path.suffix.lower() == ".zip":
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(dest_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for i, item in enumerate(items):
+                zf.writestr(_report_name(item, i, used) + ext, _render(item))
+                count += 1
+        return count
+
+    dest_path.mkdir(parents=True, exist_ok=True)
+    for i, item in enumerate(items):
+        (dest_path / (_report_name(item, i, used) + ext)).write_text(_render(item), encoding="utf-8")
+        count += 1
+    return count
@@ -1,6 +1,47 @@
-import pandas as pd
+import json
+import threading
+from collections import OrderedDict
+
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
+
+from dataset import CapexDataset, get_dataset
+from tracing import span
+
+RESULT_CACHE_SIZE = 512
+
+
+class MinMaxScaler:
+    """Minimal numpy equivalent of sklearn's MinMaxScaler (feature_range=(0, 1))."""
+
+    def fit(self, X: np.ndarray):
+        X = np.asarray(X, dtype=float)
+        self.data_min_ = np.nanmin(X, axis=0)
+        self.data_max_ = np.nanmax(X, axis=0)
+        data_range = self.data_max_ - self.data_min_
+        # Constant features map to 0, as in sklearn.
+        self.scale_ = 1.0 / np.where(data_range == 0.0, 1.0, data_range)
+        self.min_ = -self.data_min_ * self.scale_
+        return self
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X, dtype=float) * self.scale_ + self.min_
+
+
+def select_scope(n_type: int, n_region: int, n_country: int, top_k: int, strict_country: bool) -> str:
+    """
+    Candidate pool for a request from the number of same-type projects, those
+    also in the request's region, and those also in its country:
+    country_strict, country, region, type or global (whole dataset).
+    """
+    if strict_country and n_country > 0:
+        return "country_strict"
+    if n_country >= top_k:
+        return "country"
+    if n_region >= max(2, top_k // 2):
+        return "region"
+    if n_type:
+        return "type"
+    return "global"
 
 
 class Retriever:
@@ -10,20 +51,31 @@ class Retriever:
     - prioritizes country/region based on strictness settings
     - computes similarity over [capacity, region_index, execution_year]
     - can bias results toward newer projects via recency weighting
+
+    Results are cached per dataset fingerprint, request and retrieval settings.
+    The retriever is read-only after construction (it never mutates the shared
+    dataset frame), so one instance can serve concurrent find_similar calls.
     """
 
-    def __init__(self, csv_path: str, regional_index: dict):
-        self.df = pd.read_csv(csv_path)
-        self.df = self.df.dropna(subset=["project_type", "region", "capacity", "execution_year"])
-        if "country" not in self.df.columns:
-            self.df["country"] = "Unknown"
-        self.df["country"] = self.df["country"].fillna("Unknown")
+    def __init__(self, data, regional_index: dict):
+        """data: path to the projects CSV, or a shared CapexDataset."""
+        self.dataset = data if isinstance(data, CapexDataset) else get_dataset(data)
+        self.fingerprint = self.dataset.fingerprint
+        # Shared, read-only frame; candidate selection works on positions into it.
+        self.df = self.dataset.projects
         self.regional_index = regional_index
 
-        self.feature_df = self.df.copy()
-        self.feature_df["region_idx"] = self.feature_df["region"].map(self.regional_index).fillna(1.0)
-        self.X_all = self.feature_df[["capacity", "region_idx", "execution_year"]].to_numpy(dtype=float)
+        self._project_type = self.dataset.column("project_type")
+        self._region = self.dataset.column("region")
+        self._country = self.dataset.column("country")
+        self._year = self.dataset.column("execution_year", "float64")
+        region_idx = self.df["region"].map(self.regional_index).fillna(1.0).to_numpy(dtype=float)
+        self.X_all = np.column_stack([self.dataset.column("capacity", "float64"), region_idx, self._year])
         self.scaler = MinMaxScaler().fit(self.X_all)
+        self._year_max = float(self._year.max()) if len(self._year) else 0.0
+        self._year_span = max(1.0, self._year_max - float(self._year.min())) if len(self._year) else 1.0
+        self._results: "OrderedDict[str, tuple]" = OrderedDict()
+        self._results_lock = threading.Lock()
 
     def find_similar(
         self,
@@ -33,35 +85,60 @@ class Retriever:
         recency_weight: float = 0.0,
         return_meta: bool = False,
     ):
+        with span(
+            "retriever.find_similar",
+            project_type=request.get("project_type"),
+            top_k=int(top_k),
+            strict_country=bool(strict_country),
+            recency_weight=float(recency_weight),
+        ) as sp:
+            key = json.dumps(
+                [self.fingerprint, request, int(top_k), bool(strict_country), float(recency_weight)],
+                sort_keys=True,
+                default=str,
+            )
+            with self._results_lock:
+                hit = self._results.get(key)
+                if hit is not None:
+                    self._results.move_to_end(key)
+            sp.set_attribute("cache_hit", hit is not None)
+            if hit is None:
+                hit = self._find_similar(request, top_k, strict_country, recency_weight)
+                with self._results_lock:
+                    self._results[key] = hit
+                    while len(self._results) > RESULT_CACHE_SIZE:
+                        self._results.popitem(last=False)
+            # Callers may add columns to the frame; hand out copies of the cached result.
+            out, meta = hit[0].copy(), dict(hit[1])
+            sp.set_attribute("candidate_scope", meta["candidate_scope"])
+            sp.set_attribute("candidate_count", meta["candidate_count"])
+        if not return_meta:
+            return out
+        return out, meta
+
+    def _find_similar(self, request: dict, top_k: int, strict_country: bool, recency_weight: float):
         # constrain to same project_type first (most important)
-        same_type = self.feature_df[self.feature_df["project_type"] == request["project_type"]]
-        same_region = same_type[same_type["region"] == request["region"]] if not same_type.empty else same_type
+        same_type = np.flatnonzero(self._project_type == request["project_type"])
+        same_region = same_type[self._region[same_type] == request["region"]]
         req_country = request.get("country")
         same_country = (
-            same_region[same_region["country"] == req_country]
-            if (not same_region.empty and req_country is not None)
+            same_region[self._country[same_region] == req_country]
+            if (len(same_region) and req_country is not None)
             else same_region
         )
 
-        if strict_country and len(same_country) > 0:
-            candidate_df = same_country
-            candidate_scope = "country_strict"
-        elif len(same_country) >= top_k:
-            candidate_df = same_country
-            candidate_scope = "country"
-        elif len(same_region) >= max(2, top_k // 2):
-            candidate_df = same_region
-            candidate_scope = "region"
-        elif not same_type.empty:
-            candidate_df = same_type
-            candidate_scope = "type"
+        candidate_scope = select_scope(len(same_type), len(same_region), len(same_country), top_k, strict_country)
+        if candidate_scope in {"country_strict", "country"}:
+            candidates = same_country
+        elif candidate_scope == "region":
+            candidates = same_region
+        elif candidate_scope == "type":
+            candidates = same_type
         else:
             # fall back to whole dataset if no same-type
-            candidate_df = self.feature_df
-            candidate_scope = "global"
+            candidates = np.arange(len(self.df))
 
-        X = candidate_df[["capacity", "region_idx", "execution_year"]].to_numpy(dtype=float)
-        X_scaled = self.scaler.transform(X)
+        X_scaled = self.scaler.transform(self.X_all[candidates])
 
         req_region_idx = self.regional_index.get(request["region"], 1.0)
         req_vector = np.array([[request["capacity"], req_region_idx, request["execution_year"]]], dtype=float)
@@ -70,16 +147,13 @@ class Retriever:
         recency_weight = float(max(0.0, min(1.0, recency_weight)))
         geom_dist = np.linalg.norm(X_scaled - req_scaled, axis=1)
 
-        year_span = max(1.0, float(self.feature_df["execution_year"].max() - self.feature_df["execution_year"].min()))
-        recency_penalty = (
-            float(self.feature_df["execution_year"].max()) - candidate_df["execution_year"].astype(float).to_numpy()
-        ) / year_span
+        recency_penalty = (self._year_max - self._year[candidates]) / self._year_span
 
         blended_dist = (1.0 - recency_weight) * geom_dist + recency_weight * recency_penalty
 
-        sel_n = min(int(top_k), len(candidate_df))
+        sel_n = min(int(top_k), len(candidates))
         order = np.argsort(blended_dist)[:sel_n]
-        sel = candidate_df.iloc[order].copy()
+        sel = self.df.iloc[candidates[order]].copy()
 
         sel_dist = blended_dist[order]
         similarity = 1.0 / (1.0 + sel_dist)
@@ -107,11 +181,8 @@ class Retriever:
             "execution_year",
         ]
         out = sel[cols_keep].reset_index(drop=True)
-        if not return_meta:
-            return out
-
         return out, {
             "candidate_scope": candidate_scope,
-            "candidate_count": int(len(candidate_df)),
+            "candidate_count": int(len(candidates)),
             "comparable_quality": round(comparable_quality * 100.0, 1),
         }
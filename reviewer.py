@@ -1,39 +1,203 @@
 from typing import Dict, Any, List, Tuple
-import statistics as stats
-from config import COMPLEXITY_MIN_MAX
+import numpy as np
+import pandas as pd
+from tracing import span
+from config import COMPLEXITY_MIN_MAX, SOFT_COST_MIN_MAX, WBS_SHARE_Z, WBS_SHARE_MIN_DEV
 
-def _ratio(a, b):
-    return (a / b) if (b and b != 0) else 0.0
+WBS_KEYS = ["civil_cost", "mechanical_cost", "electrical_cost", "automation_cost"]
+MIN_COMPARABLES = 3
+
+def _pad_groups(row_idx: np.ndarray, values: np.ndarray, n_rows: int) -> np.ndarray:
+    """Scatter long-format comparable values into a NaN-padded (n_rows, k_max, ...) block."""
+    order = np.argsort(row_idx, kind="stable")
+    row_idx = row_idx[order]
+    values = values[order]
+    counts = np.bincount(row_idx, minlength=n_rows)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    pos = np.arange(len(row_idx)) - starts[row_idx]
+    k_max = int(counts.max()) if len(counts) and counts.max() > 0 else 1
+    out = np.full((n_rows, k_max) + values.shape[1:], np.nan, dtype=float)
+    out[row_idx, pos] = values
+    return out
+
+def _review_arrays(hist_totals: np.ndarray,
+                   hist_wbs: np.ndarray,
+                   est_wbs: np.ndarray,
+                   engineering: np.ndarray,
+                   contingency: np.ndarray,
+                   total: np.ndarray,
+                   complexity: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized reviewer core.
+    hist_totals: (n, k) comparable totals, NaN-padded
+    hist_wbs:    (n, k, 4) comparable WBS costs, NaN-padded
+    est_wbs:     (n, 4) scaled WBS costs of each estimate
+    """
+    cols: Dict[str, np.ndarray] = {}
+    if hist_totals.shape[1] == 0:
+        hist_totals = np.full((len(total), 1), np.nan)
+        hist_wbs = np.full((len(total), 1, len(WBS_KEYS)), np.nan)
+
+    # Complexity modifier range
+    cmin, cmax = COMPLEXITY_MIN_MAX
+    cols["complexity_out_of_range"] = ~((complexity >= cmin) & (complexity <= cmax))
+
+    # Total vs. median of positive historical totals (rough sniff test)
+    hist_totals = np.where(hist_totals > 0, hist_totals, np.nan)
+    n_hist = np.sum(~np.isnan(hist_totals), axis=1)
+    has_hist = n_hist >= MIN_COMPARABLES
+    with np.errstate(all="ignore"):
+        med = np.where(has_hist, np.nanmedian(np.where(has_hist[:, None], hist_totals, 0.0), axis=1), np.nan)
+        ratio = np.where(has_hist & (med != 0), total / med, np.where(has_hist, 0.0, np.nan))
+    cols["n_comparables"] = n_hist.astype(np.int16)
+    cols["median_total"] = med
+    cols["total_ratio"] = ratio
+    cols["total_ratio_high"] = has_hist & (ratio > 2.0)
+    cols["total_ratio_low"] = has_hist & (ratio < 0.5)
+
+    # WBS mix: estimate shares vs. the comparables' share distribution
+    with np.errstate(all="ignore"):
+        hist_sum = np.sum(hist_wbs, axis=2, keepdims=True)
+        hist_share = np.where(hist_sum > 0, hist_wbs / hist_sum, np.nan)
+        n_share = np.sum(~np.isnan(hist_share[:, :, 0]), axis=1)
+        has_mix = n_share >= MIN_COMPARABLES
+        safe_share = np.where(has_mix[:, None, None], hist_share, 0.0)
+        share_mean = np.nanmean(safe_share, axis=1)
+        share_std = np.nanstd(safe_share, axis=1)
+        est_sum = est_wbs.sum(axis=1, keepdims=True)
+        est_share = np.where(est_sum > 0, est_wbs / est_sum, np.nan)
+        dev = np.where(has_mix[:, None], est_share - share_mean, np.nan)
+        tol = np.maximum(WBS_SHARE_Z * share_std, WBS_SHARE_MIN_DEV)
+        wbs_out = has_mix[:, None] & (np.abs(dev) > tol)
+    for j, key in enumerate(WBS_KEYS):
+        cols[f"{key.split('_')[0]}_share_dev"] = dev[:, j]
+    cols["wbs_mix_flag"] = wbs_out.any(axis=1)
+    cols["_wbs_out"] = wbs_out
+
+    # Soft costs as share of scaled WBS
+    wbs_total = est_sum[:, 0]
+    with np.errstate(all="ignore"):
+        soft = {
+            "engineering_pct": np.where(wbs_total > 0, engineering / wbs_total, np.nan),
+            "contingency_pct": np.where(wbs_total > 0, contingency / wbs_total, np.nan),
+        }
+    for key, pct in soft.items():
+        lo, hi = SOFT_COST_MIN_MAX[key]
+        cols[key] = pct
+        cols[f"{key.split('_')[0]}_out_of_range"] = (wbs_total > 0) & ~((pct >= lo - 1e-9) & (pct <= hi + 1e-9))
+
+    # One count per flag message (_flag_messages): each deviating WBS category counts.
+    flag_count = (
+        cols["complexity_out_of_range"].astype(np.int8)
+        + cols["total_ratio_high"] + cols["total_ratio_low"]
+        + wbs_out.sum(axis=1)
+        + cols["engineering_out_of_range"] + cols["contingency_out_of_range"]
+    ).astype(np.int8)
+    cols["flag_count"] = flag_count
+    cols["confidence"] = np.select([flag_count == 0, flag_count == 1], ["High", "Medium"], "Low")
+    return cols
+
+def _flag_messages(cols: Dict[str, np.ndarray], i: int, complexity: float) -> Tuple[List[str], List[str]]:
+    flags = []
+    notes = []
+    cmin, cmax = COMPLEXITY_MIN_MAX
+    if cols["complexity_out_of_range"][i]:
+        flags.append(f"Complexity modifier {complexity} outside expected range {cmin}-{cmax}.")
+    if cols["total_ratio_high"][i]:
+        flags.append("Total estimate >2x median of similars.")
+    elif cols["total_ratio_low"][i]:
+        flags.append("Total estimate <0.5x median of similars.")
+    if not np.isnan(cols["median_total"][i]):
+        notes.append(f"Median of similars: {cols['median_total'][i]:,.0f}; "
+                     f"Estimate/Median ratio: {cols['total_ratio'][i]:.2f}")
+    for j, key in enumerate(WBS_KEYS):
+        if cols["_wbs_out"][i, j]:
+            label = key.split("_")[0].title()
+            dev = cols[f"{key.split('_')[0]}_share_dev"][i]
+            flags.append(f"{label} share deviates {dev * 100:+.1f} pts from comparables' WBS mix.")
+    for key in ("engineering_pct", "contingency_pct"):
+        if cols[f"{key.split('_')[0]}_out_of_range"][i]:
+            lo, hi = SOFT_COST_MIN_MAX[key]
+            label = key.split("_")[0].title()
+            flags.append(f"{label} {cols[key][i] * 100:.1f}% outside expected range {lo * 100:.0f}-{hi * 100:.0f}%.")
+    return flags, notes
 
 def review(similar_rows: List[dict],
            scaled_result: Dict[str, Any],
            scaling_factors: Dict[str, float]) -> Dict[str, Any]:
-    flags = []
-    notes = []
+    with span("reviewer.review", comparables=len(similar_rows)) as sp:
+        out = _review_one(similar_rows, scaled_result, scaling_factors)
+        sp.set_attribute("flag_count", len(out["flags"]))
+        sp.set_attribute("confidence", out["confidence"])
+    return out
 
-    # Check complexity modifier range
-    cmin, cmax = COMPLEXITY_MIN_MAX
+def _review_one(similar_rows: List[dict],
+                scaled_result: Dict[str, Any],
+                scaling_factors: Dict[str, float]) -> Dict[str, Any]:
+    hist_totals = np.array([[float(r.get("total_cost_usd", 0.0)) for r in similar_rows]], dtype=float).reshape(1, -1)
+    hist_wbs = np.array([[[float(r.get(k, 0.0)) for k in WBS_KEYS] for r in similar_rows]], dtype=float).reshape(1, -1, 4)
+    wbs = scaled_result["scaled_wbs_costs"]
     cm = scaling_factors.get("complexity_modifier", 1.0)
-    if not (cmin <= cm <= cmax):
-        flags.append(f"Complexity modifier {cm} outside expected range {cmin}-{cmax}.")
-
-    # Compare total vs. historical totals (rough sniff test)
-    hist_totals = [float(r.get("total_cost_usd", 0.0)) for r in similar_rows if float(r.get("total_cost_usd",0.0)) > 0]
-    if len(hist_totals) >= 3:
-        med = stats.median(hist_totals)
-        ratio = _ratio(scaled_result["total_estimated_cost"], med)
-        if ratio > 2.0:
-            flags.append("Total estimate >2x median of similars.")
-        elif ratio < 0.5:
-            flags.append("Total estimate <0.5x median of similars.")
-        notes.append(f"Median of similars: {med:,.0f}; Estimate/Median ratio: {ratio:.2f}")
-
-    confidence = "High"
-    if flags:
-        confidence = "Medium" if len(flags) == 1 else "Low"
+
+    cols = _review_arrays(
+        hist_totals=hist_totals,
+        hist_wbs=hist_wbs,
+        est_wbs=np.array([[float(wbs.get(k, 0.0)) for k in WBS_KEYS]], dtype=float),
+        engineering=np.array([float(scaled_result.get("engineering_cost", 0.0))]),
+        contingency=np.array([float(scaled_result.get("contingency_cost", 0.0))]),
+        total=np.array([float(scaled_result["total_estimated_cost"])]),
+        complexity=np.array([float(cm)]),
+    )
+    flags, notes = _flag_messages(cols, 0, cm)
 
     return {
         "flags": flags,
         "notes": notes,
-        "confidence": confidence
+        "confidence": str(cols["confidence"][0])
     }
+
+def review_batch(estimates: pd.DataFrame,
+                 comparables: pd.DataFrame,
+                 group_col: str = "estimate_id") -> pd.DataFrame:
+    """
+    Review many estimates at once.
+
+    estimates: one row per estimate with `group_col`, the scaled WBS columns
+               (civil_cost, ...), engineering_cost, contingency_cost,
+               total_estimated_cost and complexity_modifier.
+    comparables: long frame of similar projects, one row per comparable,
+                 tagged with the `group_col` of the estimate it belongs to.
+
+    Returns a columnar flags table aligned with `estimates`.
+    """
+    with span("reviewer.review_batch", estimates=len(estimates), comparables=len(comparables)):
+        return _review_batch(estimates, comparables, group_col)
+
+def _review_batch(estimates: pd.DataFrame, comparables: pd.DataFrame, group_col: str) -> pd.DataFrame:
+    n = len(estimates)
+    est_ids = estimates[group_col].to_numpy() if group_col in estimates.columns else np.arange(n)
+    row_idx = pd.Index(est_ids).get_indexer(comparables[group_col].to_numpy())
+    keep = row_idx >= 0
+    row_idx = row_idx[keep]
+
+    hist_totals = _pad_groups(row_idx, comparables["total_cost_usd"].to_numpy(dtype=float)[keep], n)
+    hist_wbs = _pad_groups(row_idx, comparables[WBS_KEYS].to_numpy(dtype=float)[keep], n)
+
+    complexity = (
+        estimates["complexity_modifier"].to_numpy(dtype=float)
+        if "complexity_modifier" in estimates.columns
+        else np.ones(n)
+    )
+    cols = _review_arrays(
+        hist_totals=hist_totals,
+        hist_wbs=hist_wbs,
+        est_wbs=estimates[WBS_KEYS].to_numpy(dtype=float),
+        engineering=estimates["engineering_cost"].to_numpy(dtype=float),
+        contingency=estimates["contingency_cost"].to_numpy(dtype=float),
+        total=estimates["total_estimated_cost"].to_numpy(dtype=float),
+        complexity=complexity,
+    )
+    cols.pop("_wbs_out")
+    out = pd.DataFrame({group_col: est_ids, **cols})
+    out["confidence"] = pd.Categorical(out["confidence"], categories=["High", "Medium", "Low"])
+    return out
@@ -1,5 +1,7 @@
 from typing import Dict, Any
+import numpy as np
 from config import INFLATION_BY_YEAR, REGIONAL_INDEX
+from tracing import span
 
 def infer_inflation_factor(execution_year: int) -> float:
     # If year is in table, use it directly.
@@ -32,6 +34,14 @@ def infer_inflation_factor(execution_year: int) -> float:
 def apply_cost_scaling(base_project: dict,
                        scaling_factors: Dict[str, float],
                        soft_costs: Dict[str, float]) -> Dict[str, Any]:
+    with span("scaler.apply_cost_scaling") as sp:
+        out = _apply_cost_scaling(base_project, scaling_factors, soft_costs)
+        sp.set_attribute("applied_factor", out["applied_factor"])
+    return out
+
+def _apply_cost_scaling(base_project: dict,
+                        scaling_factors: Dict[str, float],
+                        soft_costs: Dict[str, float]) -> Dict[str, Any]:
     # Pull WBS components
     wbs_keys = ["civil_cost","mechanical_cost","electrical_cost","automation_cost"]
     base_wbs = {k: float(base_project.get(k, 0.0)) for k in wbs_keys}
@@ -63,3 +73,25 @@ def apply_cost_scaling(base_project: dict,
         "total_estimated_cost": total,
         "applied_factor": round(factor, 4)
     }
+
+def apply_cost_scaling_arrays(base_wbs: np.ndarray,
+                              factor: np.ndarray,
+                              engineering_pct,
+                              contingency_pct) -> Dict[str, np.ndarray]:
+    """
+    Vectorized apply_cost_scaling for many projects at once.
+    base_wbs is (n, 4) in civil/mechanical/electrical/automation order; factor is
+    the combined applied factor per project; soft-cost pcts are scalars or (n,).
+    Rounds like the scalar version.
+    """
+    scaled_wbs = np.round(np.asarray(base_wbs, dtype=float) * np.asarray(factor, dtype=float)[:, None], 2)
+    total_scaled_wbs = scaled_wbs.sum(axis=1)
+    engineering = np.round(total_scaled_wbs * engineering_pct, 2)
+    contingency = np.round(total_scaled_wbs * contingency_pct, 2)
+    return {
+        "scaled_wbs_costs": scaled_wbs,
+        "engineering_cost": engineering,
+        "contingency_cost": contingency,
+        "total_estimated_cost": np.round(total_scaled_wbs + engineering + contingency, 2),
+        "applied_factor": np.round(factor, 4),
+    }
@@ -0,0 +1,101 @@
+"""
+Scenario sets: several variants of one estimate, computed concurrently.
+
+Identical scenarios are computed once. Scenarios that differ only in their
+overrides (e.g. scope template) share a retrieval key and run on one thread
+with a StageCache, so retrieval and factor inference (the LLM call) happen once
+per key. Distinct keys run in parallel on a thread pool over one shared,
+read-only Retriever and EstimatorAgent, so a set takes about as long as its
+slowest retrieval key rather than the sum of all scenarios.
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from dataset import get_retriever
+from estimator_agent import EstimatorAgent
+from pipeline import StageCache, run_pipeline
+from tracing import span
+
+MAX_SCENARIOS = 6
+
+RETRIEVAL_SETTINGS = ["top_k", "strict_country", "recency_weight"]
+
+
+def _key(*parts) -> str:
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+def _run_group(retriever, estimator, scenarios: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    stages = StageCache()
+    out = []
+    for scenario in scenarios:
+        start = time.perf_counter()
+        try:
+            result = run_pipeline(retriever, estimator, scenario["request"], stages=stages,
+                                  **{"with_report": False, **scenario.get("settings", {})})
+            out.append({"result": result, "error": None})
+        except Exception as exc:
+            # One bad scenario must not take down the rest of its group.
+            out.append({"result": None, "error": str(exc)})
+        out[-1]["elapsed_ms"] = (time.perf_counter() - start) * 1000.0
+    return out
+
+
+def run_scenarios(data_path: str,
+                  scenarios: List[Dict[str, Any]],
+                  max_workers: int = MAX_SCENARIOS,
+                  regional_index: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    scenarios: list of {"name", "request", "settings"}; settings are
+    run_pipeline keyword arguments (top_k, strict_country, recency_weight,
+    overrides, quality_threshold, ...).
+
+    Returns {"scenarios": [{"name", "request", "result", "error", "elapsed_ms"}]
+    in input order, "unique": scenarios computed, "groups": retrieval keys,
+    "wall_ms": elapsed time}. A scenario that fails (no comparables, blocked by
+    the quality threshold, any other exception) carries the message in "error"
+    and result None; the other scenarios still complete.
+    """
+    start = time.perf_counter()
+    retriever = get_retriever(data_path, regional_index)
+    estimator = EstimatorAgent()
+
+    # Dedupe identical scenarios, then group the rest by retrieval key.
+    unique: Dict[str, Dict[str, Any]] = {}
+    keys = []
+    for scenario in scenarios:
+        settings = scenario.get("settings", {})
+        key = _key(scenario["request"], settings)
+        unique.setdefault(key, scenario)
+        keys.append(key)
+    groups: Dict[str, List[str]] = {}
+    for key, scenario in unique.items():
+        settings = scenario.get("settings", {})
+        retrieval_key = _key(scenario["request"], {k: settings.get(k) for k in RETRIEVAL_SETTINGS})
+        groups.setdefault(retrieval_key, []).append(key)
+
+    done: Dict[str, Dict[str, Any]] = {}
+    with span("scenarios.run", scenarios=len(scenarios), unique=len(unique), groups=len(groups)):
+        workers = max(1, min(int(max_workers), len(groups)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="capex-scenario") as pool:
+            futures = {
+                pool.submit(_run_group, retriever, estimator, [unique[k] for k in members]): members
+                for members in groups.values()
+            }
+            for future, members in futures.items():
+                try:
+                    done.update(zip(members, future.result()))
+                except Exception as exc:
+                    done.update((key, {"result": None, "error": str(exc), "elapsed_ms": 0.0}) for key in members)
+
+    return {
+        "scenarios": [
+            {"name": scenario.get("name", f"Scenario {i + 1}"), "request": scenario["request"], **done[key]}
+            for i, (scenario, key) in enumerate(zip(scenarios, keys))
+        ],
+        "unique": len(unique),
+        "groups": len(groups),
+        "wall_ms": (time.perf_counter() - start) * 1000.0,
+    }
@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config import REGIONAL_INDEX  # noqa: E402
+from estimator_agent import EstimatorAgent  # noqa: E402
+from report_writer import render_summary, write_reports, write_summary  # noqa: E402
+from retriever import Retriever  # noqa: E402
+from reviewer import review  # noqa: E402
+from scaler import apply_cost_scaling  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark tabulate vs. compiled Jinja2 report rendering.")
+    parser.add_argument("--data", default="data/synthetic_capex_projects_optionA.csv")
+    parser.add_argument("--n", type=int, default=1000, help="Reports to render per variant")
+    return parser.parse_args()
+
+
+def _sample_items(data_path: str, n: int) -> list:
+    retriever = Retriever(data_path, REGIONAL_INDEX)
+    estimator = EstimatorAgent()
+    rows = retriever.df.sample(n=min(n, len(retriever.df)), random_state=7).to_dict(orient="records")
+    items = []
+    for row in rows:
+        request = {k: row[k] for k in ["project_type", "region", "country", "capacity", "execution_year"]}
+        similar_df = retriever.find_similar(request, top_k=5)
+        base_row = similar_df.iloc[0].to_dict()
+        estimate_json = estimator.infer_factors(similar_df, request)
+        scaled = apply_cost_scaling(base_row, estimate_json["scaling_factors"], estimate_json["soft_costs"])
+        reviewer_out = review(similar_df.to_dict(orient="records"), scaled, estimate_json["scaling_factors"])
+        items.append({
+            "request": request,
+            "base_project": base_row,
+            "scaling_factors": estimate_json["scaling_factors"],
+            "scaled_result": scaled,
+            "reviewer_out": reviewer_out,
+            "reasoning_bullets": estimate_json.get("reasoning", []),
+        })
+    return items
+
+
+def _timed(label: str, n: int, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s  {n / elapsed:10,.0f} reports/s")
+    return elapsed
+
+
+def _args(item):
+    return (
+        item["request"],
+        item["base_project"],
+        item["scaling_factors"],
+        item["scaled_result"],
+        item["reviewer_out"],
+        item["reasoning_bullets"],
+    )
+
+
+def main() -> None:
+    args = parse_args()
+    # Repeat a small sample so rendering, not retrieval, dominates the benchmark.
+    sample = _sample_items(args.data, min(args.n, 200))
+    items = [dict(sample[i % len(sample)], name=f"report_{i:05d}") for i in range(args.n)]
+
+    render_summary(*_args(items[0]))  # compile templates outside the timed region
+
+    base = _timed("tabulate write_summary", args.n, lambda: [write_summary(*_args(it)) for it in items])
+    md = _timed("jinja2 markdown", args.n, lambda: [render_summary(*_args(it)) for it in items])
+    _timed("jinja2 html", args.n, lambda: [render_summary(*_args(it), fmt="html") for it in items])
+    with tempfile.TemporaryDirectory() as tmp:
+        _timed("write_reports -> zip", args.n, lambda: write_reports(items, os.path.join(tmp, "reports.zip")))
+        _timed("write_reports -> dir", args.n, lambda: write_reports(iter(items), os.path.join(tmp, "md")))
+    print(f"Speedup (markdown): {base / md:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
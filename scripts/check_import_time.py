@@ -0,0 +1,70 @@
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# (statement, modules that must not be imported, cumulative budget in ms)
+CHECKS: List[Tuple[str, List[str], float]] = [
+    ("import config", ["streamlit", "sklearn", "openai", "tabulate", "pandas"], 50.0),
+    ("import orchestrator", ["streamlit", "sklearn", "openai", "tabulate", "pandas", "numpy"], 80.0),
+    (
+        "import retriever, estimator_agent, scaler, reviewer, report_writer",
+        ["streamlit", "sklearn", "openai", "tabulate"],
+        1500.0,
+    ),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Regression check for CLI import time using -X importtime.")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Multiply every budget (slow CI machines)")
+    parser.add_argument("--runs", type=int, default=3, help="Take the best of N runs per check")
+    return parser.parse_args()
+
+
+def import_times(statement: str) -> Dict[str, float]:
+    """Return {module: cumulative_ms} for one fresh interpreter running `statement`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    out: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        try:
+            out[name.strip()] = int(cumulative.strip()) / 1000.0
+        except ValueError:
+            continue
+    return out
+
+
+def main() -> None:
+    args = parse_args()
+    failed = False
+    for statement, forbidden, budget_ms in CHECKS:
+        budget_ms *= args.budget_scale
+        runs = [import_times(statement) for _ in range(max(1, args.runs))]
+        targets = [m.strip() for m in statement.replace("import", "", 1).split(",")]
+        best_ms = min(sum(r.get(t, 0.0) for t in targets) for r in runs)
+        leaked_roots = sorted({m.split(".")[0] for m in runs[0] if m.split(".")[0] in forbidden})
+
+        ok = not leaked_roots and best_ms <= budget_ms
+        failed |= not ok
+        status = "ok" if ok else "FAIL"
+        print(f"[{status}] {statement}: {best_ms:.1f}ms (budget {budget_ms:.0f}ms)")
+        if leaked_roots:
+            print(f"       imports heavy modules: {', '.join(leaked_roots)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
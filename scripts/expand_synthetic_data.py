@@ -1,17 +1,16 @@
 import argparse
+import os
+import sys
 from dataclasses import dataclass
 from typing import Dict
 
 import numpy as np
 import pandas as pd
 
-REGIONAL_INDEX = {
-    "North America": 1.00,
-    "Europe": 1.08,
-    "Asia Pacific": 0.95,
-    "Latin America": 0.88,
-    "Middle East & Africa": 0.92,
-}
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config import REGIONAL_INDEX, REGION_COUNTRIES  # noqa: E402
+from dataset import get_dataset  # noqa: E402
 
 EXPANDED_PROJECT_TYPES = [
     "Filling Line",
@@ -32,14 +31,6 @@ REGION_TO_SITES = {
     "Middle East & Africa": ["Dubai Plant", "Johannesburg Plant", "Cairo Plant", "Riyadh Plant"],
 }
 
-REGION_TO_COUNTRIES = {
-    "North America": ["United States", "Canada", "Mexico"],
-    "Europe": ["United Kingdom", "Germany", "France", "Italy", "Poland"],
-    "Asia Pacific": ["China", "Japan", "India", "Singapore", "Australia", "Thailand"],
-    "Latin America": ["Brazil", "Mexico", "Colombia", "Peru", "Chile"],
-    "Middle East & Africa": ["United Arab Emirates", "Saudi Arabia", "South Africa", "Egypt", "Kenya"],
-}
-
 TYPE_COST_MULTIPLIER = {
     "Filling Line": 1.00,
     "Packaging Line": 0.95,
@@ -53,7 +44,7 @@ TYPE_COST_MULTIPLIER = {
 
 COUNTRY_TO_REGION = {
     country: region
-    for region, countries in REGION_TO_COUNTRIES.items()
+    for region, countries in REGION_COUNTRIES.items()
     for country in countries
 }
 
@@ -136,7 +127,7 @@ def _make_row(template: pd.Series, year: int, serial: int, rng: np.random.Genera
     project_type = str(template["project_type"])
     region = str(template["region"])
     site = str(template["site"])
-    country = str(template.get("country", rng.choice(REGION_TO_COUNTRIES.get(region, ["United States"]))))
+    country = str(template.get("country", rng.choice(REGION_COUNTRIES.get(region, ["United States"]))))
 
     # Broaden type and geography coverage for future catalog.
     if float(rng.random()) < 0.45:
@@ -144,7 +135,7 @@ def _make_row(template: pd.Series, year: int, serial: int, rng: np.random.Genera
     if float(rng.random()) < 0.40:
         region = str(rng.choice(list(REGIONAL_INDEX.keys())))
         site = str(rng.choice(REGION_TO_SITES[region]))
-        country = str(rng.choice(REGION_TO_COUNTRIES[region]))
+        country = str(rng.choice(REGION_COUNTRIES[region]))
 
     base_capacity = float(template["capacity"])
     new_capacity = _capacity_from_template(base_capacity, rng)
@@ -158,7 +149,7 @@ def _make_row(template: pd.Series, year: int, serial: int, rng: np.random.Genera
     if float(rng.random()) < 0.08:
         region = str(rng.choice(list(REGIONAL_INDEX.keys())))
         site = str(rng.choice(REGION_TO_SITES[region]))
-        country = str(rng.choice(REGION_TO_COUNTRIES[region]))
+        country = str(rng.choice(REGION_COUNTRIES[region]))
     region_factor = _safe_ratio(REGIONAL_INDEX.get(region, 1.0), REGIONAL_INDEX.get(str(template["region"]), 1.0))
     type_factor = TYPE_COST_MULTIPLIER.get(project_type, 1.0) / TYPE_COST_MULTIPLIER.get(str(template["project_type"]), 1.0)
 
@@ -229,7 +220,7 @@ def _ensure_catalog_coverage(
             row["region"] = region
             row["project_type"] = ptype
             row["site"] = str(rng.choice(REGION_TO_SITES[region]))
-            row["country"] = str(rng.choice(REGION_TO_COUNTRIES[region]))
+            row["country"] = str(rng.choice(REGION_COUNTRIES[region]))
             rows.append(row)
             serial += 1
 
@@ -320,17 +311,19 @@ def main() -> None:
     cfg = parse_args()
     rng = np.random.default_rng(cfg.seed)
 
-    df = pd.read_csv(cfg.input_csv)
+    dataset = get_dataset(cfg.input_csv)
+    # The shared frame is read-only; the generator backfills countries in place.
+    df = dataset.frame.copy()
     if "country" not in df.columns:
-        df["country"] = df["region"].apply(lambda r: str(rng.choice(REGION_TO_COUNTRIES.get(str(r), ["United States"]))))
+        df["country"] = df["region"].apply(lambda r: str(rng.choice(REGION_COUNTRIES.get(str(r), ["United States"]))))
     else:
         missing_country = df["country"].isna() | (df["country"].astype(str).str.strip() == "")
         if missing_country.any():
             df.loc[missing_country, "country"] = df.loc[missing_country, "region"].apply(
-                lambda r: str(rng.choice(REGION_TO_COUNTRIES.get(str(r), ["United States"])))
+                lambda r: str(rng.choice(REGION_COUNTRIES.get(str(r), ["United States"])))
             )
 
-    max_year = int(df["execution_year"].max())
+    max_year = dataset.year_range[1]
     if cfg.end_year <= max_year and cfg.ensure_country_rows <= 0:
         df.to_csv(cfg.output_csv, index=False)
         print("Backfilled country column where needed.")
@@ -0,0 +1,100 @@
+import argparse
+import glob
+import json
+import math
+import sys
+from collections import defaultdict
+from typing import Dict, Iterator, List
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Aggregate span JSONL traces into per-stage latency percentiles.")
+    parser.add_argument("paths", nargs="+", help="Trace files; rotated siblings (file.1, ...) and pool-worker files (file.w<pid>) are included")
+    parser.add_argument("--by", default=None, help="Also split each stage by this span attribute (e.g. candidate_scope)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser.parse_args()
+
+
+def _attr_value(value: Dict) -> object:
+    for key in ("stringValue", "boolValue", "doubleValue"):
+        if key in value:
+            return value[key]
+    if "intValue" in value:
+        return int(value["intValue"])
+    return None
+
+
+def iter_spans(paths: List[str]) -> Iterator[Dict]:
+    files: List[str] = []
+    for path in paths:
+        # The base file may be absent when only pool workers wrote spans.
+        files += sorted(glob.glob(path + ".*"), reverse=True) + glob.glob(path)
+    for file in files:
+        with open(file, encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                for rs in record.get("resourceSpans", []):
+                    for ss in rs.get("scopeSpans", []):
+                        for sp in ss.get("spans", []):
+                            yield {
+                                "name": sp["name"],
+                                "duration_ms": (int(sp["endTimeUnixNano"]) - int(sp["startTimeUnixNano"])) / 1e6,
+                                "error": sp.get("status", {}).get("code") == 2,
+                                "attributes": {a["key"]: _attr_value(a["value"]) for a in sp.get("attributes", [])},
+                            }
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def main() -> None:
+    args = parse_args()
+    groups: Dict[tuple, List[float]] = defaultdict(list)
+    errors: Dict[tuple, int] = defaultdict(int)
+    for sp in iter_spans(args.paths):
+        key = (sp["name"],) if args.by is None else (sp["name"], str(sp["attributes"].get(args.by, "-")))
+        groups[key].append(sp["duration_ms"])
+        errors[key] += int(sp["error"])
+
+    report = []
+    for key in sorted(groups):
+        values = sorted(groups[key])
+        report.append({
+            "stage": key[0],
+            **({args.by: key[1]} if args.by else {}),
+            "count": len(values),
+            "errors": errors[key],
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "max_ms": values[-1],
+        })
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+
+    label = f"{'Stage':<30}" + (f"{args.by:<18}" if args.by else "")
+    print(f"{label}{'Count':>8}{'Err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for row in report:
+        group = f"{str(row[args.by]):<18}" if args.by else ""
+        print(
+            f"{row['stage']:<30}{group}{row['count']:>8}{row['errors']:>6}"
+            f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['max_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,19 @@
+import time
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 
-from retriever import Retriever
+from dataset import get_dataset, get_retriever, watch_dataset
+from estimate_store import estimate_id, get_store
 from estimator_agent import EstimatorAgent
-from scaler import apply_cost_scaling
-from reviewer import review
-from report_writer import write_summary
+from pipeline import NoComparablesError, QualityBelowThresholdError, StageCache, StageTimer, run_pipeline
+from prefetch import get_prefetcher, neighbour_requests
+from profiling import profiled, profiling_enabled
+from retriever import select_scope
+from scenarios import MAX_SCENARIOS, run_scenarios
+from exporter import EXPORT_COLUMNS, flatten_estimate
 from config import REGIONAL_INDEX, REGION_COUNTRIES
 
 # Demo mode: AI link disabled to force deterministic fallback.
@@ -35,13 +41,13 @@ def wbs_core_keys() -> list[str]:
     return ["civil_cost", "mechanical_cost", "electrical_cost", "automation_cost"]
 
 
-def capacity_settings_for_type(dataframe: pd.DataFrame, selected_type: str):
-    subset = dataframe[dataframe["project_type"] == selected_type]["capacity"].dropna().astype(float)
-    if subset.empty:
+def capacity_settings_for_type(capacity_ranges: dict, selected_type: str):
+    stats = capacity_ranges.get(selected_type)
+    if not stats:
         return 100, 2000, 400, 50
 
-    raw_min = float(subset.min())
-    raw_max = float(subset.max())
+    raw_min = float(stats["min"])
+    raw_max = float(stats["max"])
     span = max(1.0, raw_max - raw_min)
 
     cap_min = int(max(50, np.floor((raw_min - 0.10 * span) / 25) * 25))
@@ -56,7 +62,7 @@ def capacity_settings_for_type(dataframe: pd.DataFrame, selected_type: str):
     else:
         step = 50
 
-    default = int(np.clip(np.median(subset), cap_min, cap_max))
+    default = int(np.clip(stats["median"], cap_min, cap_max))
     default = int(round(default / step) * step)
     default = min(max(default, cap_min), cap_max)
 
@@ -343,6 +349,9 @@ def executive_summary_snapshot(request: dict, scaled: dict, reviewer_out: dict,
     st.markdown("</div>", unsafe_allow_html=True)
 
 
+SCOPE_TEMPLATES = ["Balanced Baseline", "Greenfield", "Brownfield Tie-in", "GMP Retrofit"]
+
+
 def scope_defaults(scope_template: str) -> dict:
     presets = {
         "Balanced Baseline": {"complexity": 1.05, "engineering_pct": 0.08, "contingency_pct": 0.10},
@@ -357,20 +366,6 @@ def complexity_by_level(level: str) -> float:
     return {"Low": 1.00, "Normal": 1.08, "High": 1.16}.get(level, 1.08)
 
 
-def estimate_ranges(total_cost: float, similar_df: pd.DataFrame, contingency_pct: float) -> dict:
-    hist = similar_df["total_cost_usd"].astype(float)
-    med = float(np.median(hist)) if len(hist) else max(1.0, total_cost)
-    std = float(np.std(hist)) if len(hist) else 0.0
-    cv = std / med if med else 0.0
-    uncertainty = float(np.clip(0.10 + cv * 0.35 + contingency_pct * 0.35, 0.08, 0.45))
-    return {
-        "p50": round(total_cost, 2),
-        "p80": round(total_cost * (1.0 + 0.45 * uncertainty), 2),
-        "p90": round(total_cost * (1.0 + 0.85 * uncertainty), 2),
-        "uncertainty": round(uncertainty, 4),
-    }
-
-
 def build_plot_theme(mode: str) -> dict:
     if mode == "Dark":
         return {
@@ -391,258 +386,276 @@ def build_plot_theme(mode: str) -> dict:
     }
 
 
-@st.cache_data
-def load_data(path: str) -> pd.DataFrame:
-    return pd.read_csv(path)
-
-
-# ---------- DATA ----------
-DATA_PATH = "data/synthetic_capex_projects_optionA.csv"
-df = load_data(DATA_PATH)
-project_types = sorted(df["project_type"].unique())
-regions = sorted(df["region"].unique())
-year_min = int(df["execution_year"].min())
-year_max = int(df["execution_year"].max())
-
-
-# ---------- SIDEBAR ----------
-st.sidebar.markdown("### Estimation Controls")
-if hasattr(st.sidebar, "segmented_control"):
-    appearance = st.sidebar.segmented_control(
-        "Theme",
-        options=["Light", "Dark"],
-        default="Light",
+def scenario_seed_rows(region: str, country: str, capacity: float, execution_year: int, scope_template: str) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {
+                "Scenario": "Base",
+                "Region": region,
+                "Country": country,
+                "Capacity": float(capacity),
+                "Execution Year": int(execution_year),
+                "Scope Template": scope_template,
+            },
+            {
+                "Scenario": "Alternative Scope",
+                "Region": region,
+                "Country": country,
+                "Capacity": float(capacity),
+                "Execution Year": int(execution_year),
+                "Scope Template": next(t for t in SCOPE_TEMPLATES if t != scope_template),
+            },
+        ]
     )
-else:
-    appearance = st.sidebar.radio("Theme", options=["Light", "Dark"], horizontal=True)
-inject_theme(appearance)
-plot_theme = build_plot_theme(appearance)
 
-project_type = st.sidebar.selectbox("Project Type", project_types)
-region = st.sidebar.selectbox("Region", regions)
-countries = REGION_COUNTRIES.get(
-    region,
-    sorted(df[df["region"] == region]["country"].dropna().unique().tolist()),
-)
-country = st.sidebar.selectbox("Country", countries)
-cap_min, cap_max, cap_default, cap_step = capacity_settings_for_type(df, project_type)
-capacity = st.sidebar.slider("Capacity / Throughput", cap_min, cap_max, cap_default, step=cap_step)
-execution_year_default = min(max(2022, year_min), year_max)
-execution_year = st.sidebar.slider("Execution Year", year_min, year_max, execution_year_default)
 
-st.sidebar.markdown("#### Scope & Assumptions")
-scope_template = st.sidebar.selectbox(
-    "Scope Template",
-    ["Balanced Baseline", "Greenfield", "Brownfield Tie-in", "GMP Retrofit"],
-    index=0,
-)
-scope_seed = scope_defaults(scope_template)
+# Shared across sessions: identical estimates are computed once per dataset
+# version and kept once in the bounded estimate store (estimate_store.py);
+# sessions only hold the estimate id. Scenario comparisons are cached
+# separately by cached_scenarios, bounded here.
+SCENARIO_CACHE_ENTRIES = 512
+SCENARIO_CACHE_TTL_S = 6 * 60 * 60
 
-complexity_level = st.sidebar.selectbox("Complexity Level", ["Low", "Normal", "High"], index=1)
-manual_complexity = st.sidebar.toggle("Override Complexity Factor", value=False)
-complexity_override = st.sidebar.slider("Complexity Factor", 0.95, 1.25, float(scope_seed["complexity"]), 0.01)
-complexity_target = complexity_override if manual_complexity else complexity_by_level(complexity_level)
 
-inflation_mode = st.sidebar.radio("Inflation Mode", ["Auto (from years)", "Manual (%)"], horizontal=False)
-manual_inflation_pct = st.sidebar.slider("Manual Inflation (%)", -5.0, 12.0, 3.0, 0.1)
+def compute_estimate(data_path: str, request: dict, timer=None, stages=None, **settings) -> dict:
+    if timer is None:
+        retriever = get_retriever(data_path, REGIONAL_INDEX)
+    else:
+        with timer.stage("load_data"):
+            retriever = get_retriever(data_path, REGIONAL_INDEX)
+    result = run_pipeline(retriever, EstimatorAgent(), request, timer=timer, stages=stages, **settings)
+    result["computed_at"] = time.time()
+    return result
 
-engineering_pct = st.sidebar.slider(
-    "Engineering (%)",
-    5.0,
-    15.0,
-    float(scope_seed["engineering_pct"]) * 100.0,
-    0.5,
-)
-contingency_pct = st.sidebar.slider(
-    "Contingency (%)",
-    5.0,
-    25.0,
-    float(scope_seed["contingency_pct"]) * 100.0,
-    0.5,
-)
 
-st.sidebar.markdown("#### Comparable Selection")
-country_mode = st.sidebar.radio(
-    "Country Strictness",
-    ["Country-first with fallback", "Strict country only"],
-    index=0,
-)
-top_k = st.sidebar.slider("Comparable Count (top_k)", 3, 10, 5, 1)
-recency_weight_pct = st.sidebar.slider("Recency Weight (%)", 0, 100, 35, 5)
-compare_toggle = st.sidebar.toggle("Benchmark vs. median similar projects", value=True)
+def estimate_record(result: dict) -> dict:
+    # What every session rendering this estimate shares; per-run details
+    # (timings, reused stages, sidebar controls) stay in the session.
+    return {
+        "request": result["request"],
+        "similar_df": result["similar_df"],
+        # Show the factors actually applied (after user overrides) alongside the model output.
+        "estimate_json": {
+            **result["estimate_json"],
+            "scaling_factors": result["scaling_factors"],
+            "soft_costs": result["soft_costs"],
+        },
+        "scaled": result["scaled"],
+        "reviewer_out": result["reviewer_out"],
+        "report_md": result["report_md"],
+        "project_type": result["request"]["project_type"],
+        "country": result["request"].get("country"),
+        "retrieval_meta": result["retrieval_meta"],
+        "quality_score": result["quality_score"],
+        "ranges": result["ranges"],
+    }
 
-st.sidebar.markdown("#### Quality Threshold")
-confidence_threshold = st.sidebar.slider("Minimum Comparable Quality Score", 40, 95, 60, 1)
-threshold_action = st.sidebar.radio("When below threshold", ["Warn only", "Block estimate"], index=0)
 
-st.sidebar.markdown("#### Assumptions Snapshot")
-assumption_lines = [
-    f"- Scope: `{scope_template}`",
-    f"- Complexity factor target: `{complexity_target:.2f}`",
-    f"- Inflation: `{'Auto' if inflation_mode.startswith('Auto') else f'{manual_inflation_pct:.1f}% manual'}`",
-    f"- Engineering / Contingency: `{engineering_pct:.1f}% / {contingency_pct:.1f}%`",
-    f"- Retrieval: `{'Strict country' if country_mode.startswith('Strict') else 'Country-first fallback'}`, top_k `{top_k}`",
-    f"- Recency weight: `{recency_weight_pct}%`",
-    f"- Quality threshold: `{confidence_threshold}` ({threshold_action})",
-]
-st.sidebar.caption("\n".join(assumption_lines))
+def stored_estimate(data_path: str, fingerprint: str, request: dict, timer=None, stages=None, **settings):
+    """
+    Returns (estimate id, stages reused, served from the store). The dataset
+    fingerprint is part of the id, so a changed data file misses the store.
+    With a timer (profiling), the estimate is always recomputed.
+    """
+    store = get_store()
+    key = estimate_id(fingerprint, request, settings)
+    if timer is None and store.get(key) is not None:
+        return key, [], True
+    result = compute_estimate(data_path, request, timer=timer, stages=stages, **settings)
+    store.put(key, estimate_record(result))
+    return key, result["stages_reused"], False
+
+
+def prefetch_task(data_path: str, fingerprint: str, request: dict, settings: dict):
+    # Deterministic estimates are prefetched whole and seed the store. With AI
+    # inference on, only retrieval is warmed: the model call stays on the
+    # request path so the store never holds a fallback result for an AI request.
+    if EstimatorAgent().client is None:
+        return estimate_id(fingerprint, request, settings), lambda: estimate_record(
+            compute_estimate(data_path, request, **settings)
+        )
 
-run_estimate = st.sidebar.button("Run Estimate", type="primary", use_container_width=True)
+    def warm_retrieval():
+        get_retriever(data_path, REGIONAL_INDEX).find_similar(
+            request,
+            top_k=settings["top_k"],
+            strict_country=settings["strict_country"],
+            recency_weight=settings["recency_weight"],
+        )
 
+    return None, warm_retrieval
 
-# ---------- HERO ----------
-st.markdown(
-    """
-    <div class="hero">
-      <h1>AI Project Cost Estimator</h1>
-      <p>Executive-grade CAPEX estimation for manufacturing projects with AI-assisted scaling, benchmark comparators, and risk-aware confidence checks.</p>
-    </div>
-    """,
-    unsafe_allow_html=True,
-)
 
+@st.cache_data(max_entries=SCENARIO_CACHE_ENTRIES, ttl=SCENARIO_CACHE_TTL_S, show_spinner=False)
+def cached_scenarios(data_path: str, fingerprint: str, scenarios: list) -> dict:
+    result = run_scenarios(data_path, scenarios)
+    result["computed_at"] = time.time()
+    return result
 
-# ---------- ESTIMATION ----------
-if "estimate_payload" not in st.session_state:
-    st.session_state["estimate_payload"] = None
 
-if run_estimate:
-    request = {
-        "project_type": project_type,
-        "region": region,
-        "country": country,
-        "capacity": capacity,
-        "execution_year": execution_year,
-    }
+def region_countries(present: list, region: str) -> list:
+    # Only countries present in the data; REGION_COUNTRIES sets their order
+    # where it lists them, the rest follow alphabetically.
+    listed = [c for c in REGION_COUNTRIES.get(region, []) if c in present]
+    return listed + [c for c in present if c not in listed]
 
-    retriever = Retriever(DATA_PATH, REGIONAL_INDEX)
-    similar_df, retrieval_meta = retriever.find_similar(
-        request,
-        top_k=top_k,
-        strict_country=country_mode.startswith("Strict"),
-        recency_weight=recency_weight_pct / 100.0,
-        return_meta=True,
-    )
-
-    if similar_df.empty:
-        st.error("No comparable projects were found for this request. Try broader inputs.")
-        st.stop()
 
-    quality_score = float(retrieval_meta.get("comparable_quality", 0.0))
-    if quality_score < float(confidence_threshold) and threshold_action.startswith("Block"):
-        st.error(
-            f"Comparable quality score is {quality_score:.1f}, below threshold {confidence_threshold}. "
-            "Relax filters or lower threshold."
-        )
-        st.stop()
+@st.cache_resource(max_entries=4, show_spinner=False)
+def sidebar_index(data_path: str, fingerprint: str) -> dict:
+    # Built once per dataset version and shared by every session and rerun,
+    # so populating the sidebar is a few dict lookups.
+    dataset = get_dataset(data_path)
+    return {
+        "project_types": dataset.project_types,
+        "regions": dataset.regions,
+        "year_range": dataset.year_range,
+        "countries_by_region": {
+            region: region_countries(dataset.countries_by_region.get(region, []), region)
+            for region in dataset.regions
+        },
+        "capacity": {
+            ptype: {**stats, "slider": capacity_settings_for_type(dataset.capacity_ranges, ptype)}
+            for ptype, stats in dataset.capacity_ranges.items()
+        },
+        "pool_sizes": dataset.pool_sizes,
+    }
 
-    base_row = similar_df.iloc[0].to_dict()
 
-    spinner_msg = (
-        "Generating AI-informed scaling factors..."
-        if OPENAI_API_KEY
-        else "OPENAI_API_KEY missing, using deterministic fallback heuristics..."
+@st.cache_resource
+def start_data_watcher(path: str):
+    # One background reloader per process: when the file changes, the shared
+    # dataset and Retriever are rebuilt off the request path.
+    return watch_dataset(path)
+
+
+# ---------- RESULT SECTIONS ----------
+# Each section is an st.fragment, so its own widgets (benchmark toggle,
+# expanders, downloads) rerun only that section. Figures are memoized per
+# payload id and theme, so full-page reruns (sidebar changes) reuse them.
+def memo_figure(name: str, payload: dict, theme: str, build):
+    memo = st.session_state.setdefault("figure_memo", {})
+    key = (name, payload["id"], theme)
+    fig = memo.get(key)
+    if fig is None:
+        # Keep only the current payload's figures.
+        for stale in [k for k in memo if k[1] != payload["id"]]:
+            del memo[stale]
+        fig = memo[key] = build()
+    return fig
+
+
+def style_figure(fig, plot_theme: dict, **layout):
+    fig.update_layout(
+        margin=dict(t=18, l=8, r=8, b=8),
+        paper_bgcolor=plot_theme["paper_bgcolor"],
+        plot_bgcolor=plot_theme["plot_bgcolor"],
+        font=dict(color=plot_theme["font_color"]),
+        **layout,
     )
+    return fig
 
-    with st.spinner(spinner_msg):
-        estimator = EstimatorAgent()
-        estimate_json = estimator.infer_factors(similar_df, request)
-
-    scaling_factors = estimate_json["scaling_factors"]
-    soft_costs = estimate_json["soft_costs"]
-    reasoning = estimate_json.get("reasoning", [])
-    estimate_mode = estimate_json.get("meta", {}).get("mode", "ai")
-
-    # User assumption overrides for practical planning workflows.
-    scaling_factors["complexity_modifier"] = round(float(complexity_target), 4)
-    soft_costs["engineering_pct"] = round(float(engineering_pct) / 100.0, 4)
-    soft_costs["contingency_pct"] = round(float(contingency_pct) / 100.0, 4)
-    if inflation_mode.startswith("Manual"):
-        year_delta = int(execution_year) - int(base_row.get("execution_year", execution_year))
-        scaling_factors["inflation_factor"] = round((1.0 + float(manual_inflation_pct) / 100.0) ** year_delta, 4)
-        reasoning = list(reasoning) + [
-            f"Manual inflation override applied at {manual_inflation_pct:.1f}% over {year_delta} years."
-        ]
-    else:
-        reasoning = list(reasoning) + ["Inflation factor derived automatically from execution-year tables."]
 
-    scaled = apply_cost_scaling(base_row, scaling_factors, soft_costs)
+def wbs_frame(scaled: dict) -> pd.DataFrame:
     wbs = scaled["scaled_wbs_costs"]
-    ranges = estimate_ranges(scaled["total_estimated_cost"], similar_df, soft_costs["contingency_pct"])
-
-    reviewer_out = review(similar_df.to_dict(orient="records"), scaled, scaling_factors)
-    if quality_score < float(confidence_threshold):
-        reviewer_out["flags"] = reviewer_out.get("flags", []) + [
-            f"Comparable quality {quality_score:.1f} is below threshold {confidence_threshold}."
-        ]
-    if reviewer_out.get("flags"):
-        reviewer_out["confidence"] = "Medium" if len(reviewer_out["flags"]) == 1 else "Low"
-    reviewer_out["notes"] = reviewer_out.get("notes", []) + [
-        f"Retrieval scope: {retrieval_meta.get('candidate_scope', 'unknown')} from pool size {retrieval_meta.get('candidate_count', 0)}.",
-        f"Comparable quality score: {quality_score:.1f}/100.",
-    ]
-    report_md = write_summary(request, base_row, scaling_factors, scaled, reviewer_out, reasoning)
-
-    st.session_state["estimate_payload"] = {
-        "request": request,
-        "similar_df": similar_df,
-        "estimate_json": estimate_json,
-        "scaled": scaled,
-        "reviewer_out": reviewer_out,
-        "report_md": report_md,
-        "project_type": project_type,
-        "country": country,
-        "plot_theme": plot_theme,
-        "retrieval_meta": retrieval_meta,
-        "quality_score": quality_score,
-        "ranges": ranges,
-        "controls": {
-            "scope_template": scope_template,
-            "complexity_level": complexity_level,
-            "manual_complexity": manual_complexity,
-            "complexity_override": complexity_override,
-            "inflation_mode": inflation_mode,
-            "manual_inflation_pct": manual_inflation_pct,
-            "engineering_pct": engineering_pct,
-            "contingency_pct": contingency_pct,
-            "country_mode": country_mode,
-            "top_k": top_k,
-            "recency_weight_pct": recency_weight_pct,
-            "confidence_threshold": confidence_threshold,
-            "threshold_action": threshold_action,
-        },
-    }
+    wbs_df = pd.DataFrame(
+        [
+            ["Civil", wbs["civil_cost"]],
+            ["Mechanical", wbs["mechanical_cost"]],
+            ["Electrical", wbs["electrical_cost"]],
+            ["Automation", wbs["automation_cost"]],
+            ["Engineering", scaled["engineering_cost"]],
+            ["Contingency", scaled["contingency_cost"]],
+        ],
+        columns=["Category", "Cost"],
+    )
+    wbs_df["Cost (USD, M)"] = wbs_df["Cost"] / 1_000_000
+    return wbs_df
+
+
+def build_wbs_bar(payload: dict, theme: str):
+    plot_theme = build_plot_theme(theme)
+    bar_fig = px.bar(
+        wbs_frame(payload["scaled"]),
+        x="Category",
+        y="Cost (USD, M)",
+        text="Cost (USD, M)",
+        color="Category",
+        color_discrete_sequence=plot_theme["colors"],
+    )
+    bar_fig.update_traces(texttemplate="%{text:,.2f}", textposition="outside")
+    style_figure(bar_fig, plot_theme, yaxis_title="USD (Millions)", xaxis_title=None, showlegend=False)
+    bar_fig.update_yaxes(gridcolor=plot_theme["gridcolor"])
+    return bar_fig
+
+
+def build_wbs_pie(payload: dict, theme: str):
+    plot_theme = build_plot_theme(theme)
+    pie_fig = px.pie(
+        wbs_frame(payload["scaled"]),
+        names="Category",
+        values="Cost",
+        hole=0.54,
+        color="Category",
+        color_discrete_sequence=plot_theme["colors"],
+    )
+    pie_fig.update_traces(textposition="inside", textinfo="percent")
+    return style_figure(pie_fig, plot_theme, legend_title_text=None)
 
-payload = st.session_state.get("estimate_payload")
 
-if payload:
-    request = payload["request"]
+def build_benchmark(payload: dict, theme: str):
+    plot_theme = build_plot_theme(theme)
     similar_df = payload["similar_df"]
-    estimate_json = payload["estimate_json"]
-    scaling_factors = estimate_json.get("scaling_factors", {})
+    wbs = payload["scaled"]["scaled_wbs_costs"]
+    med_core = {}
+    for k in wbs_core_keys():
+        med_core[k] = float(np.median(similar_df[k].astype(float)))
+
+    comp_df = pd.DataFrame(
+        {
+            "Category": ["Civil", "Mechanical", "Electrical", "Automation"],
+            "Estimated (USD, M)": [
+                wbs["civil_cost"] / 1_000_000,
+                wbs["mechanical_cost"] / 1_000_000,
+                wbs["electrical_cost"] / 1_000_000,
+                wbs["automation_cost"] / 1_000_000,
+            ],
+            "Median of Similars (USD, M)": [
+                med_core["civil_cost"] / 1_000_000,
+                med_core["mechanical_cost"] / 1_000_000,
+                med_core["electrical_cost"] / 1_000_000,
+                med_core["automation_cost"] / 1_000_000,
+            ],
+        }
+    )
+    long_df = comp_df.melt(id_vars="Category", var_name="Series", value_name="USD (Millions)")
+    cmp_fig = px.bar(
+        long_df,
+        x="Category",
+        y="USD (Millions)",
+        color="Series",
+        barmode="group",
+        color_discrete_sequence=[plot_theme["accent"], "#94a3b8"],
+    )
+    style_figure(cmp_fig, plot_theme, yaxis_title="USD (Millions)", xaxis_title=None, legend_title_text=None)
+    cmp_fig.update_layout(margin=dict(t=20, l=8, r=8, b=8))
+    cmp_fig.update_yaxes(gridcolor=plot_theme["gridcolor"])
+    return cmp_fig
+
+
+@st.fragment
+def kpi_section(payload: dict):
     scaled = payload["scaled"]
-    reviewer_out = payload["reviewer_out"]
-    report_md = payload["report_md"]
-    project_type = payload["project_type"]
-    country = payload["country"]
+    ranges = payload.get("ranges", {})
     retrieval_meta = payload.get("retrieval_meta", {})
     quality_score = float(payload.get("quality_score", 0.0))
-    ranges = payload.get("ranges", {})
-    controls = payload.get("controls", {})
-    wbs = scaled["scaled_wbs_costs"]
-    estimate_mode = estimate_json.get("meta", {}).get("mode", "ai")
-
-    # ---------- KPI ROW ----------
+    estimate_mode = payload["estimate_json"].get("meta", {}).get("mode", "ai")
     total_cost = scaled["total_estimated_cost"]
-    engineering_share = (scaled["engineering_cost"] / total_cost * 100) if total_cost else 0
-    contingency_share = (scaled["contingency_cost"] / total_cost * 100) if total_cost else 0
-
-    confidence = reviewer_out.get("confidence", "-unknown-")
-    similar_count = len(similar_df)
+    confidence = payload["reviewer_out"].get("confidence", "-unknown-")
+    similar_count = len(payload["similar_df"])
 
     c1, c2, c3, c4 = st.columns(4)
     with c1:
-        kpi_card("Total Estimated CAPEX", fmt_millions(total_cost), f"{project_type} in {country}")
+        kpi_card("Total Estimated CAPEX", fmt_millions(total_cost), f"{payload['project_type']} in {payload['country']}")
     with c2:
         kpi_card("Confidence", str(confidence).title(), f"Based on {similar_count} comparable projects")
     with c3:
@@ -657,8 +670,19 @@ if payload:
         st.warning("AI estimator unavailable for this run. Deterministic fallback heuristics were used.")
     else:
         st.success("Estimate generated using AI-assisted scaling + deterministic cost engine.")
+    if payload.get("prefetched"):
+        st.caption("Prefetched in the background after your previous estimate.")
+    elif payload.get("from_cache"):
+        st.caption("Served from the shared estimate cache (same request, settings and dataset version).")
+    elif payload.get("stages_reused"):
+        st.caption(f"Reused unchanged stages: {', '.join(payload['stages_reused'])}.")
+
 
-    # ---------- MAIN GRID ----------
+@st.fragment
+def wbs_section(payload: dict, theme: str):
+    similar_df = payload["similar_df"]
+    scaled = payload["scaled"]
+    wbs = scaled["scaled_wbs_costs"]
     left, right = st.columns([1.15, 1.0], gap="large")
 
     with left:
@@ -705,106 +729,35 @@ if payload:
         st.table(tb[["Category", "Cost (USD, M)"]])
 
     with right:
-        wbs_df = pd.DataFrame(
-            [
-                ["Civil", wbs["civil_cost"]],
-                ["Mechanical", wbs["mechanical_cost"]],
-                ["Electrical", wbs["electrical_cost"]],
-                ["Automation", wbs["automation_cost"]],
-                ["Engineering", scaled["engineering_cost"]],
-                ["Contingency", scaled["contingency_cost"]],
-            ],
-            columns=["Category", "Cost"],
-        )
-        wbs_df["Cost (USD, M)"] = wbs_df["Cost"] / 1_000_000
-
         st.markdown('<div class="panel-title">Cost Breakdown by Category (USD, Millions)</div>', unsafe_allow_html=True)
-        bar_fig = px.bar(
-            wbs_df,
-            x="Category",
-            y="Cost (USD, M)",
-            text="Cost (USD, M)",
-            color="Category",
-            color_discrete_sequence=plot_theme["colors"],
-        )
-        bar_fig.update_traces(texttemplate="%{text:,.2f}", textposition="outside")
-        bar_fig.update_layout(
-            yaxis_title="USD (Millions)",
-            xaxis_title=None,
-            showlegend=False,
-            margin=dict(t=18, l=8, r=8, b=8),
-            paper_bgcolor=plot_theme["paper_bgcolor"],
-            plot_bgcolor=plot_theme["plot_bgcolor"],
-            font=dict(color=plot_theme["font_color"]),
-        )
-        bar_fig.update_yaxes(gridcolor=plot_theme["gridcolor"])
-        st.plotly_chart(bar_fig, width="stretch")
+        st.plotly_chart(memo_figure("wbs_bar", payload, theme, lambda: build_wbs_bar(payload, theme)), width="stretch")
 
         st.markdown('<div class="panel-title">Cost Composition Share</div>', unsafe_allow_html=True)
-        pie_fig = px.pie(
-            wbs_df,
-            names="Category",
-            values="Cost",
-            hole=0.54,
-            color="Category",
-            color_discrete_sequence=plot_theme["colors"],
-        )
-        pie_fig.update_traces(textposition="inside", textinfo="percent")
-        pie_fig.update_layout(
-            margin=dict(t=18, l=8, r=8, b=8),
-            paper_bgcolor=plot_theme["paper_bgcolor"],
-            plot_bgcolor=plot_theme["plot_bgcolor"],
-            font=dict(color=plot_theme["font_color"]),
-            legend_title_text=None,
-        )
-        st.plotly_chart(pie_fig, width="stretch")
+        st.plotly_chart(memo_figure("wbs_pie", payload, theme, lambda: build_wbs_pie(payload, theme)), width="stretch")
 
-    # ---------- BENCHMARK ----------
-    if compare_toggle:
-        st.markdown('<div class="panel-title section-space">Benchmark: Median of Similar Projects (Core WBS)</div>', unsafe_allow_html=True)
-        med_core = {}
-        for k in wbs_core_keys():
-            med_core[k] = float(np.median(similar_df[k].astype(float)))
 
-        comp_df = pd.DataFrame(
-            {
-                "Category": ["Civil", "Mechanical", "Electrical", "Automation"],
-                "Estimated (USD, M)": [
-                    wbs["civil_cost"] / 1_000_000,
-                    wbs["mechanical_cost"] / 1_000_000,
-                    wbs["electrical_cost"] / 1_000_000,
-                    wbs["automation_cost"] / 1_000_000,
-                ],
-                "Median of Similars (USD, M)": [
-                    med_core["civil_cost"] / 1_000_000,
-                    med_core["mechanical_cost"] / 1_000_000,
-                    med_core["electrical_cost"] / 1_000_000,
-                    med_core["automation_cost"] / 1_000_000,
-                ],
-            }
-        )
-        long_df = comp_df.melt(id_vars="Category", var_name="Series", value_name="USD (Millions)")
-        cmp_fig = px.bar(
-            long_df,
-            x="Category",
-            y="USD (Millions)",
-            color="Series",
-            barmode="group",
-            color_discrete_sequence=[plot_theme["accent"], "#94a3b8"],
-        )
-        cmp_fig.update_layout(
-            yaxis_title="USD (Millions)",
-            xaxis_title=None,
-            margin=dict(t=20, l=8, r=8, b=8),
-            paper_bgcolor=plot_theme["paper_bgcolor"],
-            plot_bgcolor=plot_theme["plot_bgcolor"],
-            font=dict(color=plot_theme["font_color"]),
-            legend_title_text=None,
-        )
-        cmp_fig.update_yaxes(gridcolor=plot_theme["gridcolor"])
-        st.plotly_chart(cmp_fig, width="stretch")
+@st.fragment
+def benchmark_section(payload: dict, theme: str):
+    if not st.toggle("Benchmark vs. median similar projects", value=True, key="compare_toggle"):
+        return
+    st.markdown('<div class="panel-title section-space">Benchmark: Median of Similar Projects (Core WBS)</div>', unsafe_allow_html=True)
+    st.plotly_chart(memo_figure("benchmark", payload, theme, lambda: build_benchmark(payload, theme)), width="stretch")
+
+
+@st.fragment
+def review_section(payload: dict):
+    similar_df = payload["similar_df"]
+    scaled = payload["scaled"]
+    reviewer_out = payload["reviewer_out"]
+    estimate_json = payload["estimate_json"]
+    scaling_factors = estimate_json.get("scaling_factors", {})
+    retrieval_meta = payload.get("retrieval_meta", {})
+    quality_score = float(payload.get("quality_score", 0.0))
+    controls = payload.get("controls", {})
+    total_cost = scaled["total_estimated_cost"]
+    engineering_share = (scaled["engineering_cost"] / total_cost * 100) if total_cost else 0
+    contingency_share = (scaled["contingency_cost"] / total_cost * 100) if total_cost else 0
 
-    # ---------- REVIEW + SUMMARY ----------
     st.markdown('<div class="panel-title section-space">Assumptions & Data Quality</div>', unsafe_allow_html=True)
     a1, a2 = st.columns([1.0, 1.0], gap="large")
     with a1:
@@ -851,6 +804,20 @@ if payload:
     with st.expander("Model Factors & Reasoning", expanded=False):
         st.json(estimate_json)
 
+    if payload.get("stage_timings"):
+        with st.expander("Pipeline Timings (profiling enabled)", expanded=False):
+            st.code(payload["stage_timings"], language="text")
+
+
+@st.fragment
+def summary_section(payload: dict):
+    request = payload["request"]
+    similar_df = payload["similar_df"]
+    estimate_json = payload["estimate_json"]
+    scaled = payload["scaled"]
+    reviewer_out = payload["reviewer_out"]
+    report_md = payload["report_md"]
+
     st.markdown('<div class="panel-title section-space">Executive Summary</div>', unsafe_allow_html=True)
     executive_summary_snapshot(
         request=request,
@@ -872,6 +839,408 @@ if payload:
         use_container_width=False,
     )
 
+    export_row = flatten_estimate(
+        request,
+        similar_df.iloc[0].to_dict(),
+        estimate_json.get("scaling_factors", {}),
+        scaled,
+        reviewer_out,
+        soft_costs=estimate_json.get("soft_costs", {}),
+        ranges=payload.get("ranges", {}),
+        estimate_mode=estimate_json.get("meta", {}).get("mode", "ai"),
+    )
+    st.download_button(
+        label="Download Estimate (CSV)",
+        data=pd.DataFrame([export_row], columns=EXPORT_COLUMNS).to_csv(index=False),
+        file_name="capex_estimate.csv",
+        mime="text/csv",
+        use_container_width=False,
+    )
+
+
+# ---------- DATA ----------
+DATA_PATH = "data/synthetic_capex_projects_optionA.csv"
+start_data_watcher(DATA_PATH)
+# Process-wide, parsed once per file version and shared with the Retriever.
+dataset = get_dataset(DATA_PATH)
+index = sidebar_index(DATA_PATH, dataset.fingerprint)
+project_types = index["project_types"]
+regions = index["regions"]
+year_min, year_max = index["year_range"]
+
+
+# ---------- SIDEBAR ----------
+st.sidebar.markdown("### Estimation Controls")
+if hasattr(st.sidebar, "segmented_control"):
+    appearance = st.sidebar.segmented_control(
+        "Theme",
+        options=["Light", "Dark"],
+        default="Light",
+    )
+else:
+    appearance = st.sidebar.radio("Theme", options=["Light", "Dark"], horizontal=True)
+inject_theme(appearance)
+plot_theme = build_plot_theme(appearance)
+
+project_type = st.sidebar.selectbox("Project Type", project_types)
+region = st.sidebar.selectbox("Region", regions)
+countries = index["countries_by_region"].get(region, [])
+country = st.sidebar.selectbox("Country", countries)
+capacity_stats = index["capacity"].get(project_type)
+cap_min, cap_max, cap_default, cap_step = (
+    capacity_stats["slider"] if capacity_stats else capacity_settings_for_type({}, project_type)
+)
+capacity = st.sidebar.slider("Capacity / Throughput", cap_min, cap_max, cap_default, step=cap_step)
+if capacity_stats:
+    st.sidebar.caption(
+        f"Typical {project_type}: {capacity_stats['q25']:,.0f}–{capacity_stats['q75']:,.0f} "
+        f"(middle 50% of {capacity_stats['count']:,.0f} projects)"
+    )
+execution_year_default = min(max(2022, year_min), year_max)
+execution_year = st.sidebar.slider("Execution Year", year_min, year_max, execution_year_default)
+
+st.sidebar.markdown("#### Scope & Assumptions")
+scope_template = st.sidebar.selectbox("Scope Template", SCOPE_TEMPLATES, index=0)
+scope_seed = scope_defaults(scope_template)
+
+complexity_level = st.sidebar.selectbox("Complexity Level", ["Low", "Normal", "High"], index=1)
+manual_complexity = st.sidebar.toggle("Override Complexity Factor", value=False)
+complexity_override = st.sidebar.slider("Complexity Factor", 0.95, 1.25, float(scope_seed["complexity"]), 0.01)
+complexity_target = complexity_override if manual_complexity else complexity_by_level(complexity_level)
+
+inflation_mode = st.sidebar.radio("Inflation Mode", ["Auto (from years)", "Manual (%)"], horizontal=False)
+manual_inflation_pct = st.sidebar.slider("Manual Inflation (%)", -5.0, 12.0, 3.0, 0.1)
+
+engineering_pct = st.sidebar.slider(
+    "Engineering (%)",
+    5.0,
+    15.0,
+    float(scope_seed["engineering_pct"]) * 100.0,
+    0.5,
+)
+contingency_pct = st.sidebar.slider(
+    "Contingency (%)",
+    5.0,
+    25.0,
+    float(scope_seed["contingency_pct"]) * 100.0,
+    0.5,
+)
+
+st.sidebar.markdown("#### Comparable Selection")
+country_mode = st.sidebar.radio(
+    "Country Strictness",
+    ["Country-first with fallback", "Strict country only"],
+    index=0,
+)
+top_k = st.sidebar.slider("Comparable Count (top_k)", 3, 10, 5, 1)
+recency_weight_pct = st.sidebar.slider("Recency Weight (%)", 0, 100, 35, 5)
+n_type, n_region, n_country = index["pool_sizes"](project_type, region, country)
+expected_scope = select_scope(n_type, n_region, n_country, top_k, country_mode.startswith("Strict"))
+expected_pool = {"country_strict": n_country, "country": n_country, "region": n_region, "type": n_type}.get(
+    expected_scope, len(dataset)
+)
+st.sidebar.caption(
+    f"Expected candidate pool: {expected_pool:,} projects ({expected_scope} scope). "
+    f"{n_country} in {country}, {n_region} in {region}, {n_type} of this type."
+)
+
+st.sidebar.markdown("#### Quality Threshold")
+confidence_threshold = st.sidebar.slider("Minimum Comparable Quality Score", 40, 95, 60, 1)
+threshold_action = st.sidebar.radio("When below threshold", ["Warn only", "Block estimate"], index=0)
+
+st.sidebar.markdown("#### Assumptions Snapshot")
+assumption_lines = [
+    f"- Scope: `{scope_template}`",
+    f"- Complexity factor target: `{complexity_target:.2f}`",
+    f"- Inflation: `{'Auto' if inflation_mode.startswith('Auto') else f'{manual_inflation_pct:.1f}% manual'}`",
+    f"- Engineering / Contingency: `{engineering_pct:.1f}% / {contingency_pct:.1f}%`",
+    f"- Retrieval: `{'Strict country' if country_mode.startswith('Strict') else 'Country-first fallback'}`, top_k `{top_k}`",
+    f"- Recency weight: `{recency_weight_pct}%`",
+    f"- Quality threshold: `{confidence_threshold}` ({threshold_action})",
+]
+st.sidebar.caption("\n".join(assumption_lines))
+
+prefetch_enabled = st.sidebar.toggle(
+    "Prefetch neighbouring estimates",
+    value=True,
+    help="After each estimate, compute the next capacity step and adjacent years in the background.",
+)
+run_estimate = st.sidebar.button("Run Estimate", type="primary", use_container_width=True)
+
+
+# ---------- HERO ----------
+st.markdown(
+    """
+    <div class="hero">
+      <h1>AI Project Cost Estimator</h1>
+      <p>Executive-grade CAPEX estimation for manufacturing projects with AI-assisted scaling, benchmark comparators, and risk-aware confidence checks.</p>
+    </div>
+    """,
+    unsafe_allow_html=True,
+)
+
+
+# ---------- ESTIMATION ----------
+if "estimate_view" not in st.session_state:
+    st.session_state["estimate_view"] = None
+if "stage_cache" not in st.session_state:
+    st.session_state["stage_cache"] = StageCache()
+
+if run_estimate:
+    request = {
+        "project_type": project_type,
+        "region": region,
+        "country": country,
+        "capacity": capacity,
+        "execution_year": execution_year,
+    }
+
+    spinner_msg = (
+        "Generating AI-informed scaling factors..."
+        if OPENAI_API_KEY
+        else "OPENAI_API_KEY missing, using deterministic fallback heuristics..."
+    )
+
+    settings = {
+        "top_k": top_k,
+        "strict_country": country_mode.startswith("Strict"),
+        "recency_weight": recency_weight_pct / 100.0,
+        "overrides": {
+            "complexity_target": complexity_target,
+            "engineering_pct": float(engineering_pct) / 100.0,
+            "contingency_pct": float(contingency_pct) / 100.0,
+            "manual_inflation_pct": manual_inflation_pct if inflation_mode.startswith("Manual") else None,
+        },
+        "quality_threshold": confidence_threshold,
+        "block_below_threshold": threshold_action.startswith("Block"),
+    }
+
+    timer = StageTimer()
+    try:
+        with st.spinner(spinner_msg), profiled(enabled=profiling_enabled(), name="streamlit") as prof:
+            # Profiling measures a fresh run, so it bypasses the store.
+            stored_id, stages_reused, from_store = stored_estimate(
+                DATA_PATH,
+                dataset.fingerprint,
+                request,
+                timer=timer if profiling_enabled() else None,
+                stages=st.session_state["stage_cache"],
+                **settings,
+            )
+    except (NoComparablesError, QualityBelowThresholdError) as exc:
+        st.error(str(exc))
+        st.stop()
+
+    prefetcher = get_prefetcher()
+    if prefetch_enabled and not profiling_enabled():
+        neighbours = neighbour_requests(request, cap_step, (cap_min, cap_max), (year_min, year_max))
+        prefetcher.submit([prefetch_task(DATA_PATH, dataset.fingerprint, r, settings) for r in neighbours])
+
+    st.session_state["estimate_view"] = {
+        "estimate_id": stored_id,
+        "stage_timings": timer.table() if prof.pstats_path else None,
+        "from_cache": from_store,
+        "prefetched": from_store and prefetcher.was_prefetched(stored_id),
+        "stages_reused": stages_reused,
+        "controls": {
+            "scope_template": scope_template,
+            "complexity_level": complexity_level,
+            "manual_complexity": manual_complexity,
+            "complexity_override": complexity_override,
+            "inflation_mode": inflation_mode,
+            "manual_inflation_pct": manual_inflation_pct,
+            "engineering_pct": engineering_pct,
+            "contingency_pct": contingency_pct,
+            "country_mode": country_mode,
+            "top_k": top_k,
+            "recency_weight_pct": recency_weight_pct,
+            "confidence_threshold": confidence_threshold,
+            "threshold_action": threshold_action,
+        },
+    }
+
+# ---------- SCENARIO COMPARISON ----------
+if "scenario_rows" not in st.session_state:
+    st.session_state["scenario_rows"] = scenario_seed_rows(region, country, capacity, execution_year, scope_template)
+if "scenario_payload" not in st.session_state:
+    st.session_state["scenario_payload"] = None
+
+with st.expander("Scenario Comparison", expanded=st.session_state["scenario_payload"] is not None):
+    st.caption(
+        f"Compare up to {MAX_SCENARIOS} variants of the current {project_type} request side by side. "
+        "Each row uses its scope template's complexity, engineering and contingency defaults; "
+        "comparable selection, inflation and the quality threshold come from the sidebar."
+    )
+    if st.button("Reset rows from sidebar"):
+        st.session_state["scenario_rows"] = scenario_seed_rows(region, country, capacity, execution_year, scope_template)
+        st.session_state.pop("scenario_editor", None)
+    # Same per-region lists as the sidebar, so every option has comparables.
+    all_countries = list(dict.fromkeys(c for r in regions for c in index["countries_by_region"].get(r, [])))
+    scenario_rows = st.data_editor(
+        st.session_state["scenario_rows"],
+        key="scenario_editor",
+        num_rows="dynamic",
+        hide_index=True,
+        width="stretch",
+        column_config={
+            "Region": st.column_config.SelectboxColumn(options=regions, required=True),
+            "Country": st.column_config.SelectboxColumn(options=all_countries),
+            "Capacity": st.column_config.NumberColumn(min_value=0.0, required=True),
+            "Execution Year": st.column_config.NumberColumn(
+                min_value=year_min, max_value=year_max, step=1, required=True
+            ),
+            "Scope Template": st.column_config.SelectboxColumn(options=SCOPE_TEMPLATES, required=True),
+        },
+    )
+    run_comparison = st.button("Compare Scenarios", type="primary")
+
+if run_comparison:
+    rows = scenario_rows.dropna(subset=["Region", "Capacity", "Execution Year"]).to_dict(orient="records")
+    if len(rows) > MAX_SCENARIOS:
+        st.warning(f"Only the first {MAX_SCENARIOS} scenarios are compared.")
+        rows = rows[:MAX_SCENARIOS]
+    scenarios = []
+    for i, row in enumerate(rows):
+        template = row.get("Scope Template") or scope_template
+        seed = scope_defaults(template)
+        scenario_request = {
+            "project_type": project_type,
+            "region": row["Region"],
+            "capacity": float(row["Capacity"]),
+            "execution_year": int(row["Execution Year"]),
+        }
+        if row.get("Country") in index["countries_by_region"].get(row["Region"], []):
+            scenario_request["country"] = row["Country"]
+        scenarios.append({
+            "name": row.get("Scenario") or f"Scenario {i + 1}",
+            "scope_template": template,
+            "request": scenario_request,
+            "settings": {
+                "top_k": top_k,
+                "strict_country": country_mode.startswith("Strict"),
+                "recency_weight": recency_weight_pct / 100.0,
+                "overrides": {
+                    "complexity_target": seed["complexity"],
+                    "engineering_pct": seed["engineering_pct"],
+                    "contingency_pct": seed["contingency_pct"],
+                    "manual_inflation_pct": manual_inflation_pct if inflation_mode.startswith("Manual") else None,
+                },
+                "quality_threshold": confidence_threshold,
+                "block_below_threshold": threshold_action.startswith("Block"),
+            },
+        })
+
+    if not scenarios:
+        st.warning("Add at least one scenario with a region, capacity and execution year.")
+    else:
+        clicked_at = time.time()
+        with st.spinner(f"Estimating {len(scenarios)} scenarios..."):
+            comparison = cached_scenarios(DATA_PATH, dataset.fingerprint, scenarios)
+        st.session_state["scenario_payload"] = {
+            # Only what the comparison renders; full results stay in the shared cache.
+            "scenarios": [
+                {
+                    "name": out["name"],
+                    "request": out["request"],
+                    "scope_template": scenario["scope_template"],
+                    "error": out["error"],
+                    "ranges": out["result"]["ranges"] if out["result"] else None,
+                    "confidence": out["result"]["reviewer_out"].get("confidence", "-") if out["result"] else "-",
+                    "quality_score": out["result"]["quality_score"] if out["result"] else None,
+                }
+                for scenario, out in zip(scenarios, comparison["scenarios"])
+            ],
+            "unique": comparison["unique"],
+            "groups": comparison["groups"],
+            "wall_ms": comparison["wall_ms"],
+            "from_cache": comparison["computed_at"] < clicked_at,
+        }
+
+scenario_payload = st.session_state.get("scenario_payload")
+if scenario_payload:
+    st.markdown('<div class="panel-title section-space">Scenario Comparison</div>', unsafe_allow_html=True)
+    if scenario_payload["from_cache"]:
+        st.caption("Served from the shared estimate cache (same scenarios, settings and dataset version).")
+    else:
+        st.caption(
+            f"{len(scenario_payload['scenarios'])} scenarios, {scenario_payload['unique']} unique, "
+            f"{scenario_payload['groups']} retrieval groups run concurrently in {scenario_payload['wall_ms'] / 1000.0:,.2f}s."
+        )
+
+    comparison_rows = []
+    for item in scenario_payload["scenarios"]:
+        row = {
+            "Scenario": item["name"],
+            "Region": item["request"]["region"],
+            "Country": item["request"].get("country", "-"),
+            "Capacity": item["request"]["capacity"],
+            "Year": item["request"]["execution_year"],
+            "Scope": item["scope_template"],
+        }
+        if item["error"]:
+            row.update({"P50 (USD, M)": None, "P80 (USD, M)": None, "P90 (USD, M)": None,
+                        "Confidence": "-", "Quality": None, "Status": item["error"]})
+        else:
+            row.update({
+                "P50 (USD, M)": item["ranges"]["p50"] / 1_000_000,
+                "P80 (USD, M)": item["ranges"]["p80"] / 1_000_000,
+                "P90 (USD, M)": item["ranges"]["p90"] / 1_000_000,
+                "Confidence": item["confidence"],
+                "Quality": round(item["quality_score"], 1),
+                "Status": "OK",
+            })
+        comparison_rows.append(row)
+    comparison_df = pd.DataFrame(comparison_rows)
+    base_p50 = comparison_df["P50 (USD, M)"].iloc[0]
+    comparison_df["vs First (%)"] = (comparison_df["P50 (USD, M)"] / base_p50 - 1.0) * 100.0 if base_p50 else None
+    st.dataframe(
+        comparison_df.round({"P50 (USD, M)": 2, "P80 (USD, M)": 2, "P90 (USD, M)": 2, "vs First (%)": 1}),
+        width="stretch",
+        hide_index=True,
+    )
+
+    chart_df = comparison_df.dropna(subset=["P50 (USD, M)"]).melt(
+        id_vars=["Scenario"],
+        value_vars=["P50 (USD, M)", "P80 (USD, M)", "P90 (USD, M)"],
+        var_name="Range",
+        value_name="USD (Millions)",
+    )
+    if not chart_df.empty:
+        scenario_fig = px.bar(
+            chart_df,
+            x="Scenario",
+            y="USD (Millions)",
+            color="Range",
+            barmode="group",
+            color_discrete_sequence=plot_theme["colors"],
+        )
+        scenario_fig.update_layout(
+            xaxis_title=None,
+            legend_title_text=None,
+            margin=dict(t=18, l=8, r=8, b=8),
+            paper_bgcolor=plot_theme["paper_bgcolor"],
+            plot_bgcolor=plot_theme["plot_bgcolor"],
+            font=dict(color=plot_theme["font_color"]),
+        )
+        scenario_fig.update_yaxes(gridcolor=plot_theme["gridcolor"])
+        st.plotly_chart(scenario_fig, width="stretch")
+
+view = st.session_state.get("estimate_view")
+payload = None
+if view:
+    estimate = get_store().get(view["estimate_id"])
+    if estimate is None:
+        st.info("This estimate was evicted from the server-side store. Click Run Estimate to recompute it.")
+    else:
+        payload = {**estimate, **view, "id": view["estimate_id"]}
+
+if payload:
+    kpi_section(payload)
+    wbs_section(payload, appearance)
+    benchmark_section(payload, appearance)
+    review_section(payload)
+    summary_section(payload)
+
 else:
     st.info("Configure project parameters in the sidebar, then click Run Estimate.")
     if not OPENAI_API_KEY:
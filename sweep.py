@@ -0,0 +1,267 @@
+"""
+Parallel hyperparameter sweep over the leave-one-out backtest.
+
+Each regional-index variant is prepared once (backtest.prepare_backtest) in the
+parent and its arrays are copied into one shared-memory block. Pool workers
+attach to the blocks and evaluate grid points without copying or re-parsing
+anything.
+
+Grid points run in fixed-size waves. With early stopping on, each point first
+evaluates a seeded sample (seed, grid index) of `min_fraction` of the projects,
+stratified across project types. It is pruned if that partial MAPE is worse
+than (1 + early_stop) times the best MAPE completed in earlier waves. Pruning
+therefore does not depend on worker scheduling.
+"""
+import itertools
+import math
+import multiprocessing as mp
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest import estimate_block, prepare_backtest
+from config import REGIONAL_INDEX
+from dataset import get_dataset
+from estimator_agent import FALLBACK_CAPACITY_EXPONENT
+from tracing import configure_worker
+
+SHARDS = 10
+_ALIGN = 64
+
+# Worker state: attached shared-memory handles and the prepared arrays per variant.
+_STATE: Dict[str, Any] = {}
+
+
+def _to_shared(prepared: Dict[str, Any]) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+    """Copy the prepared numpy arrays into one shared-memory block and describe its layout."""
+    arrays = [(None, key, np.ascontiguousarray(value))
+              for key, value in prepared.items() if isinstance(value, np.ndarray)]
+    for i, part in enumerate(prepared["partitions"]):
+        arrays += [(i, key, np.ascontiguousarray(value)) for key, value in part.items()]
+
+    size = sum(math.ceil(arr.nbytes / _ALIGN) * _ALIGN for _, _, arr in arrays)
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    layout, offset = [], 0
+    for part, key, arr in arrays:
+        np.ndarray(arr.shape, arr.dtype, buffer=shm.buf, offset=offset)[...] = arr
+        layout.append((part, key, arr.shape, arr.dtype.str, offset))
+        offset += math.ceil(arr.nbytes / _ALIGN) * _ALIGN
+
+    return shm, {"name": shm.name, "layout": layout, **_blocks_spec(prepared)}
+
+
+def _blocks_spec(prepared: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "n_partitions": len(prepared["partitions"]),
+        "n_rows": sum(len(part["q"]) for part in prepared["partitions"]),
+    }
+
+
+def _from_shared(spec: Dict[str, Any]) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+    shm = shared_memory.SharedMemory(name=spec["name"])
+    prepared: Dict[str, Any] = {"partitions": [{} for _ in range(spec["n_partitions"])]}
+    for part, key, shape, dtype, offset in spec["layout"]:
+        arr = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf, offset=offset)
+        arr.flags.writeable = False
+        (prepared if part is None else prepared["partitions"][part])[key] = arr
+    return shm, prepared
+
+
+def _init_worker(specs: List[Dict[str, Any]]):
+    configure_worker()
+    # Workers share the parent's resource tracker; the parent unlinks the blocks.
+    _STATE["specs"] = specs
+    _STATE["shm"], _STATE["prepared"] = [], []
+    for spec in specs:
+        shm, prepared = _from_shared(spec)
+        _STATE["shm"].append(shm)
+        _STATE["prepared"].append(prepared)
+
+
+def _metrics(outs: List[Dict[str, np.ndarray]], type_code: np.ndarray) -> Dict[str, float]:
+    q = np.concatenate([o["q"] for o in outs])
+    order = np.argsort(q)  # fixed summation order, independent of block order
+    q = q[order]
+    estimate = np.concatenate([o["estimate"] for o in outs])[order]
+    actual = np.concatenate([o["actual"] for o in outs])[order]
+    p80 = np.concatenate([o["p80"] for o in outs])[order]
+    pct_error = (estimate - actual) / actual
+    ape = np.abs(pct_error)
+    codes = type_code[q]
+    counts = np.bincount(codes)
+    type_mape = np.bincount(codes, weights=ape)[counts > 0] / counts[counts > 0]
+    return {
+        "mape_pct": float(ape.mean() * 100.0),
+        "bias_pct": float(pct_error.mean() * 100.0),
+        "p80_coverage_pct": float((actual <= p80).mean() * 100.0),
+        "worst_type_mape_pct": float(type_mape.max() * 100.0),
+        "rows_evaluated": int(len(q)),
+    }
+
+
+def _evaluate(point: Dict[str, Any]) -> Dict[str, Any]:
+    spec = _STATE["specs"][point["variant"]]
+    prepared = _STATE["prepared"][point["variant"]]
+    rng = np.random.default_rng([point["seed"], point["index"]])
+    threshold = point["threshold"]
+
+    # Rows are dealt into SHARDS interleaved shards per partition, so a partial
+    # result covers all project types. With a threshold, a seeded min_fraction
+    # of the shards runs first and the rest only if the point is not clearly worse.
+    if threshold is None:
+        stages = [None]
+    else:
+        order = rng.permutation(SHARDS)
+        first = max(1, math.ceil(point["min_fraction"] * SHARDS))
+        stages = [order[:first], order[first:]]
+
+    outs: List[Dict[str, np.ndarray]] = []
+    status = "complete"
+    for shards in stages:
+        for part in prepared["partitions"]:
+            rows = slice(None) if shards is None else np.flatnonzero(np.isin(np.arange(len(part["q"])) % SHARDS, shards))
+            if len(part["q"][rows]) == 0:
+                continue
+            outs.append(estimate_block(
+                prepared,
+                part,
+                rows,
+                top_k=point["top_k"],
+                recency_weight=point["recency_weight"],
+                strict_country=point["strict_country"],
+                capacity_exponent=point["capacity_exponent"],
+            ))
+        if shards is not None and len(shards) < SHARDS and outs:
+            ape = np.concatenate([np.abs((o["estimate"] - o["actual"]) / o["actual"]) for o in outs])
+            if float(ape.mean() * 100.0) > threshold:
+                status = "pruned"
+                break
+
+    return {"index": point["index"], "status": status, **_metrics(outs, prepared["type_code"])}
+
+
+def regional_variants(overrides: Optional[Dict[str, List[float]]] = None) -> List[Tuple[str, Dict[str, float]]]:
+    """Every combination of per-region index overrides applied to config.REGIONAL_INDEX."""
+    if not overrides:
+        return [("default", dict(REGIONAL_INDEX))]
+    unknown = [r for r in overrides if r not in REGIONAL_INDEX]
+    if unknown:
+        raise ValueError(f"Unknown regions in regional index overrides: {', '.join(unknown)}")
+    regions = sorted(overrides)
+    variants = []
+    for values in itertools.product(*(overrides[r] for r in regions)):
+        label = "; ".join(f"{r}={v:g}" for r, v in zip(regions, values))
+        variants.append((label, {**REGIONAL_INDEX, **dict(zip(regions, map(float, values)))}))
+    return variants
+
+
+def run_sweep(data: str,
+              top_k: List[int] = (5,),
+              recency_weight: List[float] = (0.0,),
+              strict_country: List[bool] = (False,),
+              capacity_exponent: List[float] = (FALLBACK_CAPACITY_EXPONENT,),
+              regional_overrides: Optional[Dict[str, List[float]]] = None,
+              workers: int = 0,
+              seed: int = 0,
+              early_stop: float = 0.25,
+              min_fraction: float = 0.3,
+              wave_size: int = 0,
+              progress: bool = True) -> pd.DataFrame:
+    """
+    Backtest every grid point and return the results ranked by MAPE
+    (completed points first, then pruned points by their partial MAPE).
+
+    workers <= 0 uses all CPUs; workers == 1 runs in-process. early_stop <= 0
+    disables pruning. wave_size <= 0 uses 2 * workers (at least 8).
+    """
+    dataset = get_dataset(data)
+    variants = regional_variants(regional_overrides)
+    grid = list(itertools.product(
+        range(len(variants)), top_k, recency_weight, strict_country, capacity_exponent
+    ))
+    points = [
+        {
+            "index": i,
+            "variant": v,
+            "top_k": int(k),
+            "recency_weight": float(w),
+            "strict_country": bool(s),
+            "capacity_exponent": float(e),
+            "seed": int(seed),
+            "min_fraction": float(min_fraction),
+        }
+        for i, (v, k, w, s, e) in enumerate(grid)
+    ]
+    workers = workers if workers > 0 else (mp.cpu_count() or 1)
+    workers = max(1, min(workers, len(points)))
+    wave_size = wave_size if wave_size > 0 else max(8, 2 * workers)
+
+    shms, specs, prepared = [], [], []
+    try:
+        for _, index in variants:
+            prepared.append(prepare_backtest(dataset, index))
+            if workers > 1:
+                shm, spec = _to_shared(prepared[-1])
+                shms.append(shm)
+                specs.append(spec)
+            else:
+                specs.append(_blocks_spec(prepared[-1]))
+
+        results: List[Dict[str, Any]] = []
+        best = math.inf
+        start = time.perf_counter()
+        pool = None
+        if workers == 1:
+            _STATE.update(specs=specs, prepared=prepared)
+        else:
+            method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+            pool = mp.get_context(method).Pool(workers, initializer=_init_worker, initargs=(specs,))
+        try:
+            for w in range(0, len(points), wave_size):
+                # Threshold only from earlier waves, so pruning is deterministic.
+                threshold = best * (1.0 + early_stop) if early_stop > 0 and math.isfinite(best) else None
+                wave = [dict(p, threshold=threshold) for p in points[w:w + wave_size]]
+                out = pool.map(_evaluate, wave) if pool is not None else [_evaluate(p) for p in wave]
+                results += out
+                best = min([best] + [r["mape_pct"] for r in out if r["status"] == "complete"])
+                if progress:
+                    sys.stderr.write(
+                        f"\r{len(results)}/{len(points)} grid points  best MAPE {best:.2f}%  "
+                        f"{time.perf_counter() - start:,.1f}s"
+                    )
+                    sys.stderr.flush()
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            else:
+                _STATE.clear()
+        if progress:
+            sys.stderr.write("\n")
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+    rows = []
+    for r in results:
+        p = points[r["index"]]
+        rows.append({
+            "regional_index": variants[p["variant"]][0],
+            "top_k": p["top_k"],
+            "recency_weight": p["recency_weight"],
+            "strict_country": p["strict_country"],
+            "capacity_exponent": p["capacity_exponent"],
+            **{k: v for k, v in r.items() if k != "index"},
+        })
+    table = pd.DataFrame(rows)
+    if table.empty:
+        return table
+    table["_pruned"] = table["status"] != "complete"
+    table = table.sort_values(["_pruned", "mape_pct"], kind="stable").drop(columns="_pruned").reset_index(drop=True)
+    table.insert(0, "rank", np.arange(1, len(table) + 1))
+    return table
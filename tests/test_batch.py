@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import pandas as pd
+
+from batch import run_batch
+
+DATA = str(Path(__file__).resolve().parents[1] / "data" / "synthetic_capex_projects_optionA.csv")
+
+
+def test_invalid_rows_are_written_as_errors(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    requests = tmp_path / "requests.csv"
+    requests.write_text(
+        "estimate_id,project_type,region,capacity,execution_year\n"
+        "ok,Filling Line,Europe,450,2022\n"
+        "no-capacity,Filling Line,Europe,,2022\n"
+        "zero-capacity,Filling Line,Europe,0,2022\n"
+        "no-year,Filling Line,Europe,450,\n"
+    )
+    output = tmp_path / "out.csv"
+    assert run_batch(str(requests), str(output), DATA, workers=1, progress=False) == 4
+
+    out = pd.read_csv(output).set_index("estimate_id")
+    assert out.loc["ok", "estimate_mode"] != "error"
+    for bad in ("no-capacity", "zero-capacity", "no-year"):
+        assert out.loc[bad, "estimate_mode"] == "error", bad
+        assert out.loc[bad, "confidence"] == "Low", bad
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from reviewer import WBS_KEYS, review, review_batch
+
+EVEN_MIX = [25.0, 25.0, 25.0, 25.0]
+
+
+def comparables(mixes, total=100.0):
+    return [{"total_cost_usd": total, **dict(zip(WBS_KEYS, mix))} for mix in mixes]
+
+
+def estimate(mix, total=None, engineering=0.1, contingency=0.1, complexity=1.0):
+    wbs = dict(zip(WBS_KEYS, mix))
+    wbs_total = sum(mix)
+    return {
+        "scaled_wbs_costs": wbs,
+        "engineering_cost": engineering * wbs_total,
+        "contingency_cost": contingency * wbs_total,
+        "total_estimated_cost": total if total is not None else wbs_total * (1 + engineering + contingency),
+        "complexity_modifier": complexity,
+    }
+
+
+CASES = {
+    "clean": (comparables([EVEN_MIX] * 4), estimate(EVEN_MIX)),
+    # Civil +25 pts and mechanical -15 pts: two WBS categories deviate.
+    "two_wbs_categories": (comparables([EVEN_MIX] * 4), estimate([50.0, 10.0, 20.0, 20.0])),
+    "one_wbs_category": (comparables([EVEN_MIX] * 4), estimate([40.0, 20.0, 20.0, 20.0])),
+    "wbs_and_total": (comparables([EVEN_MIX] * 4), estimate([50.0, 10.0, 20.0, 20.0], total=500.0)),
+    "complexity_and_contingency": (
+        comparables([EVEN_MIX] * 4),
+        estimate(EVEN_MIX, contingency=0.4, complexity=1.5),
+    ),
+    "too_few_comparables": (comparables([EVEN_MIX] * 2), estimate([70.0, 10.0, 10.0, 10.0])),
+}
+
+
+def test_review_batch_matches_single_reviews():
+    estimates, comps, singles = [], [], {}
+    for name, (similar_rows, est) in CASES.items():
+        estimates.append({"estimate_id": name, **est["scaled_wbs_costs"], **{k: v for k, v in est.items() if k != "scaled_wbs_costs"}})
+        comps += [{"estimate_id": name, **row} for row in similar_rows]
+        singles[name] = review(similar_rows, est, {"complexity_modifier": est["complexity_modifier"]})
+
+    batch = review_batch(pd.DataFrame(estimates), pd.DataFrame(comps)).set_index("estimate_id")
+    for name, single in singles.items():
+        assert batch.loc[name, "flag_count"] == len(single["flags"]), name
+        assert batch.loc[name, "confidence"] == single["confidence"], name
+
+
+@pytest.mark.parametrize("name, flags, confidence", [
+    ("clean", 0, "High"),
+    ("one_wbs_category", 1, "Medium"),
+    ("two_wbs_categories", 2, "Low"),
+    ("too_few_comparables", 0, "High"),
+])
+def test_each_deviating_wbs_category_counts(name, flags, confidence):
+    similar_rows, est = CASES[name]
+    out = review(similar_rows, est, {"complexity_modifier": est["complexity_modifier"]})
+    assert len(out["flags"]) == flags
+    assert out["confidence"] == confidence
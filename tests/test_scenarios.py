@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import scenarios
+from scenarios import run_scenarios
+
+DATA = str(Path(__file__).resolve().parents[1] / "data" / "synthetic_capex_projects_optionA.csv")
+
+
+def test_failing_scenario_is_recorded_on_its_row(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    run_pipeline = scenarios.run_pipeline
+
+    def flaky(retriever, estimator, request, **kwargs):
+        if request["capacity"] == 500:
+            raise RuntimeError("estimator crashed")
+        return run_pipeline(retriever, estimator, request, **kwargs)
+
+    monkeypatch.setattr(scenarios, "run_pipeline", flaky)
+    request = {"project_type": "Filling Line", "region": "Europe", "execution_year": 2022}
+    out = run_scenarios(DATA, [
+        {"name": "ok", "request": {**request, "capacity": 450.0}},
+        {"name": "bad", "request": {**request, "capacity": 500.0}},
+        {"name": "also ok", "request": {**request, "capacity": 550.0}},
+    ])
+
+    rows = {row["name"]: row for row in out["scenarios"]}
+    assert rows["bad"]["result"] is None
+    assert rows["bad"]["error"] == "estimator crashed"
+    for name in ("ok", "also ok"):
+        assert rows[name]["error"] is None, name
+        assert rows[name]["result"] is not None, name
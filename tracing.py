@@ -0,0 +1,169 @@
+"""
+Lightweight span tracing to a rotating JSONL file.
+
+Set CAPEX_TRACE_FILE=traces/spans.jsonl to enable. Each line is an OTLP/JSON
+ExportTraceServiceRequest holding one finished span, the same layout the
+OpenTelemetry Collector file exporter writes, so OTLP-aware viewers can load
+the file directly. No collector service or OpenTelemetry SDK is needed.
+When tracing is disabled, span() returns a shared no-op and costs a single
+attribute lookup.
+
+Optional settings: CAPEX_TRACE_MAX_BYTES (default 10 MB per file) and
+CAPEX_TRACE_BACKUPS (default 5 rotated files). Pool workers call
+configure_worker() and write their own <file>.w<pid>, so no two processes
+rotate the same file.
+Aggregate with: python scripts/trace_report.py traces/spans.jsonl
+"""
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+SERVICE_NAME = "capex-estimator"
+TRACE_FILE_ENV = "CAPEX_TRACE_FILE"
+TRACE_MAX_BYTES_ENV = "CAPEX_TRACE_MAX_BYTES"
+TRACE_BACKUPS_ENV = "CAPEX_TRACE_BACKUPS"
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("capex_current_span", default=None)
+_logger: Optional[logging.Logger] = None
+_path: Optional[str] = None
+_configured = False
+_lock = threading.Lock()
+
+
+def configure(path: Optional[str] = None, max_bytes: Optional[int] = None, backups: Optional[int] = None):
+    """(Re)configure the trace sink. With no path and no CAPEX_TRACE_FILE, tracing is disabled."""
+    global _logger, _path, _configured
+    with _lock:
+        if _logger is not None:
+            for handler in list(_logger.handlers):
+                handler.close()
+                _logger.removeHandler(handler)
+            _logger = None
+
+        path = path or os.getenv(TRACE_FILE_ENV)
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                path,
+                maxBytes=int(max_bytes or os.getenv(TRACE_MAX_BYTES_ENV) or 10_000_000),
+                backupCount=int(backups or os.getenv(TRACE_BACKUPS_ENV) or 5),
+                encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("capex.tracing")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            logger.addHandler(handler)
+            _logger = logger
+        _path = path or None
+        _configured = True
+
+
+def configure_worker():
+    """
+    Pool initializer hook: point this process at its own <trace file>.w<pid>.
+    Forked workers otherwise inherit the parent's handler. Several processes
+    rotating one file lose spans.
+    """
+    base = _path if _configured else os.getenv(TRACE_FILE_ENV)
+    configure(f"{base}.w{os.getpid()}" if base else None)
+
+
+def enabled() -> bool:
+    if not _configured:
+        configure()
+    return _logger is not None
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "attributes", "error", "_token")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        parent = _current_span.get()
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else ""
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.error = None
+        self.start_ns = 0
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        record = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+                    {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "capex.tracing"},
+                    "spans": [{
+                        "traceId": self.trace_id,
+                        "spanId": self.span_id,
+                        "parentSpanId": self.parent_id,
+                        "name": self.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(self.start_ns),
+                        "endTimeUnixNano": str(end_ns),
+                        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+                        "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+                    }],
+                }],
+            }]
+        }
+        logger = _logger
+        if logger is not None:
+            logger.info(json.dumps(record, separators=(",", ":")))
+        return False
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attributes):
+    """Context manager recording one span; nested spans share the trace and link to their parent."""
+    if not enabled():
+        return _NOOP
+    return Span(name, attributes)